@@ -0,0 +1,96 @@
+"""Download throughput against the local stub server serving large files.
+
+Compares the previous 8KB aiofiles loop with DownloadWriter settings.
+Run from the repository root:
+
+    python -m benchmarks.bench_download --size-mb 64 --rounds 3
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import aiofiles
+import aiohttp
+
+from services.download import DownloadWriter
+from tests.stub_server import StubFlibustaServer
+
+
+async def legacy_download(session, url: str, path: Path) -> None:
+    """8KB chunks written through aiofiles, one thread hop per chunk."""
+    async with session.get(url) as response:
+        response.raise_for_status()
+        async with aiofiles.open(path, "wb") as f:
+            async for chunk in response.content.iter_chunked(8192):
+                await f.write(chunk)
+
+
+def writer_download(chunk_size: int, preallocate: bool = False, **writer_kwargs):
+    """DownloadWriter with the given read chunk size and writer settings."""
+
+    async def download(session, url: str, path: Path) -> None:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            writer = DownloadWriter(
+                path,
+                preallocate_size=response.content_length if preallocate else None,
+                **writer_kwargs,
+            )
+            async with writer:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    await writer.write(chunk)
+
+    return download
+
+
+VARIANTS = {
+    "aiofiles 8KB (old)": legacy_download,
+    "writer 256KB/4MB fsync=end": writer_download(262144, fsync_policy="end"),
+    "writer 256KB/4MB fsync=none": writer_download(262144, fsync_policy="none"),
+    "writer +preallocate": writer_download(
+        262144, fsync_policy="end", preallocate=True
+    ),
+    "writer 256KB/16MB fsync=end": writer_download(
+        262144, buffer_size=16 * 1024 * 1024, fsync_policy="end"
+    ),
+}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    async with StubFlibustaServer(file_size=size) as server:
+        url = f"{server.base_url}/b/1/epub"
+        print(f"File size: {args.size_mb} MB, rounds: {args.rounds}")
+        print(f"{'variant':<30}{'MB/s':>10}{'wall s':>10}{'cpu s':>10}")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            async with aiohttp.ClientSession() as session:
+                for name, download in VARIANTS.items():
+                    wall = cpu = 0.0
+                    for i in range(args.rounds):
+                        path = Path(tmp) / f"book_{i}.epub"
+                        wall_start = time.perf_counter()
+                        cpu_start = time.process_time()
+                        await download(session, url, path)
+                        wall += time.perf_counter() - wall_start
+                        cpu += time.process_time() - cpu_start
+                        assert path.stat().st_size == size
+                        path.unlink()
+                    wall /= args.rounds
+                    cpu /= args.rounds
+                    print(
+                        f"{name:<30}{args.size_mb / wall:>10.1f}"
+                        f"{wall:>10.3f}{cpu:>10.3f}"
+                    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""Payload size and encode time of tool results on the 5803 fixtures.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_projection
+"""
+
+import json
+import time
+from pathlib import Path
+
+from services.parser import FlibustaParser
+from services.projection import project_items
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+FIXTURES = ["author_5803_default.html", "author_5803_by_date.html"]
+ROUNDS = 20
+
+VARIANTS = {
+    "full models": lambda books: [book.model_dump() for book in books],
+    "objects": lambda books: project_items(books),
+    "objects id,title": lambda books: project_items(books, ["id", "title"]),
+    "compact": lambda books: project_items(books, output_format="compact"),
+    "compact id,title,year": lambda books: project_items(
+        books, ["id", "title", "year"], "compact"
+    ),
+}
+
+
+def measure(books, serialize) -> tuple[int, float]:
+    """Return payload size in bytes and mean encode time in ms."""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        payload = json.dumps(serialize(books), ensure_ascii=False).encode("utf-8")
+    elapsed = (time.perf_counter() - start) / ROUNDS
+    return len(payload), elapsed * 1000
+
+
+def main():
+    parser = FlibustaParser()
+    for fixture in FIXTURES:
+        html = (TEST_DATA / fixture).read_text(encoding="utf-8")
+        books = parser.parse_author_books(html)
+        print(f"\n{fixture}: {len(books)} books")
+        print(f"{'variant':<24}{'bytes':>10}{'ratio':>8}{'encode ms':>12}")
+
+        baseline = None
+        for name, serialize in VARIANTS.items():
+            size, ms = measure(books, serialize)
+            baseline = baseline or size
+            print(f"{name:<24}{size:>10}{size / baseline:>8.2f}{ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
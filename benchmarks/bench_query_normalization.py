@@ -0,0 +1,110 @@
+"""Search cache hit ratio on a replayed query log with and without normalization.
+
+The log is generated from base author/title queries with the spelling
+variations agents produce: case, extra whitespace, ё/е and Latin spelling.
+Each mode is replayed through FlibustaService against the stub server.
+Run from the repository root:
+
+    python -m benchmarks.bench_query_normalization --queries 2000
+"""
+
+import argparse
+import asyncio
+import random
+
+from services.cache import ResultCache
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+from tests.stub_server import StubFlibustaServer
+
+# (Cyrillic spelling, Latin spelling)
+BASE_QUERIES = [
+    ("Стивен Кинг", "stiven king"),
+    ("Лев Толстой", "lev tolstoy"),
+    ("Фёдор Достоевский", "fedor dostoyevsky"),
+    ("Антон Чехов", "anton chekhov"),
+    ("Михаил Булгаков", "mikhail bulgakov"),
+    ("Борис Акунин", "boris akunin"),
+    ("Сергей Лукьяненко", "sergey lukyanenko"),
+    ("Виктор Пелевин", "viktor pelevin"),
+    ("Зелёная миля", "zelenaya milya"),
+    ("Сияние", "siyanie"),
+    ("Мастер и Маргарита", "master i margarita"),
+    ("Пикник на обочине", "piknik na obochine"),
+]
+
+
+def make_query_log(size: int, seed: int = 1) -> list[str]:
+    """Generate query log with realistic spelling variations."""
+    rnd = random.Random(seed)  # noqa: S311
+    variations = [
+        lambda q: q,
+        lambda q: q.lower(),
+        lambda q: q.upper(),
+        lambda q: q + " ",
+        lambda q: "  ".join(q.split()),
+        lambda q: q.replace("ё", "е").replace("Ё", "Е"),
+    ]
+    log = []
+    for _ in range(size):
+        cyrillic, latin = rnd.choice(BASE_QUERIES)
+        base = latin if rnd.random() < 0.25 else cyrillic
+        log.append(rnd.choice(variations)(base))
+    return log
+
+
+async def replay(base_url: str, log: list[str], transliterate: bool | None) -> dict:
+    """Replay log; transliterate=None keys the cache by the raw query."""
+    cache = ResultCache()
+    service = FlibustaService(
+        FlibustaClient(base_url),
+        FlibustaParser(),
+        cache=cache,
+        transliterate=bool(transliterate),
+    )
+
+    async def raw_search(query):
+        # Previous behaviour: the raw query is the request and the cache key
+        async def load():
+            html = await service.client.search_books_page(query)
+            return service.parser.parse_books_search(html)
+
+        return await cache.get_or_load("search_books", {"query": query}, list, load)
+
+    search = raw_search if transliterate is None else service.search_books
+    async with service.client:
+        for query in log:
+            await search(query)
+
+    stats = cache.stats
+    lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+    return {"hit_ratio": (lookups - stats["misses"]) / lookups, **stats}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    log = make_query_log(args.queries)
+    async with StubFlibustaServer() as server:
+        print(f"Replayed queries: {len(log)}, distinct raw: {len(set(log))}")
+        print(f"{'mode':<28}{'hit ratio':>10}{'misses':>8}{'origin':>8}")
+        modes = [
+            ("raw query", None),
+            ("normalized", False),
+            ("normalized + translit", True),
+        ]
+        for name, transliterate in modes:
+            before = server.requests["search"]
+            result = await replay(server.base_url, log, transliterate)
+            origin = server.requests["search"] - before
+            print(
+                f"{name:<28}{result['hit_ratio']:>10.3f}"
+                f"{result['misses']:>8}{origin:>8}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
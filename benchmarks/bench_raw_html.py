@@ -0,0 +1,128 @@
+"""CPU and memory of text vs raw bytes pages and cache payloads.
+
+Fetches the ~600KB author fixtures from the local stub server and builds
+the parse tree the way the service did before (decoded str, plus a second
+soup for the author name) and with raw bytes and the declared charset.
+Also compares JSON-wrapped and raw cache files. Run from the repository
+root:
+
+    python -m benchmarks.bench_raw_html --rounds 5
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from pydantic import TypeAdapter
+
+from models import Book
+from services.cache import FileCacheBackend
+from services.client import FlibustaClient
+from tests.stub_server import StubFlibustaServer
+
+FIXTURES = {"default": "default", "by_date": "date"}
+
+
+async def measure(fn, rounds: int) -> tuple[float, float]:
+    """Return (CPU ms per call, peak traced MB) of an async callable."""
+    await fn()
+    cpu_start = time.process_time()
+    for _ in range(rounds):
+        await fn()
+    cpu = (time.process_time() - cpu_start) / rounds * 1000
+
+    tracemalloc.start()
+    await fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak / 1024 / 1024
+
+
+async def bench_pages(rounds: int) -> None:
+    print(f"{'author page':<12}{'path':<26}{'cpu ms':>10}{'peak MB':>10}")
+
+    async with StubFlibustaServer() as server:
+        async with FlibustaClient(server.base_url) as client:
+            for fixture, order in FIXTURES.items():
+
+                async def text_path(order=order):
+                    html = await client.get_author_books_page("5803", order)
+                    # Name extraction and parsing each built a soup
+                    BeautifulSoup(html, "lxml").find("h1", class_="title")
+                    BeautifulSoup(html, "lxml")
+
+                async def raw_path(order=order):
+                    html, encoding = await client.get_author_books_page(
+                        "5803", order, raw=True
+                    )
+                    BeautifulSoup(html, "lxml", from_encoding=encoding)
+
+                async def fetch_text(order=order):
+                    await client.get_author_books_page("5803", order)
+
+                async def fetch_raw(order=order):
+                    await client.get_author_books_page("5803", order, raw=True)
+
+                variants = [
+                    ("fetch text", fetch_text),
+                    ("fetch bytes", fetch_raw),
+                    ("text + 2 soups (old)", text_path),
+                    ("bytes + 1 soup", raw_path),
+                ]
+                for name, fn in variants:
+                    cpu, peak = await measure(fn, rounds)
+                    print(f"{fixture:<12}{name:<26}{cpu:>10.1f}{peak:>10.1f}")
+
+
+async def bench_cache(rounds: int) -> None:
+    books = [
+        Book(
+            id=str(100000 + i),
+            title=f"Книга номер {i}: Тёмная башня",
+            authors=["Стивен Кинг"],
+            series=["Тёмная башня"],
+            year=1970 + i % 50,
+            added_date="17.06.2025",
+        )
+        for i in range(1000)
+    ]
+    adapter = TypeAdapter(list[Book])
+    payload = adapter.dump_json(books)
+    print(f"\nCache payload: {len(payload) / 1024:.0f} KB of JSON for 1000 books")
+    print(f"{'storage':<12}{'file KB':>10}{'set ms':>10}{'get+parse ms':>14}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, raw in (("json", False), ("raw", True)):
+            backend = FileCacheBackend(Path(tmp) / name, raw=raw)
+
+            start = time.process_time()
+            for _ in range(rounds):
+                backend.set("key", time.time(), payload)
+            set_ms = (time.process_time() - start) / rounds * 1000
+
+            adapter.validate_json(backend.get("key")[1])
+            start = time.process_time()
+            for _ in range(rounds):
+                _, stored = backend.get("key")
+                adapter.validate_json(stored)
+            get_ms = (time.process_time() - start) / rounds * 1000
+
+            size = backend._path("key").stat().st_size / 1024
+            print(f"{name:<12}{size:>10.0f}{set_ms:>10.2f}{get_ms:>14.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    await bench_pages(args.rounds)
+    await bench_cache(args.rounds * 40)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
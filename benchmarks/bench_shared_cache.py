@@ -0,0 +1,154 @@
+"""Cache backends shared by several server processes.
+
+Starts separate processes, as stdio MCP clients do, that look up the same
+set of pages through ResultCache. A miss costs a simulated page fetch.
+With per-process memory caches every process fetches each page itself;
+with a shared persistent backend pages fetched by one process are served
+to the others. A second run hammers the backends with raw reads and
+writes from all processes. Run from the repository root:
+
+    python -m benchmarks.bench_shared_cache --processes 5
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from models import Book
+from services.cache import FileCacheBackend, ResultCache, SqliteCacheBackend
+
+
+def make_backend(name: str, directory: str, max_mb: int):
+    if name == "file":
+        return FileCacheBackend(Path(directory) / "results")
+    if name == "sqlite":
+        return SqliteCacheBackend(
+            Path(directory) / "results.sqlite3", max_bytes=max_mb * 1024 * 1024
+        )
+    return None
+
+
+def books_page(page: int) -> list[Book]:
+    return [
+        Book(
+            id=str(page * 1000 + i),
+            title=f"Книга {page}-{i}",
+            authors=["Стивен Кинг"],
+            year=1970 + i,
+        )
+        for i in range(50)
+    ]
+
+
+async def lookup_workload(args: tuple) -> dict:
+    name, directory, seed, options = args
+    cache = ResultCache(make_backend(name, directory, options["max_mb"]))
+    rng = random.Random(seed)  # noqa: S311
+    fetches = 0
+
+    async def fetch(page: int) -> list[Book]:
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(options["latency"])
+        return books_page(page)
+
+    start = time.perf_counter()
+    for _ in range(options["lookups"]):
+        # Agents tend to look at the same popular pages
+        page = min(int(rng.paretovariate(1.2)), options["pages"])
+        await cache.get_or_load(
+            "author_books", {"page": page}, list[Book], lambda p=page: fetch(p)
+        )
+    return {"fetches": fetches, "seconds": time.perf_counter() - start}
+
+
+def run_lookups(args: tuple) -> dict:
+    return asyncio.run(lookup_workload(args))
+
+
+def run_contention(args: tuple) -> dict:
+    name, directory, seed, options = args
+    backend = make_backend(name, directory, options["max_mb"])
+    rng = random.Random(seed)  # noqa: S311
+    payload = b"x" * options["payload"]
+    reads = writes = 0
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < options["duration"]:
+        key = f"k{rng.randrange(options['keys'])}"
+        if rng.random() < options["write_ratio"]:
+            backend.set(key, time.time(), payload)
+            writes += 1
+        else:
+            backend.get(key)
+            reads += 1
+    stats = getattr(backend, "stats", {})
+    return {
+        "ops": reads + writes,
+        "writes": writes,
+        "seconds": time.perf_counter() - start,
+        "busy_errors": stats.get("busy_errors", 0),
+        "evictions": stats.get("evictions", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--max-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    options = {
+        "lookups": args.lookups,
+        "pages": args.pages,
+        "latency": args.latency,
+        "duration": args.duration,
+        "write_ratio": args.write_ratio,
+        "keys": 5000,
+        "payload": 16 * 1024,
+        "max_mb": args.max_mb,
+    }
+    context = multiprocessing.get_context("spawn")
+
+    print(
+        f"{args.processes} processes x {args.lookups} lookups of "
+        f"{args.pages} pages, fetch latency {args.latency * 1000:.0f} ms"
+    )
+    print(f"{'backend':<10}{'fetches':>10}{'wall s':>10}")
+    for name in ("memory", "file", "sqlite"):
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = [(name, tmp, seed, options) for seed in range(args.processes)]
+            start = time.perf_counter()
+            with context.Pool(args.processes) as pool:
+                results = pool.map(run_lookups, jobs)
+            wall = time.perf_counter() - start
+        fetches = sum(r["fetches"] for r in results)
+        print(f"{name:<10}{fetches:>10}{wall:>10.2f}")
+
+    print(
+        f"\nRaw backend ops for {args.duration:.0f} s, "
+        f"{args.write_ratio:.0%} writes of 16 KB, {options['keys']} keys"
+    )
+    print(f"{'backend':<10}{'ops/s':>10}{'busy':>8}{'evicted':>10}")
+    for name in ("file", "sqlite"):
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = [(name, tmp, seed, options) for seed in range(args.processes)]
+            with context.Pool(args.processes) as pool:
+                results = pool.map(run_contention, jobs)
+        rate = sum(r["ops"] / r["seconds"] for r in results)
+        busy = sum(r["busy_errors"] for r in results)
+        evicted = sum(r["evictions"] for r in results)
+        print(f"{name:<10}{rate:>10.0f}{busy:>8}{evicted:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""HTTP transports against the local stub server over HTTP/1.1 and HTTP/2.
+
+Fetches book pages and downloads files concurrently through FlibustaClient
+with each transport and reports throughput, CPU time and the number of TCP
+connections the stub accepted. Run from the repository root:
+
+    python -m benchmarks.bench_transport --requests 400 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from config import config
+from services.client import FlibustaClient
+from services.transport import AiohttpTransport, HttpxTransport
+from tests.stub_server import StubFlibustaServer
+
+# (name, serve HTTP/2, transport factory)
+VARIANTS = [
+    ("aiohttp HTTP/1.1", False, AiohttpTransport),
+    ("httpx HTTP/1.1", False, lambda: HttpxTransport(http2=False)),
+    ("httpx HTTP/2", True, lambda: HttpxTransport(http1=False)),
+]
+
+
+async def run_variant(
+    http2: bool, transport_factory, args: argparse.Namespace
+) -> tuple[float, float, int]:
+    """Return (wall seconds, CPU seconds, connections) for one workload run."""
+    server = StubFlibustaServer(
+        latency=args.latency, file_size=args.file_size, http2=http2
+    )
+    async with server:
+        client = FlibustaClient(server.base_url, transport_factory)
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def fetch(i: int) -> None:
+            async with semaphore:
+                if i % args.download_every == 0:
+                    await client.try_download_book(str(i))
+                else:
+                    await client.get_book_details_page(str(i))
+
+        async with client:
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            await asyncio.gather(*[fetch(i) for i in range(args.requests)])
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+
+        return wall, cpu, len(server.connections)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--file-size", type=int, default=512 * 1024)
+    parser.add_argument(
+        "--download-every", type=int, default=10, help="every Nth request downloads"
+    )
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"Requests: {args.requests}, concurrency: {args.concurrency}, "
+        f"latency: {args.latency * 1000:.0f} ms, rounds: {args.rounds}"
+    )
+    print(f"{'transport':<20}{'req/s':>10}{'wall s':>10}{'cpu s':>10}{'conns':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DOWNLOAD_DIR = Path(tmp)
+        for name, http2, transport_factory in VARIANTS:
+            wall = cpu = 0.0
+            connections = 0
+            for _ in range(args.rounds):
+                run_wall, run_cpu, connections = await run_variant(
+                    http2, transport_factory, args
+                )
+                wall += run_wall
+                cpu += run_cpu
+            wall /= args.rounds
+            cpu /= args.rounds
+            print(
+                f"{name:<20}{args.requests / wall:>10.1f}"
+                f"{wall:>10.3f}{cpu:>10.3f}{connections:>8}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,170 @@
+"""End-to-end load test of the MCP tools against a local stub server.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test --concurrency 16 --requests 400 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import flibusta_mcp
+from config import config
+from construct import create_result_cache
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+from tests.stub_server import StubFlibustaServer
+
+# (tool name, arguments factory, weight)
+TOOL_MIX = [
+    ("search_books", lambda rnd: {"book_query": "stiven king"}, 4),
+    ("search_authors", lambda rnd: {"author_query": "king"}, 2),
+    (
+        "search_books_by_author",
+        lambda rnd: {"author_id": str(rnd.randint(1, 50)), "books_limit": 10},
+        4,
+    ),
+    ("get_series_books", lambda rnd: {"series_id": str(rnd.randint(1, 50))}, 2),
+    ("get_book_details", lambda rnd: {"book_id": str(rnd.randint(1, 5000))}, 4),
+    ("download_book", lambda rnd: {"book_id": str(rnd.randint(1, 5000))}, 1),
+]
+
+
+def is_error_result(result) -> bool:
+    """Detect tools that report failures in their payload instead of raising."""
+    if isinstance(result, tuple):
+        structured = result[1].get("result")
+        return isinstance(structured, dict) and structured.get("status") == "error"
+    return False
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_load(
+    base_url: str, concurrency: int, total_requests: int, use_cache: bool, seed: int
+) -> dict:
+    """Drive MCP tools concurrently and collect per-tool latencies."""
+    flibusta_mcp.service = FlibustaService(
+        client=FlibustaClient(base_url),
+        parser=FlibustaParser(),
+        cache=create_result_cache() if use_cache else None,
+    )
+
+    rnd = random.Random(seed)  # noqa: S311
+    names = [name for name, _, weight in TOOL_MIX for _ in range(weight)]
+    factories = {name: factory for name, factory, _ in TOOL_MIX}
+    plan = [rnd.choice(names) for _ in range(total_requests)]
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for name in plan:
+        queue.put_nowait(name)
+
+    latencies: dict[str, list[float]] = {name: [] for name, _, _ in TOOL_MIX}
+    errors: Counter[str] = Counter()
+
+    async def worker():
+        while not queue.empty():
+            name = queue.get_nowait()
+            arguments = factories[name](rnd)
+            start = time.perf_counter()
+            try:
+                result = await flibusta_mcp.mcp.call_tool(name, arguments)
+                if is_error_result(result):
+                    errors[name] += 1
+            except Exception:
+                errors[name] += 1
+            latencies[name].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "errors": errors,
+        "scheduler": flibusta_mcp.service.client.scheduler.stats,
+    }
+
+
+def report(result: dict, server: StubFlibustaServer) -> None:
+    """Print throughput and latency percentiles."""
+    all_latencies = [v for values in result["latencies"].values() for v in values]
+    total = len(all_latencies)
+    print(f"\nRequests: {total} in {result['elapsed']:.2f}s")
+    print(f"Throughput: {total / result['elapsed']:.1f} calls/s")
+    print(f"Origin requests: {dict(server.requests)}")
+    for priority, stats in result["scheduler"]["classes"].items():
+        print(
+            f"Scheduler {priority}: max queue {stats['max_queue_depth']}, "
+            f"wait avg {stats['wait_ms_avg']:.1f} ms, "
+            f"max {stats['wait_ms_max']:.1f} ms, shed {stats['shed']}"
+        )
+    print(
+        f"\n{'tool':<24}{'calls':>7}{'errors':>8}"
+        f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'mean ms':>9}"
+    )
+    rows = list(result["latencies"].items()) + [("ALL", all_latencies)]
+    for name, values in rows:
+        if not values:
+            continue
+        errors = (
+            sum(result["errors"].values()) if name == "ALL" else result["errors"][name]
+        )
+        print(
+            f"{name:<24}{len(values):>7}{errors:>8}"
+            f"{percentile(values, 50) * 1000:>9.1f}"
+            f"{percentile(values, 90) * 1000:>9.1f}"
+            f"{percentile(values, 99) * 1000:>9.1f}"
+            f"{statistics.fmean(values) * 1000:>9.1f}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--bandwidth", type=int, default=None, help="bytes/s")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--file-size", type=int, default=256 * 1024)
+    parser.add_argument("--cache", action="store_true", help="enable results cache")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DOWNLOAD_DIR = Path(tmp) / "books"
+        config.CACHE_DIR = Path(tmp) / "cache"
+        server = StubFlibustaServer(
+            latency=args.latency,
+            bandwidth=args.bandwidth,
+            error_rate=args.error_rate,
+            file_size=args.file_size,
+            seed=args.seed,
+        )
+        async with server:
+            result = await run_load(
+                server.base_url,
+                args.concurrency,
+                args.requests,
+                args.cache,
+                args.seed,
+            )
+        report(result, server)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""Show where the latency of one traced tool call went.
+
+Reads spans written to FLIBUSTA_TRACE_FILE and prints a trace as a tree of
+spans (tool, service, cache, fetch, parse, serialize) with start offsets,
+durations and a timeline bar. Run from the repository root:
+
+    python -m benchmarks.trace_view traces.jsonl            # latest call
+    python -m benchmarks.trace_view traces.jsonl --slowest
+    python -m benchmarks.trace_view traces.jsonl --list
+    python -m benchmarks.trace_view traces.jsonl --trace TRACE_ID
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from services.tracing import load_traces, render_waterfall
+
+
+def root_span(spans: list[dict]) -> dict:
+    """Outermost span of a trace, usually the tool call."""
+    return next((s for s in spans if s["parent_id"] is None), spans[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--trace", help="trace ID (prefix) to show")
+    parser.add_argument("--slowest", action="store_true")
+    parser.add_argument("--list", action="store_true", help="list traces")
+    parser.add_argument("--width", type=int, default=40)
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+    if not traces:
+        sys.exit(f"No spans in {args.path}")
+
+    if args.list:
+        for trace_id, spans in traces.items():
+            root = root_span(spans)
+            started = datetime.fromtimestamp(root["start"]).strftime("%H:%M:%S")
+            label = root.get("attributes", {}).get("tool", root["name"])
+            print(f"{trace_id}  {started}  {root['duration_ms']:>9.1f} ms  {label}")
+        return
+
+    if args.trace:
+        matching = [t for t in traces if t.startswith(args.trace)]
+        if not matching:
+            sys.exit(f"No trace {args.trace} in {args.path}")
+        trace_id = matching[0]
+    elif args.slowest:
+        trace_id = max(traces, key=lambda t: root_span(traces[t])["duration_ms"])
+    else:
+        # Roots are written last, so the last line belongs to the latest call
+        trace_id = list(traces)[-1]
+
+    print(f"trace {trace_id}")
+    for line in render_waterfall(traces[trace_id], args.width):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
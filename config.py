@@ -4,6 +4,15 @@ import os
 from pathlib import Path
 
 
+def _route_sizes(value: str, defaults: dict[str, int]) -> dict[str, int]:
+    """Parse "route=MB,route=MB" overrides of per-route sizes into bytes."""
+    sizes = dict(defaults)
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        route, _, megabytes = item.partition("=")
+        sizes[route.strip()] = int(megabytes)
+    return {route: megabytes * 1024 * 1024 for route, megabytes in sizes.items()}
+
+
 class Config:
     """Configuration class for Flibusta MCP server."""
     
@@ -13,17 +22,118 @@ class Config:
     # Get download directory from environment variable or use default
     DOWNLOAD_DIR = Path(os.getenv("FLIBUSTA_DOWNLOAD_DIR", DEFAULT_DOWNLOAD_DIR))
     
+    # Bytes read from the network per download chunk
+    DOWNLOAD_CHUNK_SIZE = int(os.getenv("FLIBUSTA_DOWNLOAD_CHUNK_SIZE", "262144"))
+
+    # Bytes buffered in memory before a download write is issued
+    DOWNLOAD_BUFFER_SIZE = int(os.getenv("FLIBUSTA_DOWNLOAD_BUFFER_SIZE", "4194304"))
+
+    # Preallocate download files from Content-Length
+    DOWNLOAD_PREALLOCATE = os.getenv("FLIBUSTA_DOWNLOAD_PREALLOCATE", "1") == "1"
+
+    # Download fsync policy: "none", "end" or "always"
+    DOWNLOAD_FSYNC = os.getenv("FLIBUSTA_DOWNLOAD_FSYNC", "end")
+
     # Flibusta base URL
     BASE_URL = os.getenv("FLIBUSTA_BASE_URL", "https://flibusta.is")
     
     # Request timeout in seconds
     REQUEST_TIMEOUT = int(os.getenv("FLIBUSTA_TIMEOUT", "30"))
     
+    # HTTP backend: "aiohttp" (HTTP/1.1) or "httpx"
+    HTTP_TRANSPORT = os.getenv("FLIBUSTA_HTTP_TRANSPORT", "aiohttp")
+
+    # Negotiate HTTP/2 with the httpx backend (requires httpx[http2])
+    HTTP2 = os.getenv("FLIBUSTA_HTTP2", "0") == "1"
+
+    # Seconds a tool call may take in total; 0 disables the deadline
+    TOOL_TIMEOUT = float(os.getenv("FLIBUSTA_TOOL_TIMEOUT", "60"))
+
+    # Requests in flight at once across all tools
+    MAX_CONCURRENCY = int(os.getenv("FLIBUSTA_MAX_CONCURRENCY", "8"))
+
+    # Requests in flight for background work (stale cache refreshes)
+    BACKGROUND_CONCURRENCY = int(os.getenv("FLIBUSTA_BACKGROUND_CONCURRENCY", "2"))
+
+    # Queued background requests before new ones are rejected
+    BACKGROUND_QUEUE_SIZE = int(os.getenv("FLIBUSTA_BACKGROUND_QUEUE_SIZE", "64"))
+
+    # Largest response body per route in MB ("page" covers other URLs);
+    # bigger responses are aborted. Override as "author=64,download=200",
+    # 0 means unlimited
+    MAX_BODY_SIZES = _route_sizes(
+        os.getenv("FLIBUSTA_MAX_BODY_MB", ""),
+        {
+            "search": 4,
+            "author": 16,
+            "series": 16,
+            "book": 4,
+            "page": 16,
+            "download": 500,
+        },
+    )
+
+    # Megabytes of page bodies held in memory by all fetches at once; new
+    # fetches wait while it is used up, 0 disables the budget
+    INFLIGHT_BUDGET_MB = int(os.getenv("FLIBUSTA_INFLIGHT_BUDGET_MB", "64"))
+
+    # Pass page bytes with the declared charset to lxml instead of decoding
+    PARSE_RAW_HTML = os.getenv("FLIBUSTA_PARSE_RAW_HTML", "1") == "1"
+
     # User agent for requests
     USER_AGENT = os.getenv(
         "FLIBUSTA_USER_AGENT", "Mozilla/5.0 (compatible; BookBot/1.0)"
     )
 
+    # Key Latin-only search words by their Cyrillic transliteration ("stiven" ->
+    # "стивен") so both spellings share a cache entry
+    SEARCH_TRANSLITERATE = os.getenv("FLIBUSTA_SEARCH_TRANSLITERATE", "0") == "1"
+
+    # Series pages fetched concurrently by get_series_tree
+    SERIES_CRAWL_CONCURRENCY = int(os.getenv("FLIBUSTA_SERIES_CONCURRENCY", "4"))
+
+    # Authors checked concurrently by check_new_books
+    WATCH_CONCURRENCY = int(os.getenv("FLIBUSTA_WATCH_CONCURRENCY", "8"))
+
+    # Parsed results cache directory (persists across restarts)
+    CACHE_DIR = Path(
+        os.getenv("FLIBUSTA_CACHE_DIR", Path.home() / ".cache" / "flibusta-mcp")
+    )
+
+    # JSONL file receiving trace spans of every tool call (unset = tracing off)
+    TRACE_FILE = os.getenv("FLIBUSTA_TRACE_FILE") or None
+
+    # Full-text index of downloaded books
+    LIBRARY_INDEX_PATH = Path(
+        os.getenv("FLIBUSTA_LIBRARY_INDEX", CACHE_DIR / "library.sqlite3")
+    )
+
+    # Enable parsed results cache
+    CACHE_ENABLED = os.getenv("FLIBUSTA_CACHE_ENABLED", "1") == "1"
+
+    # Persistent cache storage: "file" (one file per entry) or "sqlite"
+    # (one database that concurrent server processes share, size-bounded)
+    CACHE_BACKEND = os.getenv("FLIBUSTA_CACHE_BACKEND", "sqlite")
+
+    # Size limit of the sqlite cache in megabytes, 0 for unlimited
+    CACHE_MAX_SIZE_MB = int(os.getenv("FLIBUSTA_CACHE_MAX_SIZE_MB", "256"))
+
+    # Store cached payload bytes as is instead of inside a JSON document
+    CACHE_RAW = os.getenv("FLIBUSTA_CACHE_RAW", "1") == "1"
+
+    # Seconds a cached result is served without refresh
+    CACHE_TTL = int(os.getenv("FLIBUSTA_CACHE_TTL", "3600"))
+
+    # Seconds a missing page or failed download route is not requested again
+    NEGATIVE_CACHE_TTL = int(os.getenv("FLIBUSTA_NEGATIVE_CACHE_TTL", "3600"))
+
+    # Seconds after CACHE_TTL a stale result is served while refreshing
+    CACHE_STALE_TTL = int(os.getenv("FLIBUSTA_CACHE_STALE_TTL", "86400"))
+
+    # Seconds the series of books listed on parsed pages fills in book
+    # details, 0 disables the in-process index
+    INDEX_TTL = int(os.getenv("FLIBUSTA_INDEX_TTL", "600"))
+
 
 # Global config instance
 config = Config()
\ No newline at end of file
@@ -1,12 +1,65 @@
 """Dependency injection container."""
 
+from config import config
+from services.cache import ResultCache, create_cache_backend
 from services.client import FlibustaClient
+from services.index import EntityIndex
+from services.library import LibraryIndex
 from services.parser import FlibustaParser
+from services.routes import RouteMemory
 from services.service import FlibustaService
+from services.tracing import JsonlTraceSink, set_sink
+from services.watcher import NewBooksWatcher, WatermarkStore
+
+
+def create_result_cache() -> ResultCache | None:
+    """Create parsed results cache from config."""
+    if not config.CACHE_ENABLED:
+        return None
+    return ResultCache(
+        backend=create_cache_backend(),
+        ttl=config.CACHE_TTL,
+        stale_ttl=config.CACHE_STALE_TTL,
+    )
+
+
+def create_route_memory() -> RouteMemory | None:
+    """Create download route memory and negative cache from config."""
+    if not config.CACHE_ENABLED:
+        return None
+    return RouteMemory(config.CACHE_DIR / "routes.json", ttl=config.NEGATIVE_CACHE_TTL)
+
+
+def create_entity_index() -> EntityIndex | None:
+    """Create in-process index of book series from config."""
+    if config.INDEX_TTL <= 0:
+        return None
+    return EntityIndex(ttl=config.INDEX_TTL)
+
+
+def configure_tracing() -> None:
+    """Write trace spans to the file from config, if set."""
+    set_sink(JsonlTraceSink(config.TRACE_FILE) if config.TRACE_FILE else None)
 
 
 def create_flibusta_service() -> FlibustaService:
     """Create configured FlibustaService instance."""
-    client = FlibustaClient()
+    configure_tracing()
+    client = FlibustaClient(routes=create_route_memory())
     parser = FlibustaParser()
-    return FlibustaService(client=client, parser=parser)
\ No newline at end of file
+    cache = create_result_cache()
+    watcher = NewBooksWatcher(
+        client,
+        parser,
+        WatermarkStore(config.CACHE_DIR / "watermarks.json"),
+        concurrency=config.WATCH_CONCURRENCY,
+    )
+    library = LibraryIndex(config.LIBRARY_INDEX_PATH, config.DOWNLOAD_DIR)
+    return FlibustaService(
+        client=client,
+        parser=parser,
+        cache=cache,
+        watcher=watcher,
+        library=library,
+        index=create_entity_index(),
+    )
@@ -1,71 +1,206 @@
 """MCP server for Flibusta book search and download."""
 
-from typing import Dict, List
+from typing import Any, Dict, List
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+from pydantic_core import to_jsonable_python
 
 from construct import create_flibusta_service
-from models.book import Author, Book
+from models import (
+    AuthorProfile,
+    AuthorUpdates,
+    Book,
+    BookFilter,
+    LibraryMatch,
+    SeriesNode,
+)
+from services.progress import ProgressReporter
+from services.projection import project_items
+from services.tracing import enabled as tracing_enabled
+from services.tracing import span
+
+
+class TracedFastMCP(FastMCP):
+    """FastMCP that records each tool call as the root span of a trace.
+
+    Handlers serialize their results themselves inside a "serialize" span,
+    see serialize().
+    """
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Any:
+        if not tracing_enabled():
+            return await super().call_tool(name, arguments)
+
+        with span("tool", tool=name, arguments=arguments):
+            return await super().call_tool(name, arguments)
+
+
+def serialize(result: Any) -> Any:
+    """Dump a handler's models to JSON data inside a "serialize" span.
+
+    FastMCP converts whatever a handler returns after the handler exits, out
+    of reach of its spans; handing it plain data makes the dump part of the
+    trace. Without tracing the models are returned as they are.
+    """
+    if not tracing_enabled():
+        return result
+    with span("serialize"):
+        return to_jsonable_python(result)
+
 
 # Initialize FastMCP server
-mcp = FastMCP("flibusta")
+mcp = TracedFastMCP("flibusta")
 
 # Global service instance
 service = create_flibusta_service()
 
 
+def progress_reporter(ctx: Context) -> ProgressReporter | None:
+    """Reporter sending progress and partial results of a call to the client.
+
+    Only clients that passed a progress token get notifications; partial
+    results of batch tools are sent to them as "partial_result" log messages.
+    """
+    try:
+        meta = ctx.request_context.meta
+    except ValueError:
+        # Called outside an MCP request
+        return None
+    if meta is None or meta.progressToken is None:
+        return None
+
+    async def publish(data: Any) -> None:
+        await ctx.session.send_log_message(
+            level="info",
+            data=data,
+            logger="partial_result",
+            related_request_id=ctx.request_id,
+        )
+
+    return ProgressReporter(ctx.report_progress, publish)
+
+
+def book_filter(**criteria: Any) -> BookFilter | None:
+    """Build a filter from tool arguments, None when no criterion is set."""
+    criteria = {key: value for key, value in criteria.items() if value is not None}
+    return BookFilter(**criteria) if criteria else None
+
+
 @mcp.tool()
-async def search_books(book_query: str) -> list[Book]:
+async def search_books(
+    book_query: str, fields: list[str] | None = None, output_format: str = "objects"
+) -> list[dict[str, Any]] | dict[str, Any]:
     """Search for books by title or author name.
 
     Args:
         book_query: Search query (book title or author name)
+        fields: Optional list of fields to return (e.g. ["id", "title"])
+        output_format: "objects" (list of dicts) or "compact" (columns + rows)
 
     Returns:
         Formatted list of found books with basic information
     """
-    async with service.client:
+    async with service.call():
         books = await service.search_books(book_query)
 
-    return books
+    with span("serialize"):
+        return project_items(books, fields, output_format)
 
 
 @mcp.tool()
-async def search_authors(author_query: str) -> list[Author]:
+async def search_authors(
+    author_query: str, fields: list[str] | None = None, output_format: str = "objects"
+) -> list[dict[str, Any]] | dict[str, Any]:
     """Search for authors by name.
 
     Args:
         author_query: Author name to search for
+        fields: Optional list of fields to return (e.g. ["id", "name"])
+        output_format: "objects" (list of dicts) or "compact" (columns + rows)
 
     Returns:
         Formatted list of found authors with book counts
     """
-    async with service.client:
+    async with service.call():
         authors = await service.search_authors(author_query)
 
-    return authors
+    with span("serialize"):
+        return project_items(authors, fields, output_format)
 
 
 @mcp.tool()
 async def search_books_by_author(
-    author_id: str, books_limit: int = 50, sort_by: str = "default"
-) -> list[Book]:
+    author_id: str,
+    books_limit: int = 50,
+    sort_by: str = "default",
+    genres: list[str] | None = None,
+    languages: list[str] | None = None,
+    translated: bool | None = None,
+    formats: list[str] | None = None,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    fields: list[str] | None = None,
+    output_format: str = "objects",
+    ctx: Context = None,
+) -> list[dict[str, Any]] | dict[str, Any]:
     """Get books by specific author.
 
     Args:
         author_id: Author ID from search_authors
         books_limit: Maximum number of books to return (default: 50)
         sort_by: Sort order - "date" (newest first) or "default" (by series)
+        genres: Keep books in any of these genres, codes or names
+            (e.g. ["sf_horror"] or ["Ужасы"])
+        languages: Keep books in these languages (e.g. ["ru", "uk"])
+        translated: True for translations only, False for originals only
+        formats: Keep books downloadable in any of these formats
+            (e.g. ["epub"])
+        year_from: Earliest year a book was added to the library (author
+            pages show no publication year); reads the date-sorted page
+        year_to: Latest year a book was added to the library
+        fields: Optional list of fields to return (e.g. ["id", "title"])
+        output_format: "objects" (list of dicts) or "compact" (columns + rows)
 
     Returns:
         Formatted list of author's books with dates (when available)
     """
-    async with service.client:
+    async with service.call(reporter=progress_reporter(ctx)):
         books = await service.search_books_by_author(
-            author_id=author_id, books_limit=books_limit, sort_by=sort_by
+            author_id=author_id,
+            books_limit=books_limit,
+            sort_by=sort_by,
+            book_filter=book_filter(
+                genres=genres,
+                languages=languages,
+                translated=translated,
+                formats=formats,
+                year_from=year_from,
+                year_to=year_to,
+            ),
         )
 
-    return books
+    with span("serialize"):
+        return project_items(books, fields, output_format)
+
+
+@mcp.tool()
+async def get_author_profile(
+    author_id: str, sort_by: str = "default", ctx: Context = None
+) -> AuthorProfile:
+    """Get an author's name, books and series in one call.
+
+    Args:
+        author_id: Author ID from search_authors
+        sort_by: Page to read - "date" (newest first) or "default" (by series)
+
+    Returns:
+        Author name, all books, series list, nested series headers and the
+        IDs of the author's books in each series
+    """
+    async with service.call(reporter=progress_reporter(ctx)):
+        profile = await service.get_author_profile(author_id, sort_by=sort_by)
+
+    return serialize(profile)
 
 
 @mcp.tool()
@@ -78,60 +213,177 @@ async def get_book_details(book_id: str) -> Book:
     Returns:
         Detailed book information including description
     """
-    async with service.client:
+    async with service.call():
         book = await service.get_book_details(book_id)
 
-    return book
+    return serialize(book)
 
 
 @mcp.tool()
-async def download_book(book_id: str) -> Dict[str, str]:
+async def download_book(
+    book_id: str, extract_zip: bool = False, ctx: Context = None
+) -> Dict[str, str]:
     """Download a book file.
 
     Args:
         book_id: Book ID from search results
+        extract_zip: Unpack zipped fb2 files (.fb2.zip) and save the .fb2
 
     Returns:
         Path to the downloaded file
     """
     try:
-        async with service.client:
-            file_path = await service.download_book(book_id)
+        async with service.call(reporter=progress_reporter(ctx)):
+            file_path = await service.download_book(book_id, extract_zip=extract_zip)
         return {"status": "success", "file_path": file_path, "book_id": book_id}
     except Exception as e:
         return {"status": "error", "message": str(e), "book_id": book_id}
 
 
 @mcp.tool()
-async def get_author_series(author_id: str) -> List[Dict[str, str]]:
+async def get_author_series(
+    author_id: str, fields: list[str] | None = None, output_format: str = "objects"
+) -> List[Dict[str, Any]] | Dict[str, Any]:
     """Get all series for specific author.
 
     Args:
         author_id: Author ID from search_authors
+        fields: Optional list of fields to return (e.g. ["id", "name"])
+        output_format: "objects" (list of dicts) or "compact" (columns + rows)
 
     Returns:
         Formatted list of author's series
     """
-    async with service.client:
+    async with service.call():
         series_list = await service.get_author_series(author_id)
 
-    return series_list
+    with span("serialize"):
+        return project_items(series_list, fields, output_format)
 
 
 @mcp.tool()
-async def get_series_books(series_id: str) -> List[Book]:
+async def get_series_books(
+    series_id: str,
+    genres: list[str] | None = None,
+    languages: list[str] | None = None,
+    translated: bool | None = None,
+    formats: list[str] | None = None,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    fields: list[str] | None = None,
+    output_format: str = "objects",
+    ctx: Context = None,
+) -> List[Dict[str, Any]] | Dict[str, Any]:
     """Get books from specific series.
 
     Args:
         series_id: Series ID from get_author_series
+        genres: Keep books in any of these genres, codes or names
+        languages: Keep books in these languages (e.g. ["ru", "uk"])
+        translated: True for translations only, False for originals only
+        formats: Keep books downloadable in any of these formats
+        year_from: Earliest year shown in the entry
+        year_to: Latest year shown in the entry
+        fields: Optional list of fields to return (e.g. ["id", "title"])
+        output_format: "objects" (list of dicts) or "compact" (columns + rows)
 
     Returns:
         Formatted list of books in the series
     """
-    async with service.client:
-        books = await service.get_series_books(series_id)
+    async with service.call(reporter=progress_reporter(ctx)):
+        books = await service.get_series_books(
+            series_id,
+            book_filter=book_filter(
+                genres=genres,
+                languages=languages,
+                translated=translated,
+                formats=formats,
+                year_from=year_from,
+                year_to=year_to,
+            ),
+        )
 
-    return books
+    with span("serialize"):
+        return project_items(books, fields, output_format)
+
+
+@mcp.tool()
+async def get_series_tree(
+    series_id: str | None = None,
+    author_id: str | None = None,
+    max_depth: int = 3,
+    timeout: float | None = None,
+    ctx: Context = None,
+) -> list[SeriesNode]:
+    """Get nested series with their books.
+
+    Args:
+        series_id: Series ID to start from (from get_author_series)
+        author_id: Author ID to start from all of the author's series
+        max_depth: Maximum sub-series depth to crawl (default: 3)
+        timeout: Seconds to spend in total (default: server setting)
+
+    Returns:
+        List of series trees; each node has books and child series. Series
+        not fetched in time have partial=true, series that failed to load
+        have an error. With a progress token, each top-level tree is also
+        sent as a "partial_result" log message once crawled
+    """
+    async with service.call(timeout, progress_reporter(ctx)):
+        tree = await service.get_series_tree(
+            series_id=series_id, author_id=author_id, max_depth=max_depth
+        )
+
+    return serialize(tree)
+
+
+@mcp.tool()
+async def check_new_books(
+    author_ids: list[str], timeout: float | None = None, ctx: Context = None
+) -> list[AuthorUpdates]:
+    """Check authors for books added since the previous check.
+
+    Args:
+        author_ids: Author IDs from search_authors
+        timeout: Seconds to spend in total (default: server setting)
+
+    Returns:
+        New books per author; the first check of an author only records
+        the starting point and returns initialized=true. Authors not checked
+        in time have partial=true. With a progress token, each author's
+        result is also sent as a "partial_result" log message once checked
+    """
+    async with service.call(timeout, progress_reporter(ctx)):
+        updates = await service.check_new_books(author_ids)
+
+    return serialize(updates)
+
+
+@mcp.tool()
+async def search_library(query: str, limit: int = 10) -> list[LibraryMatch]:
+    """Search text of downloaded books without network access.
+
+    Args:
+        query: Words that must all occur in the book
+        limit: Maximum number of results (default: 10)
+
+    Returns:
+        Matching books, best first, with a text snippet around the hits
+    """
+    matches = await service.search_library(query, limit)
+    return serialize(matches)
+
+
+@mcp.tool()
+async def get_server_stats() -> Dict[str, Any]:
+    """Get request queue, wait time and cache counters of this server.
+
+    Returns:
+        Scheduler queue depths and wait times per priority class
+        (interactive tool calls, background work), cache, watcher and
+        download route counters including requests avoided
+    """
+    return service.get_stats()
 
 
 if __name__ == "__main__":
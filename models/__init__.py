@@ -1,3 +1,16 @@
 from .book import Author, Book
+from .filter import BookFilter
+from .library import LibraryMatch
+from .profile import AuthorProfile
+from .series import SeriesNode
+from .watch import AuthorUpdates
 
-__all__ = ["Book", "Author"]
\ No newline at end of file
+__all__ = [
+    "Book",
+    "Author",
+    "AuthorProfile",
+    "BookFilter",
+    "SeriesNode",
+    "AuthorUpdates",
+    "LibraryMatch",
+]
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+
+class BookFilter(BaseModel):
+    """Criteria for book entries on author and series pages.
+
+    Unset criteria match every book. Genres match codes ("sf_horror") or
+    names ("Ужасы") of genres linked on the page; languages are codes as
+    shown on the site ("ru", "uk"); formats match download links ("fb2",
+    "epub"). A year range matches the year shown in an entry or, on author
+    pages, which show none, the year the book was added; it excludes books
+    with neither.
+    """
+
+    genres: list[str] | None = None
+    languages: list[str] | None = None
+    # True keeps only translations, False only books in the original language
+    translated: bool | None = None
+    formats: list[str] | None = None
+    year_from: int | None = None
+    year_to: int | None = None
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class LibraryMatch(BaseModel):
+    path: str
+    title: str | None = None
+    authors: list[str] = []
+    format: str
+    # Matching body fragment with hits in [brackets]
+    snippet: str
+    # Relevance (BM25), higher is better
+    score: float
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+from .book import Book
+
+
+class AuthorProfile(BaseModel):
+    """Everything shown on an author page, parsed from one fetch."""
+
+    id: str
+    name: str | None = None
+    books: list[Book] = []
+    # Series linked from the page: {"id", "name"}
+    series: list[dict] = []
+    # Series group headers with the ID of their parent series, if nested
+    series_headers: list[dict] = []
+    # Series ID -> IDs of the author's books in it, in page order
+    series_books: dict[str, list[str]] = {}
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+from .book import Book
+
+
+class SeriesNode(BaseModel):
+    id: str
+    name: str | None = None
+    books: list[Book] = []
+    children: list["SeriesNode"] = []
+    # True when the depth limit stopped traversal below this node
+    truncated: bool = False
+    # True when the call deadline expired before this series was fetched
+    partial: bool = False
+    # Why this series could not be fetched, e.g. a missing sub-series page
+    error: str | None = None
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+from .book import Book
+
+
+class AuthorUpdates(BaseModel):
+    author_id: str
+    new_books: list[Book] = []
+    # True when this was the first check and only the watermark was recorded
+    initialized: bool = False
+    error: str | None = None
+    # True when the call deadline expired before the check finished; the
+    # watermark is left unchanged
+    partial: bool = False
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class ByteLease:
+    """Bytes of one response body held in memory, counted in its budget."""
+
+    def __init__(self, budget: "ByteBudget", reserved: int):
+        self.budget = budget
+        self.used = 0
+        # Bytes counted in the budget: the reservation until it is used up
+        self.held = reserved
+
+    def count(self, size: int) -> None:
+        """Count size more bytes held in memory without waiting."""
+        self.used += size
+        if self.used > self.held:
+            self.budget._count(self.used - self.held)
+            self.held = self.used
+
+    async def add(self, size: int) -> None:
+        """Count a chunk just read; wait while the budget is exceeded."""
+        self.count(size)
+        await self.budget._wait_for_room(self)
+
+
+class ByteBudget:
+    """Global budget of response body bytes held in memory at once.
+
+    New fetches wait in FIFO order until their first chunk fits. Fetches
+    already reading pause between chunks while the budget is exceeded,
+    except the oldest one, which always proceeds so that bodies larger than
+    the budget still complete; its release lets the next one continue.
+    Bytes count until the body has been handed over. Take a lease only
+    once the body can be read (inside the request slot): paused readers
+    wait on the oldest lease, which must not wait on anything else.
+
+    Args:
+        limit: Budget in bytes, 0 disables waiting
+        reserve: Bytes reserved for a fetch when it is admitted
+    """
+
+    def __init__(self, limit: int, reserve: int = 64 * 1024):
+        self.limit = limit
+        self.reserve = reserve
+        self.in_flight = 0
+        # Admitted leases, oldest first
+        self._active: dict[ByteLease, None] = {}
+        self._queue: deque[asyncio.Future] = deque()
+        self._paused: list[asyncio.Future] = []
+        self.stats = {
+            "admitted": 0,
+            "waited": 0,
+            "wait_total": 0.0,
+            "paused": 0,
+            "peak_bytes": 0,
+        }
+
+    def _can_start(self) -> bool:
+        return (
+            self.limit <= 0
+            or not self._active
+            or self.in_flight + self.reserve <= self.limit
+        )
+
+    def _take(self) -> ByteLease:
+        lease = ByteLease(self, self.reserve)
+        self._active[lease] = None
+        self._count(self.reserve)
+        self.stats["admitted"] += 1
+        return lease
+
+    def _count(self, size: int) -> None:
+        self.in_flight += size
+        self.stats["peak_bytes"] = max(self.stats["peak_bytes"], self.in_flight)
+
+    def _may_continue(self, lease: ByteLease) -> bool:
+        return (
+            self.limit <= 0
+            or self.in_flight <= self.limit
+            or next(iter(self._active)) is lease
+        )
+
+    async def _wait_for_room(self, lease: ByteLease) -> None:
+        if self._may_continue(lease):
+            return
+        self.stats["paused"] += 1
+        while not self._may_continue(lease):
+            waiter = asyncio.get_running_loop().create_future()
+            self._paused.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._paused:
+                    self._paused.remove(waiter)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[ByteLease]:
+        """Hold a lease for one response body, waiting while memory is short."""
+        lease = await self._acquire()
+        try:
+            yield lease
+        finally:
+            self._release(lease)
+
+    async def _acquire(self) -> ByteLease:
+        if not self._queue and self._can_start():
+            return self._take()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue.append(waiter)
+        enqueued_at = time.perf_counter()
+        try:
+            lease = await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just before cancellation
+                self._release(waiter.result())
+            elif waiter in self._queue:
+                self._queue.remove(waiter)
+            raise
+        self.stats["waited"] += 1
+        self.stats["wait_total"] += time.perf_counter() - enqueued_at
+        return lease
+
+    def _release(self, lease: ByteLease) -> None:
+        del self._active[lease]
+        self.in_flight -= lease.held
+        # Paused reads go first: finishing them frees memory
+        for waiter in self._paused:
+            if not waiter.done():
+                waiter.set_result(None)
+        while self._queue and self._can_start():
+            waiter = self._queue.popleft()
+            if not waiter.done():
+                waiter.set_result(self._take())
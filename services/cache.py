@@ -0,0 +1,514 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from pydantic import TypeAdapter
+
+import models.book
+import models.filter
+import models.profile
+import models.series
+import services.parser
+from config import config
+
+from . import progress
+from .deadline import (
+    DeadlineExceeded,
+    check_deadline,
+    enforce_deadline,
+    time_left,
+    without_deadline,
+)
+from .scheduler import request_priority
+from .tracing import detached, span
+
+
+def compute_parser_version() -> str:
+    """Hash parser and model sources so cached results follow code changes."""
+    digest = hashlib.sha1(usedforsecurity=False)
+    modules = (
+        services.parser,
+        models.book,
+        models.series,
+        models.profile,
+        # Filters are part of cache keys
+        models.filter,
+    )
+    for module in modules:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()[:12]
+
+
+PARSER_VERSION = compute_parser_version()
+
+# Store time prefix of raw cache files
+RAW_HEADER = struct.Struct("<d")
+
+CACHE_BACKENDS = ("file", "sqlite")
+
+
+class FileCacheBackend:
+    """Persistent cache storage with one file per key.
+
+    With raw (the default) a file holds the store time followed by the
+    payload bytes as is; otherwise both are wrapped in a JSON document,
+    which escapes the payload into a string and back on every access.
+    """
+
+    def __init__(self, directory: Path, raw: bool = True):
+        self.directory = Path(directory)
+        self.raw = raw
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.{'bin' if self.raw else 'json'}"
+
+    def get(self, key: str) -> tuple[float, bytes] | None:
+        """Return (stored_at, payload) or None if missing or unreadable."""
+        try:
+            if self.raw:
+                with open(self._path(key), "rb") as f:
+                    header = f.read(RAW_HEADER.size)
+                    (stored_at,) = RAW_HEADER.unpack(header)
+                    return stored_at, f.read()
+            data = json.loads(self._path(key).read_bytes())
+            return data["stored_at"], data["payload"].encode("utf-8")
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+
+    def set(self, key: str, stored_at: float, payload: bytes) -> None:
+        """Store payload atomically."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            if self.raw:
+                with open(tmp_path, "wb") as f:
+                    f.write(RAW_HEADER.pack(stored_at))
+                    f.write(payload)
+            else:
+                tmp_path.write_text(
+                    json.dumps(
+                        {"stored_at": stored_at, "payload": payload.decode("utf-8")}
+                    ),
+                    encoding="utf-8",
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+
+class SqliteCacheBackend:
+    """Cache storage in one SQLite database shared by server processes.
+
+    In stdio mode every MCP client spawns its own server; pointing them at
+    the same database lets them reuse each other's results. WAL mode lets
+    readers proceed while one process writes. When the stored payloads
+    exceed ``max_bytes``, least recently read entries are evicted down to
+    ``low_watermark`` of the limit so eviction does not run on every store.
+    A database that cannot be opened reads as empty and skips stores.
+
+    Args:
+        path: Database file
+        max_bytes: Payload size limit, None for no limit
+        low_watermark: Fraction of max_bytes kept after eviction
+        busy_timeout: Seconds to wait for another process's write lock
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        stored_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        size INTEGER NOT NULL,
+        payload BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+    CREATE TABLE IF NOT EXISTS totals (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        size INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO totals VALUES (0, 0);
+    CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+        UPDATE totals SET size = size + NEW.size;
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries
+    BEGIN
+        UPDATE totals SET size = size + NEW.size - OLD.size;
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+        UPDATE totals SET size = size - OLD.size;
+    END;
+    """
+
+    # Reads refresh the LRU position at most this often (seconds), so
+    # repeated hits do not each take the database write lock
+    TOUCH_INTERVAL = 60
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int | None = 256 * 1024 * 1024,
+        low_watermark: float = 0.9,
+        busy_timeout: float = 5.0,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.low_watermark = low_watermark
+        self.busy_timeout = busy_timeout
+        self.stats = {"evictions": 0, "busy_errors": 0, "open_errors": 0}
+        self._conn: sqlite3.Connection | None = None
+        # Calls arrive from worker threads; one connection serves them in turn
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection | None:
+        """Open the database once, or None if it cannot be opened."""
+        if self._conn is None:
+            try:
+                self._conn = self._open()
+            except (OSError, sqlite3.Error):
+                # Retried on the next access, e.g. once the directory exists
+                self.stats["open_errors"] += 1
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(self.SCHEMA)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def get(self, key: str) -> tuple[float, bytes] | None:
+        """Return (stored_at, payload) or None if missing or unreadable."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                # fetchall ends the read before the update below; upgrading
+                # a read snapshot to a write fails without waiting
+                rows = conn.execute(
+                    "SELECT stored_at, accessed_at, payload FROM entries "
+                    "WHERE key = ?",
+                    (key,),
+                ).fetchall()
+                if not rows:
+                    return None
+                stored_at, accessed_at, payload = rows[0]
+                now = time.time()
+                if now - accessed_at > self.TOUCH_INTERVAL:
+                    conn.execute(
+                        "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                        (now, key),
+                    )
+                return stored_at, payload
+            except sqlite3.OperationalError:
+                # Locked for longer than busy_timeout: treat as a miss
+                self.stats["busy_errors"] += 1
+                return None
+
+    def set(self, key: str, stored_at: float, payload: bytes) -> None:
+        """Store payload, evicting old entries when over the size limit."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                # Take the write lock up front so a concurrent writer makes
+                # this wait for busy_timeout instead of failing on upgrade
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                self.stats["busy_errors"] += 1
+                return
+            try:
+                conn.execute(
+                    "INSERT INTO entries (key, stored_at, accessed_at, size, payload) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "stored_at = excluded.stored_at, "
+                    "accessed_at = excluded.accessed_at, "
+                    "size = excluded.size, payload = excluded.payload",
+                    (key, stored_at, time.time(), len(payload), payload),
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        if self.max_bytes is None:
+            return
+        (total,) = conn.execute("SELECT size FROM totals").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        excess = total - int(self.max_bytes * self.low_watermark)
+        keys = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ):
+            if excess <= 0:
+                break
+            keys.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+        self.stats["evictions"] += len(keys)
+
+    @property
+    def size(self) -> int:
+        """Total payload bytes currently stored."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return 0
+            (total,) = conn.execute("SELECT size FROM totals").fetchone()
+            return total
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_cache_backend(
+    name: str | None = None, directory: Path | None = None
+) -> FileCacheBackend | SqliteCacheBackend:
+    """Create persistent cache backend by name, defaulting to config."""
+    name = name or config.CACHE_BACKEND
+    directory = Path(directory or config.CACHE_DIR)
+    if name == "file":
+        return FileCacheBackend(directory / "results", raw=config.CACHE_RAW)
+    if name == "sqlite":
+        return SqliteCacheBackend(
+            directory / "results.sqlite3",
+            max_bytes=config.CACHE_MAX_SIZE_MB * 1024 * 1024 or None,
+        )
+    raise ValueError(
+        f"Unknown cache backend: {name}. "
+        f"Available backends: {', '.join(CACHE_BACKENDS)}"
+    )
+
+
+class ResultCache:
+    """Cache of parsed results with stale-while-revalidate.
+
+    Entries younger than ``ttl`` are served as is. Entries older than ``ttl``
+    but younger than ``ttl + stale_ttl`` are served immediately while a
+    background task refreshes them. Concurrent misses for the same key share
+    one load. Keys include the parser version, so entries produced by older
+    parser code are never served. Storage failures never fail a call: a
+    backend that cannot be read counts as a miss and a failed store is
+    skipped, both counted in stats.
+    """
+
+    def __init__(
+        self,
+        backend: FileCacheBackend | SqliteCacheBackend | None = None,
+        ttl: float = 3600,
+        stale_ttl: float = 86400,
+        version: str = PARSER_VERSION,
+        memory_size: int = 256,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.version = version
+        self.memory_size = memory_size
+        self._memory: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._adapters: dict[Any, TypeAdapter] = {}
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "read_errors": 0,
+            "write_errors": 0,
+        }
+
+    def make_key(self, operation: str, args: dict[str, Any]) -> str:
+        """Build cache key from operation, arguments and parser version."""
+        raw = json.dumps(
+            [self.version, operation, args], sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha1(raw.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+    def _adapter(self, result_type: Any) -> TypeAdapter:
+        if result_type not in self._adapters:
+            self._adapters[result_type] = TypeAdapter(result_type)
+        return self._adapters[result_type]
+
+    async def _read(self, key: str) -> tuple[float, bytes] | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+        if self.backend is None:
+            return None
+        try:
+            entry = await asyncio.to_thread(self.backend.get, key)
+        except Exception:
+            self.stats["read_errors"] += 1
+            return None
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: tuple[float, bytes]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _start_load(
+        self,
+        key: str,
+        result_type: Any,
+        loader: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] | None = None,
+    ) -> asyncio.Task:
+        """Start loader once per key; concurrent callers share the task.
+
+        The task gives (payload, whether it was stored).
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        async def run() -> tuple[bytes, bool]:
+            try:
+                result = await loader()
+                payload = self._adapter(result_type).dump_json(result)
+                if cacheable is not None and not cacheable(result):
+                    return payload, False
+                entry = (time.time(), payload)
+                self._remember(key, entry)
+                if self.backend is not None:
+                    try:
+                        await asyncio.to_thread(self.backend.set, key, *entry)
+                    except Exception:
+                        # Still served from memory for this process
+                        self.stats["write_errors"] += 1
+                return payload, True
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(run())
+        self._inflight[key] = task
+        return task
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        result_type: Any,
+        loader: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] | None = None,
+    ) -> None:
+        if key in self._inflight:
+            return
+        self.stats["refreshes"] += 1
+        # The refresh task inherits background priority for its requests and
+        # nothing else of the call that triggered it: no deadline, no
+        # progress reporting to its client and a trace of its own
+        with (
+            request_priority("background"),
+            without_deadline(),
+            progress.reporting(None),
+            detached(),
+        ):
+            task = self._start_load(key, result_type, loader, cacheable)
+        # Keep the stale entry if refresh fails
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def get_or_load(
+        self,
+        operation: str,
+        args: dict[str, Any],
+        result_type: Any,
+        loader: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """Return cached result for operation/args, loading it if needed.
+
+        Results for which cacheable returns False are returned but not stored.
+        """
+        key = self.make_key(operation, args)
+        with span("cache", operation=operation) as lookup:
+            entry = await self._read(key)
+
+            if entry is not None:
+                stored_at, payload = entry
+                age = time.time() - stored_at
+                if age < self.ttl:
+                    self.stats["hits"] += 1
+                    lookup.set(result="hit")
+                    return self._adapter(result_type).validate_json(payload)
+                if age < self.ttl + self.stale_ttl:
+                    self.stats["stale_hits"] += 1
+                    lookup.set(result="stale")
+                    self._refresh_in_background(key, result_type, loader, cacheable)
+                    return self._adapter(result_type).validate_json(payload)
+
+            self.stats["misses"] += 1
+            lookup.set(result="miss")
+            payload = await self._wait_for_load(key, result_type, loader, cacheable)
+            return self._adapter(result_type).validate_json(payload)
+
+    async def _wait_for_load(
+        self,
+        key: str,
+        result_type: Any,
+        loader: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] | None = None,
+    ) -> bytes:
+        """Wait for the key's shared load within this caller's own deadline.
+
+        A load runs under the deadline of the call that started it. When it
+        ran out of that call's time first, failing or giving a result that is
+        not stored (a partial one), a joined caller with time left loads
+        again instead of inheriting the shorter deadline.
+        """
+        while True:
+            joined = key in self._inflight
+            task = self._start_load(key, result_type, loader, cacheable)
+            try:
+                if joined:
+                    async with enforce_deadline():
+                        payload, stored = await asyncio.shield(task)
+                else:
+                    # Runs under this caller's deadline, which may yield a
+                    # partial result rather than fail
+                    payload, stored = await asyncio.shield(task)
+            except DeadlineExceeded:
+                if not joined:
+                    raise
+                # Raises if this caller's own deadline has passed
+                check_deadline()
+                continue
+            left = time_left()
+            if stored or not joined or (left is not None and left <= 0):
+                return payload
+
+    async def wait_for_refreshes(self) -> None:
+        """Wait until all in-flight loads finish."""
+        while self._inflight:
+            await asyncio.gather(*self._inflight.values(), return_exceptions=True)
@@ -1,79 +1,276 @@
+import asyncio
+import codecs
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
 from urllib.parse import quote_plus, urljoin
 
-import aiofiles
-import aiohttp
-
 from config import config
 
+from . import progress
+from .budget import ByteBudget
+from .deadline import check_deadline, enforce_deadline
+from .download import DownloadWriter, extracted_filename, read_zip_header
+from .routes import MISSING_STATUSES, RouteMemory, file_format
+from .scheduler import RequestScheduler
+from .tracing import set_attributes, span
+from .transport import (
+    BodyTooLarge,
+    Transport,
+    TransportError,
+    TransportResponse,
+    create_transport,
+)
+
+# Book download routes in the order they are tried for an unknown book
+DOWNLOAD_ROUTES = ("epub", "download")
+
+# Bytes read from the network per page body chunk
+PAGE_CHUNK_SIZE = 64 * 1024
+
 
 class FlibustaClient:
-    """HTTP client for Flibusta website."""
+    """HTTP client for Flibusta website.
+
+    Args:
+        base_url: Site URL, defaults to config
+        transport_factory: Creates the HTTP backend, defaults to the one
+            selected by config.HTTP_TRANSPORT
+        scheduler: Admission control shared by all requests, defaults to
+            limits from config
+        routes: Learned download routes and negative cache of missing
+            resources (default: none)
+        max_body_sizes: Largest body in bytes per route ("search",
+            "author", "series", "book", "download", and "page" for other
+            URLs), 0 for unlimited; defaults to config
+        budget: Page body bytes held in memory by all requests at once,
+            defaults to config.INFLIGHT_BUDGET_MB
+    """
 
-    def __init__(self, base_url: str | None = None):
+    def __init__(
+        self,
+        base_url: str | None = None,
+        transport_factory: Callable[[], Transport] | None = None,
+        scheduler: RequestScheduler | None = None,
+        routes: RouteMemory | None = None,
+        max_body_sizes: dict[str, int] | None = None,
+        budget: ByteBudget | None = None,
+    ):
         self.base_url = base_url or config.BASE_URL
-        self.session: aiohttp.ClientSession | None = None
+        self.transport_factory = transport_factory or create_transport
+        self.scheduler = scheduler or RequestScheduler(
+            max_concurrency=config.MAX_CONCURRENCY,
+            class_limits={"background": config.BACKGROUND_CONCURRENCY},
+            queue_limits={"background": config.BACKGROUND_QUEUE_SIZE},
+        )
+        self.routes = routes
+        self.max_body_sizes = (
+            config.MAX_BODY_SIZES if max_body_sizes is None else max_body_sizes
+        )
+        self.budget = budget or ByteBudget(config.INFLIGHT_BUDGET_MB * 1024 * 1024)
+        self.session: Transport | None = None
+        self._users = 0
+        # Serializes opening and closing the shared session
+        self._session_lock = asyncio.Lock()
 
     async def __aenter__(self):
-        """Async context manager entry."""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=config.REQUEST_TIMEOUT),
-            headers={"User-Agent": config.USER_AGENT},
-        )
+        """Async context manager entry.
+
+        Nested and concurrent entries share one session, which is closed
+        when the last user exits. An entry during that close waits for it
+        and opens a new session.
+        """
+        async with self._session_lock:
+            if self._users == 0:
+                session = self.transport_factory()
+                await session.open()
+                self.session = session
+            self._users += 1
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self.session:
-            await self.session.close()
+        async with self._session_lock:
+            self._users -= 1
+            if self._users == 0 and self.session:
+                session, self.session = self.session, None
+                await session.close()
 
-    async def get_page(self, url: str) -> str:
-        """Get HTML page content."""
+    @asynccontextmanager
+    async def _stream(self, url: str) -> AsyncIterator[TransportResponse]:
+        """GET url within a scheduler slot held until the body is consumed.
+
+        Queueing, the request and reading the body are cancelled together
+        when the call deadline expires. URLs known to be missing fail with
+        a 404 TransportError without a request. The trace span records time
+        queued for a slot and time to the response headers.
+        """
         if not self.session:
             raise ValueError("Client session not initialized")
 
-        async with self.session.get(url) as response:
-            response.raise_for_status()
-            return await response.text()
+        with span("fetch", url=url) as fetch:
+            if self.routes and self.routes.known_missing(url):
+                fetch.set(status=404, negative_cache=True)
+                raise TransportError(f"HTTP 404 for {url} (cached)", 404)
+
+            async with enforce_deadline():
+                async with self.scheduler.slot():
+                    queue_ms = fetch.elapsed_ms()
+                    try:
+                        async with self.session.stream(url) as response:
+                            fetch.set(
+                                status=response.status,
+                                queue_ms=round(queue_ms, 3),
+                                ttfb_ms=round(fetch.elapsed_ms() - queue_ms, 3),
+                            )
+                            yield response
+                    except TransportError as e:
+                        fetch.set(status=e.status)
+                        if self.routes and e.status in MISSING_STATUSES:
+                            self.routes.mark_missing(url)
+                            await self.routes.flush()
+                        raise
+
+    async def _capped_chunks(
+        self, response: TransportResponse, url: str, route: str, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """Body chunks, aborted as soon as the route's size cap is exceeded.
+
+        A declared Content-Length over the cap fails before any body is read.
+        """
+        limit = self.max_body_sizes.get(route, self.max_body_sizes.get("page", 0))
+        declared = response.content_length
+        if limit and declared is not None and declared > limit:
+            raise BodyTooLarge(f"{url} declares {declared} bytes, over {limit}")
+
+        size = 0
+        async for chunk in response.iter_chunks(chunk_size):
+            size += len(chunk)
+            if limit and size > limit:
+                raise BodyTooLarge(f"{url} body exceeds {limit} bytes")
+            yield chunk
+
+    async def _read_page(self, url: str, route: str) -> tuple[bytes, str | None]:
+        """Read a page body within the route's cap and the in-flight budget.
+
+        The lease is taken inside the scheduler slot, so every fetch holding
+        budget bytes is reading and the oldest one can always finish.
+        """
+        async with self._stream(url) as response:
+            async with self.budget.admit() as lease:
+                chunks = []
+                async for chunk in self._capped_chunks(
+                    response, url, route, PAGE_CHUNK_SIZE
+                ):
+                    chunks.append(chunk)
+                    await lease.add(len(chunk))
+                set_attributes(bytes=lease.used)
+                # Joining copies the body once more
+                lease.count(lease.used)
+                return b"".join(chunks), response.charset
+
+    async def get_page(self, url: str, route: str = "page") -> str:
+        """Get HTML page content."""
+        content, charset = await self._read_page(url, route)
+        html = content.decode(charset or "utf-8", errors="replace")
+        # Don't hand a page to the parser once the caller has given up
+        check_deadline()
+        await progress.page_fetched(len(content))
+        return html
+
+    async def get_page_bytes(
+        self, url: str, route: str = "page"
+    ) -> tuple[bytes, str | None]:
+        """Get raw HTML page body and the charset declared by the server.
+
+        Skips building a str; the parser hands the bytes straight to lxml.
+        """
+        content, charset = await self._read_page(url, route)
+        check_deadline()
+        await progress.page_fetched(len(content))
+        return content, charset
 
-    async def search_books_page(self, query: str) -> str:
-        """Get search results page for books and authors."""
+    async def _get(
+        self, url: str, raw: bool, route: str
+    ) -> str | tuple[bytes, str | None]:
+        if raw:
+            return await self.get_page_bytes(url, route)
+        return await self.get_page(url, route)
+
+    async def search_books_page(
+        self, query: str, raw: bool = False
+    ) -> str | tuple[bytes, str | None]:
+        """Get search results page for books and authors.
+
+        With raw, returns (body bytes, charset) as get_page_bytes does.
+        """
         encoded_query = quote_plus(query)
         url = urljoin(self.base_url, f"/booksearch?ask={encoded_query}")
-        return await self.get_page(url)
+        return await self._get(url, raw, "search")
 
-    async def get_author_books_page(
-        self, author_id: str, order: str = "default"
-    ) -> str:
-        """Get page with all books by specific author."""
+    def _author_books_url(self, author_id: str, order: str = "default") -> str:
+        """Build author page URL for the given sort order."""
         url = urljoin(self.base_url, f"/a/{author_id}")
 
         # Add sorting parameters if needed
         if order == "date":
             url += "?lang=__&order=t&hg1=1&sa1=1&hr1=1"
 
-        return await self.get_page(url)
+        return url
+
+    async def get_author_books_page(
+        self, author_id: str, order: str = "default", raw: bool = False
+    ) -> str | tuple[bytes, str | None]:
+        """Get page with all books by specific author."""
+        return await self._get(self._author_books_url(author_id, order), raw, "author")
+
+    async def iter_author_books_page(
+        self, author_id: str, order: str = "default"
+    ) -> AsyncIterator[str]:
+        """Stream author page as decoded text chunks.
+
+        The consumer may stop early; closing the iterator drops the rest of
+        the response without reading it.
+        """
+        url = self._author_books_url(author_id, order)
+        async with self._stream(url) as response:
+            decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(
+                errors="replace"
+            )
+            chunks = self._capped_chunks(response, url, "author", PAGE_CHUNK_SIZE)
+            async for chunk in chunks:
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
 
-    async def get_series_page(self, series_id: str) -> str:
+    async def get_series_page(
+        self, series_id: str, raw: bool = False
+    ) -> str | tuple[bytes, str | None]:
         """Get page with books from specific series."""
         url = urljoin(self.base_url, f"/s/{series_id}")
-        return await self.get_page(url)
+        return await self._get(url, raw, "series")
 
-    async def get_book_details_page(self, book_id: str) -> str:
+    async def get_book_details_page(
+        self, book_id: str, raw: bool = False
+    ) -> str | tuple[bytes, str | None]:
         """Get detailed book information page."""
         url = urljoin(self.base_url, f"/b/{book_id}")
-        return await self.get_page(url)
+        return await self._get(url, raw, "book")
 
-    async def download_file(self, url: str, suggested_filename: str) -> str:
-        """Download file and save to filesystem."""
-        if not self.session:
-            raise ValueError("Client session not initialized")
+    async def download_file(
+        self, url: str, suggested_filename: str, extract_zip: bool = False
+    ) -> str:
+        """Download file and save to filesystem.
 
+        With extract_zip, zipped fb2 payloads are decompressed while streaming
+        and the inner .fb2 file is saved instead of the archive.
+        """
         downloads_dir = config.DOWNLOAD_DIR
         downloads_dir.mkdir(parents=True, exist_ok=True)
 
-        async with self.session.get(url) as response:
-            response.raise_for_status()
-
+        async with self._stream(url) as response:
             # Try to get filename from Content-Disposition header
             filename = suggested_filename
             if "content-disposition" in response.headers:
@@ -86,29 +283,96 @@ class FlibustaClient:
                     if match:
                         filename = match.group(1)
 
-            file_path = downloads_dir / filename
+            chunks = self._capped_chunks(
+                response, url, "download", config.DOWNLOAD_CHUNK_SIZE
+            )
+            extractor, head = None, b""
+            if extract_zip:
+                extractor, head = await read_zip_header(chunks)
 
-            async with aiofiles.open(file_path, "wb") as f:
-                async for chunk in response.content.iter_chunked(8192):
-                    await f.write(chunk)
+            if extractor:
+                file_path = downloads_dir / extracted_filename(
+                    extractor.entry_name, filename
+                )
+                async with self._download_writer(
+                    file_path, extractor.uncompressed_size
+                ) as writer:
+                    received = 0
+                    for piece in extractor.feed(b""):
+                        await writer.write(piece)
+                        received += len(piece)
+                    async for chunk in chunks:
+                        for piece in extractor.feed(chunk):
+                            await writer.write(piece)
+                            received += len(piece)
+                        await progress.downloaded(
+                            received, extractor.uncompressed_size
+                        )
+                    extractor.finish()
+            else:
+                file_path = downloads_dir / filename
+                async with self._download_writer(
+                    file_path, response.content_length
+                ) as writer:
+                    await writer.write(head)
+                    received = len(head)
+                    async for chunk in chunks:
+                        await writer.write(chunk)
+                        received += len(chunk)
+                        await progress.downloaded(received, response.content_length)
+            set_attributes(bytes=writer.bytes_written)
 
         return str(file_path)
 
+    def _download_writer(self, file_path, expected_size: int | None) -> DownloadWriter:
+        """Create download writer configured from settings."""
+        return DownloadWriter(
+            file_path,
+            buffer_size=config.DOWNLOAD_BUFFER_SIZE,
+            fsync_policy=config.DOWNLOAD_FSYNC,
+            preallocate_size=expected_size if config.DOWNLOAD_PREALLOCATE else None,
+        )
+
     async def try_download_book(
-        self, book_id: str, suggested_filename: str = None
+        self, book_id: str, suggested_filename: str = None, extract_zip: bool = False
     ) -> str:
-        """Try to download book using different URL patterns."""
-        download_urls = [
-            urljoin(self.base_url, f"/b/{book_id}/epub"),
-            urljoin(self.base_url, f"/b/{book_id}/download"),
-        ]
+        """Try to download book using different URL patterns.
+
+        The route that worked for the book before is tried first, and routes
+        that recently failed with a client error are skipped.
+        """
+        learned = self.routes.route(book_id) if self.routes else None
+        routes = sorted(DOWNLOAD_ROUTES, key=lambda route: route != learned)
 
         filename = suggested_filename or f"book_{book_id}.epub"
 
-        for url in download_urls:
+        for attempt, route in enumerate(routes):
+            url = urljoin(self.base_url, f"/b/{book_id}/{route}")
             try:
-                return await self.download_file(url, filename)
-            except aiohttp.ClientError:
+                file_path = await self.download_file(url, filename, extract_zip)
+            except TransportError as e:
+                if (
+                    self.routes
+                    and e.status is not None
+                    and 400 <= e.status < 500
+                    and e.status not in MISSING_STATUSES
+                ):
+                    # The format is unavailable for this book, not a glitch
+                    self.routes.mark_missing(url)
+                    await self.routes.flush()
                 continue
 
+            if self.routes:
+                # Routes ahead in the default order that were not requested
+                skipped = sum(
+                    1
+                    for earlier in DOWNLOAD_ROUTES[: DOWNLOAD_ROUTES.index(route)]
+                    if earlier not in routes[:attempt]
+                )
+                self.routes.remember_route(
+                    book_id, route, file_format(file_path), skipped
+                )
+                await self.routes.flush()
+            return file_path
+
         raise Exception(f"Failed to download book {book_id} from all URLs")
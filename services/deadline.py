@@ -0,0 +1,79 @@
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator
+
+# Event loop time by which the current tool call must finish
+_deadline: ContextVar[float | None] = ContextVar("call_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Work was cancelled because the call deadline expired."""
+
+
+@contextmanager
+def deadline(seconds: float | None) -> Iterator[None]:
+    """Bound the total time of requests issued in this context.
+
+    Nested deadlines can only tighten the outer one. None or a non-positive
+    value leaves the current deadline unchanged. Tasks created inside the
+    block inherit the deadline.
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+
+    at = asyncio.get_running_loop().time() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def without_deadline() -> Iterator[None]:
+    """Run work that may outlive the caller, e.g. background refreshes."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> float | None:
+    """Seconds until the current deadline, None without one."""
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - asyncio.get_running_loop().time()
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    left = time_left()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Deadline exceeded")
+
+
+@asynccontextmanager
+async def enforce_deadline() -> AsyncIterator[None]:
+    """Cancel the block when the current deadline expires.
+
+    The cancellation surfaces as DeadlineExceeded; other timeouts inside
+    the block propagate unchanged.
+    """
+    at = _deadline.get()
+    if at is None:
+        yield
+        return
+
+    check_deadline()
+    try:
+        async with asyncio.timeout_at(at) as scope:
+            yield
+    except TimeoutError as e:
+        if scope.expired():
+            raise DeadlineExceeded("Deadline exceeded") from e
+        raise
@@ -0,0 +1,320 @@
+import asyncio
+import os
+import re
+import struct
+import zlib
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+FSYNC_POLICIES = ("none", "end", "always")
+
+ZIP_LOCAL_HEADER = b"PK\x03\x04"
+ZIP_DATA_DESCRIPTOR = b"PK\x07\x08"
+ZIP_HEADER_STRUCT = struct.Struct("<4sHHHHHIIIHH")
+
+# Entries extracted from zipped downloads; epub files are zips too and are
+# saved as is.
+EXTRACTABLE_SUFFIXES = (".fb2",)
+
+
+class DownloadWriter:
+    """Buffered async file writer for downloads.
+
+    Incoming chunks are collected in memory and handed to a worker thread in
+    bulk, so a multi-megabyte download costs a handful of thread hops and
+    write syscalls instead of one per network chunk. Data goes to a
+    ``.part`` file that is renamed into place only after a successful close.
+
+    Args:
+        path: Final file path
+        buffer_size: Bytes collected before a write is issued
+        fsync_policy: "none", "end" (fsync once before rename) or "always"
+            (fsync after every buffered write)
+        preallocate_size: Expected file size (e.g. from Content-Length)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        buffer_size: int = 4 * 1024 * 1024,
+        fsync_policy: str = "end",
+        preallocate_size: int | None = None,
+    ):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Unknown fsync policy: {fsync_policy}. "
+                f"Available policies: {', '.join(FSYNC_POLICIES)}"
+            )
+        self.path = Path(path)
+        self.part_path = self.path.with_name(self.path.name + ".part")
+        self.buffer_size = buffer_size
+        self.fsync_policy = fsync_policy
+        self.preallocate_size = preallocate_size
+        self.bytes_written = 0
+        self.flush_count = 0
+        self._chunks: list[bytes] = []
+        self._buffered = 0
+        self._fd: int | None = None
+
+    async def __aenter__(self):
+        self._fd = await asyncio.to_thread(self._open)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            try:
+                await self.flush()
+                await asyncio.to_thread(self._finish)
+                return
+            except BaseException:
+                await asyncio.to_thread(self._abort)
+                raise
+        await asyncio.to_thread(self._abort)
+
+    async def write(self, chunk: bytes) -> None:
+        """Buffer chunk, writing to disk once the buffer is full."""
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Hand buffered chunks to a worker thread in one call."""
+        if not self._chunks:
+            return
+        chunks, self._chunks, self._buffered = self._chunks, [], 0
+        await asyncio.to_thread(self._write_chunks, chunks)
+        self.flush_count += 1
+
+    def _open(self) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        fd = os.open(self.part_path, flags, 0o644)
+        if self.preallocate_size:
+            try:
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(fd, 0, self.preallocate_size)
+                else:
+                    os.ftruncate(fd, self.preallocate_size)
+            except OSError:
+                # Preallocation is an optimization only
+                pass
+        return fd
+
+    def _write_chunks(self, chunks: list[bytes]) -> None:
+        if hasattr(os, "writev"):
+            views = [memoryview(chunk) for chunk in chunks]
+            while views:
+                written = os.writev(self._fd, views[:1024])
+                self.bytes_written += written
+                # Drop fully written buffers and trim a partially written one
+                while views and written >= len(views[0]):
+                    written -= len(views[0])
+                    views.pop(0)
+                if written:
+                    views[0] = views[0][written:]
+        else:
+            data = memoryview(b"".join(chunks))
+            while data:
+                written = os.write(self._fd, data)
+                self.bytes_written += written
+                data = data[written:]
+
+        if self.fsync_policy == "always":
+            os.fsync(self._fd)
+
+    def _finish(self) -> None:
+        if self.preallocate_size and self.preallocate_size != self.bytes_written:
+            os.ftruncate(self._fd, self.bytes_written)
+        if self.fsync_policy != "none":
+            os.fsync(self._fd)
+        os.close(self._fd)
+        self._fd = None
+        os.replace(self.part_path, self.path)
+
+    def _abort(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.part_path.unlink(missing_ok=True)
+
+
+class ZipStreamExtractor:
+    """Streaming decompressor for the first entry of a zip archive.
+
+    The archive is consumed as it arrives: the local file header is parsed
+    from the first bytes and the entry data is inflated chunk by chunk, so
+    memory use stays bounded by ``max_output`` regardless of file size. The
+    central directory at the end of the archive is ignored.
+    """
+
+    def __init__(self, max_output: int = 1024 * 1024):
+        self.max_output = max_output
+        self.entry_name: str | None = None
+        self.uncompressed_size: int | None = None
+        self.bytes_out = 0
+        self._head = bytearray()
+        self._pending = b""
+        self._flags = 0
+        self._method = 0
+        self._crc_expected = 0
+        self._remaining = 0
+        self._crc = 0
+        self._decompressor = None
+        self._done = False
+        self._trailer = bytearray()
+
+    def read_header(self, data: bytes) -> bool:
+        """Buffer data until the local file header is parsed.
+
+        Returns True once the header is complete. Raises ValueError if the
+        data is not a supported zip archive.
+        """
+        self._head += data
+        if len(self._head) < ZIP_HEADER_STRUCT.size:
+            return False
+
+        (
+            signature,
+            _version,
+            flags,
+            method,
+            _mtime,
+            _mdate,
+            crc,
+            compressed_size,
+            uncompressed_size,
+            name_length,
+            extra_length,
+        ) = ZIP_HEADER_STRUCT.unpack_from(self._head)
+
+        if signature != ZIP_LOCAL_HEADER:
+            raise ValueError("Not a zip archive")
+        if flags & 0x1:
+            raise ValueError("Encrypted zip archives are not supported")
+        if method not in (0, 8):
+            raise ValueError(f"Unsupported zip compression method: {method}")
+        if method == 0 and flags & 0x8:
+            raise ValueError("Stored zip entries with data descriptor not supported")
+
+        data_start = ZIP_HEADER_STRUCT.size + name_length + extra_length
+        if len(self._head) < data_start:
+            return False
+
+        name_end = ZIP_HEADER_STRUCT.size + name_length
+        raw_name = bytes(self._head[ZIP_HEADER_STRUCT.size : name_end])
+        encoding = "utf-8" if flags & 0x800 else "cp437"
+        self.entry_name = raw_name.decode(encoding, errors="replace")
+        self._flags = flags
+        self._method = method
+        self._crc_expected = crc
+        self._remaining = compressed_size
+        if not flags & 0x8:
+            self.uncompressed_size = uncompressed_size
+        if method == 8:
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._pending = bytes(self._head[data_start:])
+        return True
+
+    @property
+    def raw_head(self) -> bytes:
+        """Raw bytes consumed by read_header."""
+        return bytes(self._head)
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        """Decompress data, yielding pieces of at most max_output bytes."""
+        if self._pending:
+            data, self._pending = self._pending + data, b""
+
+        if self._done:
+            self._trailer += data[: 16 - len(self._trailer)]
+            return
+
+        if self._method == 0:
+            while data and self._remaining:
+                piece = data[: min(self._remaining, self.max_output)]
+                data = data[len(piece) :]
+                self._remaining -= len(piece)
+                yield self._emit(piece)
+            if not self._remaining:
+                self._done = True
+            return
+
+        decompressor = self._decompressor
+        while True:
+            piece = decompressor.decompress(data, self.max_output)
+            if piece:
+                yield self._emit(piece)
+            data = decompressor.unconsumed_tail
+            if decompressor.eof:
+                self._done = True
+                self._trailer += decompressor.unused_data[:16]
+                return
+            # A full output buffer may leave more output without more input
+            if not data and len(piece) < self.max_output:
+                return
+
+    def _emit(self, piece: bytes) -> bytes:
+        self._crc = zlib.crc32(piece, self._crc)
+        self.bytes_out += len(piece)
+        return piece
+
+    def finish(self) -> None:
+        """Verify that the entry was complete and intact."""
+        if not self._done:
+            raise ValueError("Truncated zip archive")
+
+        expected = self._crc_expected
+        if self._flags & 0x8:
+            trailer = bytes(self._trailer)
+            if trailer.startswith(ZIP_DATA_DESCRIPTOR):
+                trailer = trailer[4:]
+            if len(trailer) < 4:
+                raise ValueError("Truncated zip archive")
+            expected = struct.unpack_from("<I", trailer)[0]
+
+        if self._crc != expected:
+            raise ValueError("Zip entry CRC mismatch")
+
+
+async def read_zip_header(
+    chunks: AsyncIterator[bytes],
+) -> tuple[ZipStreamExtractor | None, bytes]:
+    """Read chunks until an extractable zip entry header is parsed.
+
+    Returns (extractor, head). The extractor is None when the payload is not
+    a zip with an extractable entry; head then holds the raw bytes read so
+    far, which belong at the start of the file.
+    """
+    extractor = ZipStreamExtractor()
+    head = b""
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= len(ZIP_LOCAL_HEADER) and not head.startswith(
+            ZIP_LOCAL_HEADER
+        ):
+            return None, head
+        try:
+            if extractor.read_header(chunk):
+                break
+        except ValueError:
+            return None, head
+
+    if extractor.entry_name is None:
+        return None, head
+    if not extractor.entry_name.lower().endswith(EXTRACTABLE_SUFFIXES):
+        return None, head
+    return extractor, head
+
+
+def extracted_filename(entry_name: str, archive_filename: str) -> str:
+    """Safe filename for an extracted zip entry."""
+    name = entry_name.replace("\\", "/").rsplit("/", 1)[-1]
+    name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', "_", name).strip(". ")
+    if name:
+        return name
+    if archive_filename.lower().endswith(".zip"):
+        return archive_filename[:-4]
+    return archive_filename
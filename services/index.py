@@ -0,0 +1,62 @@
+import time
+
+from models import Book
+
+
+class EntityIndex:
+    """In-process map of books to the series they are listed in.
+
+    Book pages don't show a book's series; author, search and series pages
+    do. Every parsed list records the series of its books, so book details
+    can fill it in without fetching those pages again. Records expire
+    ``ttl`` seconds after they were seen and are then pruned.
+
+    Series and book lookups are not answered from the index: list pages
+    show an author's share of a series and no annotations, so they never
+    make a complete series or book record.
+
+    Args:
+        ttl: Seconds a record is used, 0 disables the index
+    """
+
+    def __init__(self, ttl: float = 600):
+        self.ttl = ttl
+        # book ID -> (series ID, series name, seen at)
+        self._book_series: dict[str, tuple[str, str | None, float]] = {}
+        self._pruned_at = time.time()
+        self.stats = {"hits": 0, "misses": 0, "pruned": 0}
+
+    def _fresh(self, seen_at: float) -> bool:
+        return time.time() - seen_at < self.ttl
+
+    def _prune(self, now: float) -> None:
+        """Drop expired records, at most once per ttl."""
+        if now - self._pruned_at < self.ttl:
+            return
+        self._pruned_at = now
+        before = len(self._book_series)
+        self._book_series = {
+            k: r for k, r in self._book_series.items() if self._fresh(r[2])
+        }
+        self.stats["pruned"] += before - len(self._book_series)
+
+    def add_books(self, books: list[Book]) -> None:
+        """Record the series of books listed on a parsed page."""
+        now = time.time()
+        self._prune(now)
+        for book in books:
+            if book.series_id:
+                self._book_series[book.id] = (book.series_id, book.series_name, now)
+
+    def book_series(self, book_id: str) -> tuple[str, str | None] | None:
+        """(series ID, series name) of a book seen recently on any page."""
+        record = self._book_series.get(book_id)
+        if record is None or not self._fresh(record[2]):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return record[:2]
+
+    def size(self) -> dict[str, int]:
+        """Number of indexed books."""
+        return {"books": len(self._book_series)}
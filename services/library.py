@@ -0,0 +1,304 @@
+import hashlib
+import json
+import sqlite3
+import zipfile
+from contextlib import closing
+from pathlib import Path, PurePosixPath
+
+from lxml import etree
+
+from models import LibraryMatch
+
+LIBRARY_FORMATS = {".fb2.zip": "fb2.zip", ".fb2": "fb2", ".epub": "epub"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    format TEXT NOT NULL,
+    title TEXT,
+    authors TEXT NOT NULL DEFAULT '[]'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+    title, authors, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Books are untrusted input: no entity expansion or network access
+_XML_PARSER = etree.XMLParser(
+    recover=True, resolve_entities=False, no_network=True, huge_tree=True
+)
+
+
+def _fold(text: str) -> str:
+    """Collapse whitespace and fold ё, which FTS5 does not fold to е."""
+    return " ".join(text.split()).replace("ё", "е").replace("Ё", "Е")
+
+
+def _children(element, name: str) -> list:
+    return element.xpath(f"./*[local-name()='{name}']")
+
+
+def _text(element) -> str:
+    return " ".join("".join(element.itertext()).split())
+
+
+def library_format(path: Path) -> str | None:
+    """Book format of a library file by its name, None if not indexed."""
+    name = path.name.lower()
+    for suffix, fmt in LIBRARY_FORMATS.items():
+        if name.endswith(suffix):
+            return fmt
+    return None
+
+
+def extract_fb2(data: bytes) -> dict:
+    """Title, authors and body text of an fb2 document."""
+    root = etree.fromstring(data, _XML_PARSER)
+    if root is None:
+        raise ValueError("Not an fb2 document")
+
+    title = None
+    authors = []
+    for title_info in root.xpath("//*[local-name()='title-info']")[:1]:
+        for book_title in _children(title_info, "book-title")[:1]:
+            title = _text(book_title) or None
+        for author in _children(title_info, "author"):
+            parts = [
+                _text(part)
+                for name in ("first-name", "middle-name", "last-name")
+                for part in _children(author, name)
+            ]
+            name = " ".join(p for p in parts if p)
+            if not name:
+                name = " ".join(_text(n) for n in _children(author, "nickname"))
+            if name:
+                authors.append(name)
+
+    body = "\n".join(
+        "".join(body.itertext()) for body in root.xpath("//*[local-name()='body']")
+    )
+    return {"title": title, "authors": authors, "body": body}
+
+
+def extract_epub(archive: zipfile.ZipFile) -> dict:
+    """Title, authors and text of spine documents of an epub."""
+    container = etree.fromstring(archive.read("META-INF/container.xml"), _XML_PARSER)
+    rootfile = container.xpath("//*[local-name()='rootfile']/@full-path")[0]
+    opf = etree.fromstring(archive.read(rootfile), _XML_PARSER)
+    opf_dir = PurePosixPath(rootfile).parent
+
+    titles = opf.xpath("//*[local-name()='metadata']/*[local-name()='title']")
+    creators = opf.xpath("//*[local-name()='metadata']/*[local-name()='creator']")
+    manifest = {
+        item.get("id"): item.get("href")
+        for item in opf.xpath("//*[local-name()='manifest']/*[local-name()='item']")
+    }
+
+    texts = []
+    spine = opf.xpath("//*[local-name()='spine']/*[local-name()='itemref']/@idref")
+    for idref in spine:
+        href = manifest.get(idref)
+        if not href:
+            continue
+        name = str(opf_dir / href) if str(opf_dir) != "." else href
+        try:
+            document = etree.fromstring(archive.read(name), _XML_PARSER)
+        except KeyError:
+            continue
+        if document is None:
+            continue
+        for body in document.xpath("//*[local-name()='body']"):
+            texts.append("".join(body.itertext()))
+
+    return {
+        "title": _text(titles[0]) if titles else None,
+        "authors": [_text(c) for c in creators if _text(c)],
+        "body": "\n".join(texts),
+    }
+
+
+def extract_book(path: Path, fmt: str) -> dict:
+    """Extract title, authors and body text from a library file."""
+    if fmt == "fb2":
+        return extract_fb2(path.read_bytes())
+
+    with zipfile.ZipFile(path) as archive:
+        if fmt == "epub":
+            return extract_epub(archive)
+        names = [n for n in archive.namelist() if n.lower().endswith(".fb2")]
+        if not names:
+            raise ValueError("No fb2 file in archive")
+        return extract_fb2(archive.read(names[0]))
+
+
+def file_sha1(path: Path) -> str:
+    digest = hashlib.sha1(usedforsecurity=False)
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LibraryIndex:
+    """Full-text index of downloaded books in SQLite FTS5.
+
+    Refreshing compares each file's mtime and size with the index and only
+    hashes files that differ; only files whose content hash changed are
+    parsed again. Searching needs no network access.
+
+    Methods are blocking; call them from a worker thread.
+    """
+
+    def __init__(self, db_path: Path, library_dir: Path):
+        self.db_path = Path(db_path)
+        self.library_dir = Path(library_dir)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def refresh(self) -> dict[str, int]:
+        """Index new and changed files and drop deleted ones."""
+        stats = {"indexed": 0, "unchanged": 0, "failed": 0, "removed": 0}
+        with closing(self._connect()) as conn, conn:
+            known = {
+                row[0]: row[1:]
+                for row in conn.execute("SELECT path, id, mtime, size, sha1 FROM files")
+            }
+            seen = set()
+            if self.library_dir.is_dir():
+                for path in sorted(self.library_dir.rglob("*")):
+                    fmt = library_format(path)
+                    if fmt is None or not path.is_file():
+                        continue
+                    seen.add(str(path))
+                    result = self._index(conn, path, fmt, known.get(str(path)))
+                    stats[result] += 1
+
+            for path in known.keys() - seen:
+                file_id = known[path][0]
+                conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                conn.execute("DELETE FROM books_fts WHERE rowid = ?", (file_id,))
+                stats["removed"] += 1
+        return stats
+
+    def index_file(self, path: Path) -> str:
+        """Index one file, e.g. right after it was downloaded.
+
+        Returns "indexed", "unchanged", "failed" or "skipped" for files in
+        formats that are not indexed.
+        """
+        path = Path(path)
+        fmt = library_format(path)
+        if fmt is None:
+            return "skipped"
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT id, mtime, size, sha1 FROM files WHERE path = ?", (str(path),)
+            ).fetchone()
+            return self._index(conn, path, fmt, row)
+
+    def _index(
+        self, conn: sqlite3.Connection, path: Path, fmt: str, entry: tuple | None
+    ) -> str:
+        stat = path.stat()
+        if entry and entry[1] == stat.st_mtime and entry[2] == stat.st_size:
+            return "unchanged"
+
+        digest = file_sha1(path)
+        if entry and entry[3] == digest:
+            # Touched or copied over with the same content
+            conn.execute(
+                "UPDATE files SET mtime = ?, size = ? WHERE id = ?",
+                (stat.st_mtime, stat.st_size, entry[0]),
+            )
+            return "unchanged"
+
+        try:
+            book = extract_book(path, fmt)
+            result = "indexed"
+        except (
+            OSError,
+            ValueError,
+            IndexError,
+            KeyError,
+            zipfile.BadZipFile,
+            etree.XMLSyntaxError,
+        ):
+            # Remember broken files too so they are not parsed on every refresh
+            book = {"title": None, "authors": [], "body": ""}
+            result = "failed"
+
+        values = (
+            str(path),
+            stat.st_mtime,
+            stat.st_size,
+            digest,
+            fmt,
+            book["title"],
+            json.dumps(book["authors"], ensure_ascii=False),
+        )
+        if entry:
+            file_id = entry[0]
+            conn.execute(
+                "UPDATE files SET path = ?, mtime = ?, size = ?, sha1 = ?, "
+                "format = ?, title = ?, authors = ? WHERE id = ?",
+                (*values, file_id),
+            )
+            conn.execute("DELETE FROM books_fts WHERE rowid = ?", (file_id,))
+        else:
+            file_id = conn.execute(
+                "INSERT INTO files (path, mtime, size, sha1, format, title, authors) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values,
+            ).lastrowid
+        conn.execute(
+            "INSERT INTO books_fts (rowid, title, authors, body) VALUES (?, ?, ?, ?)",
+            (
+                file_id,
+                _fold(book["title"] or ""),
+                _fold(" ".join(book["authors"])),
+                _fold(book["body"]),
+            ),
+        )
+        return result
+
+    def search(self, query: str, limit: int = 10) -> list[LibraryMatch]:
+        """Find books containing all query words, best matches first."""
+        terms = _fold(query.casefold()).split()
+        if not terms:
+            return []
+        # Quote every word so FTS5 syntax in user input is matched literally
+        match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT files.path, files.title, files.authors, files.format,
+                       snippet(books_fts, -1, '[', ']', '…', 16),
+                       bm25(books_fts, 10.0, 5.0, 1.0) AS rank
+                FROM books_fts JOIN files ON files.id = books_fts.rowid
+                WHERE books_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (match, limit),
+            ).fetchall()
+
+        return [
+            LibraryMatch(
+                path=path,
+                title=title,
+                authors=json.loads(authors),
+                format=fmt,
+                snippet=snippet,
+                score=round(-rank, 4),
+            )
+            for path, title, authors, fmt, snippet, rank in rows
+        ]
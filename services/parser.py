@@ -1,16 +1,115 @@
 import re
-
-from bs4 import BeautifulSoup
-
-from models import Author, Book
+from typing import Iterator
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from models import Author, AuthorProfile, Book, BookFilter, SeriesNode
+
+from .tracing import traced
+
+BOOK_LINK = re.compile(r"^/b/\d+$")
+FORMAT_LINK = re.compile(r"^/b/\d+/(\w+)$")
+GENRE_LINK = re.compile(r"^/g/\d+$")
+LANGUAGE_MARK = re.compile(r"^\s*\[([a-z]{2,3})\]")
+YEAR = re.compile(r"\((\d{4})\)")
+
+# Books without a language mark are in the site's main language
+DEFAULT_LANGUAGE = "ru"
+
+DOWNLOAD_LABELS = {
+    "(читать)",
+    "(fb2)",
+    "(epub)",
+    "(mobi)",
+    "(скачать epub)",
+    "(скачать pdf)",
+}
+
+# Tags that end a book line on list pages
+LINE_BOUNDARIES = {
+    "br",
+    "p",
+    "div",
+    "form",
+    "table",
+    "ul",
+    "ol",
+    "li",
+    "hr",
+    "h3",
+    "h4",
+}
+
+
+def date_key(date: str) -> tuple[int, int, int]:
+    """Comparable key for DD.MM.YYYY dates."""
+    day, month, year = date[:10].split(".")
+    return int(year), int(month), int(day)
+
+
+def _text(nodes: list) -> str:
+    """Text of sibling nodes, as get_text() of their parent would give."""
+    return "".join(
+        node.get_text() if isinstance(node, Tag) else str(node)
+        for node in nodes
+        if isinstance(node, Tag) or type(node) is NavigableString
+    )
+
+
+def _links(nodes: list, href: re.Pattern) -> Iterator[Tag]:
+    """Links among nodes and their descendants whose href matches."""
+    for node in nodes:
+        if not isinstance(node, Tag):
+            continue
+        if node.name == "a" and href.search(node.get("href", "")):
+            yield node
+        yield from node.find_all("a", href=href)
+
+
+def _genre_codes(soup: BeautifulSoup) -> dict[str, set[str]]:
+    """Genre codes by casefolded name, from the genre links on a page."""
+    codes: dict[str, set[str]] = {}
+    for link in soup.find_all("a", href=GENRE_LINK):
+        if link.get("name"):
+            name = link.get_text(strip=True).casefold()
+            codes.setdefault(name, set()).add(link["name"].casefold())
+    return codes
+
+
+def _genres(element: Tag) -> set[str]:
+    """Genre codes and names from genre links and g-* classes."""
+    genres = {
+        cls[2:].casefold() for cls in element.get("class") or [] if cls.startswith("g-")
+    }
+    links = element.find_all("a", class_="genre")
+    if element.name == "a" and "genre" in (element.get("class") or []):
+        links.append(element)
+    for link in links:
+        genres.add(link.get_text(strip=True).casefold())
+        if link.get("name"):
+            genres.add(link["name"].casefold())
+    return genres
 
 
 class FlibustaParser:
-    """Parser for Flibusta HTML pages."""
-
-    def parse_authors_search(self, html: str) -> list[Author]:
+    """Parser for Flibusta HTML pages.
+
+    Pages may be given as str or as raw bytes with the charset declared by
+    the server; bytes go to lxml undecoded.
+    """
+
+    def _soup(self, html: str | bytes, encoding: str | None = None) -> BeautifulSoup:
+        """Build soup, letting lxml decode bytes with the declared encoding."""
+        if isinstance(html, bytes):
+            return BeautifulSoup(html, "lxml", from_encoding=encoding)
+        return BeautifulSoup(html, "lxml")
+
+    @traced("parse.authors_search")
+    def parse_authors_search(
+        self, html: str | bytes, encoding: str | None = None
+    ) -> list[Author]:
         """Parse authors from search results page."""
-        soup = BeautifulSoup(html, "lxml")
+        soup = self._soup(html, encoding)
         authors = []
 
         # Find "Найденные писатели" section
@@ -49,9 +148,12 @@ class FlibustaParser:
 
         return authors
 
-    def parse_books_search(self, html: str) -> list[Book]:
+    @traced("parse.books_search")
+    def parse_books_search(
+        self, html: str | bytes, encoding: str | None = None
+    ) -> list[Book]:
         """Parse books from search results page."""
-        soup = BeautifulSoup(html, "lxml")
+        soup = self._soup(html, encoding)
         books = []
 
         # Find "Найденные книги" section
@@ -92,34 +194,109 @@ class FlibustaParser:
 
         return books
 
-    def parse_author_books(self, html: str, author_name: str = None) -> list[Book]:
-        """Parse books from author page."""
-        soup = BeautifulSoup(html, "lxml")
+    @traced("parse.author_books")
+    def parse_author_books(
+        self,
+        html: str | bytes,
+        author_name: str = None,
+        encoding: str | None = None,
+        book_filter: BookFilter | None = None,
+    ) -> list[Book]:
+        """Parse books from author page.
+
+        Entries rejected by book_filter are skipped before a Book is built.
+        """
+        soup = self._soup(html, encoding)
 
         # Extract author name from page title if not provided
         if not author_name:
-            title_element = soup.find("h1", class_="title")
-            if title_element:
-                author_name = title_element.get_text(strip=True)
+            author_name = self._page_title(soup)
+
+        return self._author_books(soup, author_name, book_filter)
+
+    @traced("parse.author_profile")
+    def parse_author_profile(
+        self, html: str | bytes, author_id: str, encoding: str | None = None
+    ) -> AuthorProfile:
+        """Parse name, books and series of an author page in one pass."""
+        soup = self._soup(html, encoding)
+        name = self._page_title(soup)
+        books = self._author_books(soup, name)
+
+        series_books: dict[str, list[str]] = {}
+        for book in books:
+            if book.series_id:
+                series_books.setdefault(book.series_id, []).append(book.id)
+
+        return AuthorProfile(
+            id=author_id,
+            name=name,
+            books=books,
+            series=self._author_series(soup),
+            series_headers=self._parse_series_headers(soup),
+            series_books=series_books,
+        )
 
+    def _page_title(self, soup: BeautifulSoup) -> str | None:
+        title_element = soup.find("h1", class_="title")
+        return title_element.get_text(strip=True) if title_element else None
+
+    def _author_books(
+        self,
+        soup: BeautifulSoup,
+        author_name: str | None,
+        book_filter: BookFilter | None = None,
+    ) -> list[Book]:
         # Check if this is a date-sorted page (has h4 tags with dates)
         date_headers = soup.find_all("h4")
         if date_headers and self._is_date_format(date_headers[0].get_text(strip=True)):
-            return self._parse_author_books_with_dates(soup, author_name)
+            return self._parse_author_books_with_dates(
+                soup, author_name, book_filter=book_filter
+            )
         else:
-            return self._parse_author_books_with_series(soup, author_name)
+            return self._parse_author_books_with_series(soup, author_name, book_filter)
 
     def _is_date_format(self, text: str) -> bool:
         """Check if text is in date format DD.MM.YYYY."""
         return bool(re.match(r"\d{2}\.\d{2}\.\d{4}", text))
 
+    @traced("parse.author_books_since")
+    def parse_author_books_since(
+        self,
+        html: str,
+        since_date: str | None = None,
+        seen_ids: set[str] | None = None,
+    ) -> list[Book]:
+        """Parse books from date-sorted author page newer than a watermark.
+
+        Parsing stops at the first date older than since_date. Books added on
+        since_date itself are kept unless their ID is in seen_ids.
+        """
+        soup = self._soup(html)
+
+        author_name = None
+        title_element = soup.find("h1", class_="title")
+        if title_element:
+            author_name = title_element.get_text(strip=True)
+
+        return self._parse_author_books_with_dates(
+            soup, author_name, since_date=since_date, skip_ids=seen_ids
+        )
+
     def _parse_author_books_with_dates(
-        self, soup: BeautifulSoup, author_name: str = None
+        self,
+        soup: BeautifulSoup,
+        author_name: str = None,
+        since_date: str | None = None,
+        skip_ids: set[str] | None = None,
+        book_filter: BookFilter | None = None,
     ) -> list[Book]:
         """Parse books from author page with date sorting."""
+        book_filter = self._resolve_genres(soup, book_filter)
         books = []
         current_date = None
-        seen_book_ids = set()
+        seen_book_ids = set(skip_ids or ())
+        since_key = date_key(since_date) if since_date else None
 
         # Find all elements that can contain dates or book info
         elements = soup.find_all(["h4", "div"])
@@ -130,21 +307,17 @@ class FlibustaParser:
                 date_text = element.get_text(strip=True)
                 if self._is_date_format(date_text):
                     current_date = date_text
+                    # Newest first: everything below is already known
+                    if since_key and date_key(date_text) < since_key:
+                        break
             elif element.name == "div" and current_date:
                 # This might contain book info - find MAIN book links
-                book_links = element.find_all("a", href=re.compile(r"^/b/\d+$"))
+                book_links = element.find_all("a", href=BOOK_LINK)
 
                 for book_link in book_links:
                     # Skip download links based on text content
                     link_text = book_link.get_text(strip=True)
-                    if link_text in [
-                        "(читать)",
-                        "(fb2)",
-                        "(epub)",
-                        "(mobi)",
-                        "(скачать epub)",
-                        "(скачать pdf)",
-                    ]:
+                    if link_text in DOWNLOAD_LABELS:
                         continue
 
                     # Parse only if we haven't seen this book ID before
@@ -152,54 +325,216 @@ class FlibustaParser:
                     book_id = href.split("/b/")[-1] if "/b/" in href else ""
 
                     if book_id and book_id not in seen_book_ids:
+                        # Later links to a book, e.g. in reviews, are not entries
+                        seen_book_ids.add(book_id)
+                        # A div may hold several book lines
+                        line, _ = self._line(book_link)
+                        entry = self._entry_info(
+                            line, book_link, _genres(element), current_date
+                        )
+                        if book_filter and not self._matches(entry, book_filter):
+                            continue
                         book = self._parse_book_from_element(
                             element, book_link, author_name
                         )
                         if book:
                             book.added_date = current_date
                             books.append(book)
-                            seen_book_ids.add(book_id)
 
         return books
 
     def _parse_author_books_with_series(
-        self, soup: BeautifulSoup, author_name: str = None
+        self,
+        soup: BeautifulSoup,
+        author_name: str = None,
+        book_filter: BookFilter | None = None,
     ) -> list[Book]:
-        """Parse books from author page with series grouping."""
+        """Parse books from author page with series grouping.
+
+        Books are listed one per line under series headers. Each book is
+        parsed from its own line only, so the work grows linearly with the
+        page; series and genres of a header apply to the lines below it.
+        """
+        book_filter = self._resolve_genres(soup, book_filter)
         books = []
         seen_book_ids = set()
+        # Series group of every book line seen so far, by id() of its link
+        groups: dict[int, dict] = {}
 
-        # Find all book links in author page
-        book_links = soup.find_all("a", href=re.compile(r"^/b/\d+$"))
-
-        for link in book_links:
+        for link in soup.find_all("a", href=BOOK_LINK):
             # Skip download links
-            if link.get_text(strip=True) in [
-                "(читать)",
-                "(fb2)",
-                "(epub)",
-                "(mobi)",
-                "(скачать epub)",
-                "(скачать pdf)",
-            ]:
+            if link.get_text(strip=True) in DOWNLOAD_LABELS:
                 continue
 
+            nodes, boundary = self._line(link)
+            group = self._line_group(link, boundary, groups)
+            groups[id(link)] = group
+
             # Check for duplicates
             href = link.get("href", "")
             book_id = href.split("/b/")[-1] if "/b/" in href else ""
+            if not book_id or book_id in seen_book_ids:
+                continue
+            # Later links to a book, e.g. in reviews, are not entries
+            seen_book_ids.add(book_id)
+
+            if book_filter and not self._matches(
+                self._entry_info(nodes, link, group["genres"]), book_filter
+            ):
+                continue
 
-            if book_id and book_id not in seen_book_ids:
-                book = self._parse_book_from_element(link.parent, link, author_name)
-                if book:
-                    books.append(book)
-                    seen_book_ids.add(book_id)
+            book = self._parse_book_from_nodes(nodes, link, author_name)
+            if book:
+                if book.series_id is None and group["series"]:
+                    book.series_name, book.series_id = group["series"]
+                books.append(book)
 
         return books
 
+    def _line(self, element) -> tuple[list, Tag | None]:
+        """Siblings on the element's line and the tag that precedes the line."""
+        before = []
+        node = element.previous_sibling
+        while node is not None and getattr(node, "name", None) not in LINE_BOUNDARIES:
+            before.append(node)
+            node = node.previous_sibling
+        boundary = node
+
+        nodes = before[::-1]
+        node = element
+        while node is not None and getattr(node, "name", None) not in LINE_BOUNDARIES:
+            nodes.append(node)
+            node = node.next_sibling
+        return nodes, boundary
+
+    def _line_group(self, link, boundary: Tag | None, groups: dict[int, dict]) -> dict:
+        """Series and genres that apply to a book line.
+
+        A <p class="genre"> right above the line lists the book's own genres.
+        After a <br>, the previous line decides: a series header starts a
+        group, another book line continues its group and a blank line ends
+        it.
+        """
+        if boundary is None:
+            # First line of a container, e.g. a div with g-* genre classes
+            return {"series": None, "genres": _genres(link.parent)}
+        if boundary.name == "p" and "genre" in (boundary.get("class") or []):
+            return {"series": None, "genres": _genres(boundary)}
+        if boundary.name != "br":
+            return {"series": None, "genres": set()}
+
+        previous, _ = self._line(boundary.previous_sibling or boundary)
+        if boundary.previous_sibling is None or not _text(previous).strip():
+            return {"series": None, "genres": set()}
+
+        for book_link in _links(previous, BOOK_LINK):
+            if id(book_link) in groups:
+                return groups[id(book_link)]
+
+        series = None
+        genres = set()
+        for node in previous:
+            if not isinstance(node, Tag) or node.name != "a":
+                continue
+            series_span = node.find("span", class_="h8")
+            if series_span and "/s/" in node.get("href", ""):
+                series = (
+                    series_span.get_text(strip=True),
+                    node["href"].split("/s/")[-1],
+                )
+            elif "genre" in (node.get("class") or []):
+                genres |= _genres(node)
+        return {"series": series, "genres": genres}
+
+    def _resolve_genres(
+        self, soup: BeautifulSoup, book_filter: BookFilter | None
+    ) -> BookFilter | None:
+        """Add the codes of genre names to the filter.
+
+        Entries always carry genre codes (g-* classes, link names), but the
+        site shows a genre's name only where the genre changes.
+        """
+        if not book_filter or not book_filter.genres:
+            return book_filter
+        codes = _genre_codes(soup)
+        genres = set()
+        for genre in book_filter.genres:
+            genres.add(genre.casefold())
+            genres |= codes.get(genre.casefold(), set())
+        return book_filter.model_copy(update={"genres": sorted(genres)})
+
+    def _entry_info(
+        self, nodes: list, link, genres: set[str], added_date: str | None = None
+    ) -> dict:
+        """Language, translation, formats and year of a book entry.
+
+        The year is the one shown in the entry, else the year the book was
+        added (date-sorted author pages show no publication years).
+        """
+        language = DEFAULT_LANGUAGE
+        after = link.next_sibling
+        if type(after) is NavigableString:
+            match = LANGUAGE_MARK.match(after)
+            if match:
+                language = match.group(1)
+
+        formats = set()
+        for format_link in _links(nodes, FORMAT_LINK):
+            fmt = FORMAT_LINK.match(format_link["href"]).group(1)
+            if fmt == "download":
+                # "(скачать epub)" names the format of the generic link
+                fmt = format_link.get_text(strip=True).strip("()").split()[-1]
+            if fmt != "read":
+                formats.add(fmt.lower())
+
+        text = _text(nodes)
+        year = YEAR.search(text)
+        return {
+            "genres": genres,
+            "language": language,
+            "translated": "(пер." in text,
+            "formats": formats,
+            "year": (
+                int(year.group(1))
+                if year
+                else date_key(added_date)[0] if added_date else None
+            ),
+        }
+
+    def _matches(self, entry: dict, book_filter: BookFilter) -> bool:
+        """Check a book entry against every set filter criterion."""
+        f = book_filter
+        if f.genres and not {g.casefold() for g in f.genres} & entry["genres"]:
+            return False
+        if f.languages and entry["language"] not in {
+            language.casefold() for language in f.languages
+        }:
+            return False
+        if f.translated is not None and entry["translated"] != f.translated:
+            return False
+        if f.formats and not {fmt.casefold() for fmt in f.formats} & entry["formats"]:
+            return False
+        if f.year_from is not None or f.year_to is not None:
+            year = entry["year"]
+            if year is None:
+                return False
+            if f.year_from is not None and year < f.year_from:
+                return False
+            if f.year_to is not None and year > f.year_to:
+                return False
+        return True
+
     def _parse_book_from_element(
         self, parent_element, book_link, author_name: str = None
     ) -> Book | None:
         """Parse a single book from its container element."""
+        nodes = [parent_element] if parent_element else []
+        return self._parse_book_from_nodes(nodes, book_link, author_name)
+
+    def _parse_book_from_nodes(
+        self, nodes: list, book_link, author_name: str = None
+    ) -> Book | None:
+        """Parse a single book from the nodes that make up its entry."""
         href = book_link.get("href", "")
         book_id = href.split("/b/")[-1] if "/b/" in href else ""
 
@@ -211,6 +546,8 @@ class FlibustaParser:
         if not title:
             return None
 
+        text = _text(nodes)
+
         # Extract authors - if we're on author page, the main author is known
         authors = []
         if author_name:
@@ -218,20 +555,15 @@ class FlibustaParser:
             authors = [author_name]
         else:
             # Generic parsing - look for author links but exclude translators
-            if parent_element:
-                parent_text = parent_element.get_text()
-
+            if nodes:
                 # If there's translator info, skip them and look for actual authors
-                if "(пер." in parent_text:
+                if "(пер." in text:
                     # For translated books, the main author is usually not explicitly mentioned
                     # in the book line, so we can't determine it from this context
                     authors = ["Unknown Author"]
                 else:
                     # Look for author links (not translators)
-                    author_links = parent_element.find_all(
-                        "a", href=re.compile(r"/a/\d+")
-                    )
-                    for author_link in author_links:
+                    for author_link in _links(nodes, re.compile(r"/a/\d+")):
                         author_name_text = author_link.get_text(strip=True)
                         if author_name_text not in authors:
                             authors.append(author_name_text)
@@ -243,25 +575,22 @@ class FlibustaParser:
         series_name = None
         series_id = None
 
-        if parent_element:
-            # Look for series links like <a href="/s/18510"><span>Name</span></a>
-            series_links = parent_element.find_all("a", href=re.compile(r"/s/\d+"))
-            for series_link in series_links:
-                series_span = series_link.find("span", class_="h8")
-                if series_span:
-                    series_name = series_span.get_text(strip=True)
-                    series_href = series_link.get("href", "")
-                    series_id = (
-                        series_href.split("/s/")[-1] if "/s/" in series_href else None
-                    )
-                    break  # Take first series found
+        # Look for series links like <a href="/s/18510"><span>Name</span></a>
+        for series_link in _links(nodes, re.compile(r"/s/\d+")):
+            series_span = series_link.find("span", class_="h8")
+            if series_span:
+                series_name = series_span.get_text(strip=True)
+                series_href = series_link.get("href", "")
+                series_id = (
+                    series_href.split("/s/")[-1] if "/s/" in series_href else None
+                )
+                break  # Take first series found
 
         # Extract year from title or surrounding text
         year = None
-        if parent_element:
-            year_match = re.search(r"\((\d{4})\)", parent_element.get_text())
-            if year_match:
-                year = int(year_match.group(1))
+        year_match = YEAR.search(text)
+        if year_match:
+            year = int(year_match.group(1))
 
         return Book(
             id=book_id,
@@ -272,9 +601,12 @@ class FlibustaParser:
             series_id=series_id,
         )
 
-    def parse_book_details(self, html: str) -> Book:
+    @traced("parse.book_details")
+    def parse_book_details(
+        self, html: str | bytes, encoding: str | None = None
+    ) -> Book:
         """Parse detailed book information from book page."""
-        soup = BeautifulSoup(html, "lxml")
+        soup = self._soup(html, encoding)
 
         # Extract book ID from script tag
         book_id = "unknown"
@@ -354,9 +686,14 @@ class FlibustaParser:
             description=description,
         )
 
-    def parse_author_series(self, html: str) -> list[dict]:
+    @traced("parse.author_series")
+    def parse_author_series(
+        self, html: str | bytes, encoding: str | None = None
+    ) -> list[dict]:
         """Parse series list from author page."""
-        soup = BeautifulSoup(html, "lxml")
+        return self._author_series(self._soup(html, encoding))
+
+    def _author_series(self, soup: BeautifulSoup) -> list[dict]:
         series_list = []
 
         # Find all series links
@@ -383,3 +720,99 @@ class FlibustaParser:
                 unique_series.append(series)
 
         return unique_series
+
+    @traced("parse.series_hierarchy")
+    def parse_series_hierarchy(
+        self, html: str | bytes, encoding: str | None = None
+    ) -> list[dict]:
+        """Parse series group headers with their parent series.
+
+        Nested series are shown as chains like "Кинг, Стивен. Романы ↦
+        Дэнни Торранс"; each header gets the ID of the series before it.
+        """
+        soup = self._soup(html, encoding)
+        return self._parse_series_headers(soup)
+
+    def _parse_series_headers(self, soup: BeautifulSoup) -> list[dict]:
+        """Collect series header links, skipping series references in books."""
+        headers = []
+        seen = set()
+
+        for link in soup.find_all("a", href=re.compile(r"^/s/\d+$")):
+            series_span = link.find("span", class_="h8")
+            if not series_span:
+                continue
+
+            previous = self._previous_meaningful_sibling(link)
+            # Book lines reference their series in parentheses: (<a ...>)
+            if isinstance(previous, NavigableString) and previous.rstrip().endswith(
+                "("
+            ):
+                continue
+
+            parent_id = None
+            if getattr(previous, "name", None) == "b" and "↦" in previous.get_text():
+                parent_link = self._previous_meaningful_sibling(previous)
+                if getattr(parent_link, "name", None) == "a":
+                    parent_href = parent_link.get("href", "")
+                    if "/s/" in parent_href:
+                        parent_id = parent_href.split("/s/")[-1]
+
+            series_id = link.get("href", "").split("/s/")[-1]
+            if (series_id, parent_id) in seen:
+                continue
+            seen.add((series_id, parent_id))
+
+            headers.append(
+                {
+                    "id": series_id,
+                    "name": series_span.get_text(strip=True),
+                    "parent_id": parent_id,
+                }
+            )
+
+        return headers
+
+    def _previous_meaningful_sibling(self, element):
+        """Previous sibling, skipping whitespace-only text."""
+        previous = element.previous_sibling
+        while isinstance(previous, NavigableString) and not previous.strip():
+            previous = previous.previous_sibling
+        return previous
+
+    @traced("parse.series_page")
+    def parse_series_page(
+        self,
+        html: str | bytes,
+        series_id: str,
+        encoding: str | None = None,
+        book_filter: BookFilter | None = None,
+    ) -> SeriesNode:
+        """Parse series page into a node with books and direct sub-series."""
+        soup = self._soup(html, encoding)
+
+        name = None
+        title_element = soup.find("h1", class_="title")
+        if title_element:
+            name = title_element.get_text(strip=True)
+
+        # For series pages, we don't have a single author, so pass None
+        books = self._parse_author_books_with_series(soup, None, book_filter)
+
+        headers = self._parse_series_headers(soup)
+        ancestors = {h["parent_id"] for h in headers if h["id"] == series_id}
+        children = []
+        seen_ids = set()
+        for header in headers:
+            child_id = header["id"]
+            if (
+                child_id == series_id
+                or child_id in ancestors
+                or child_id in seen_ids
+                or header["parent_id"] not in (None, series_id)
+            ):
+                continue
+            seen_ids.add(child_id)
+            children.append(SeriesNode(id=child_id, name=header["name"]))
+
+        return SeriesNode(id=series_id, name=name, books=books, children=children)
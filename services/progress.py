@@ -0,0 +1,169 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator
+
+# (progress, total, message) -> sends one progress notification
+Notify = Callable[[float, float | None, str | None], Awaitable[None]]
+# (data) -> sends one partial result
+Publish = Callable[[Any], Awaitable[None]]
+
+
+class ProgressReporter:
+    """Sends progress of one tool call to the client.
+
+    Progress counts completed steps (pages fetched and parsed) without a
+    total. Once a batch starts, only finished batch items are sent, as
+    progress towards the batch size, so the total is reached exactly when
+    the batch ends. Downloads report bytes against the file size. Byte
+    updates are sent at most every ``interval`` seconds. A failing client
+    connection never fails the call.
+
+    Args:
+        notify: Sends a progress notification
+        publish: Sends a partial result, None to not stream them
+        interval: Minimum seconds between download notifications
+    """
+
+    def __init__(
+        self, notify: Notify, publish: Publish | None = None, interval: float = 0.25
+    ):
+        self.notify = notify
+        self.publish = publish
+        self.interval = interval
+        self.stats = {
+            "pages": 0,
+            "bytes": 0,
+            "items": 0,
+            "partials": 0,
+            "send_errors": 0,
+        }
+        self._last_progress = 0.0
+        self._last_sent_at = 0.0
+        # Progress before the running batch and its size; None outside one
+        self._batch_base = 0.0
+        self._batch_total: int | None = None
+
+    async def _send(
+        self, progress: float, total: float | None, message: str, force: bool = True
+    ) -> None:
+        # Progress must increase with every notification
+        if progress <= self._last_progress:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_sent_at < self.interval:
+            return
+        self._last_progress = progress
+        self._last_sent_at = now
+        try:
+            await self.notify(progress, total, message)
+        except Exception:
+            # The client may have gone away; the result is still worth finishing
+            self.stats["send_errors"] += 1
+
+    async def _step(self, message: str) -> None:
+        # Inside a batch steps would overtake the count of finished items
+        if self._batch_total is None:
+            await self._send(self._last_progress + 1, None, message)
+
+    def start_batch(self, total: int) -> None:
+        """Report progress as items of a batch of total finished from now on."""
+        self._batch_base = self._last_progress
+        self._batch_total = total
+
+    async def page_fetched(self, size: int) -> None:
+        self.stats["pages"] += 1
+        self.stats["bytes"] += size
+        await self._step(
+            f"Fetched {self.stats['pages']} pages, {self.stats['bytes']} bytes"
+        )
+
+    async def parsed(self, count: int, what: str = "items") -> None:
+        self.stats["items"] += count
+        await self._step(f"Parsed {count} {what}")
+
+    async def downloaded(self, size: int, total: int | None) -> None:
+        """Report the bytes of the current download written so far."""
+        done = total is not None and size >= total
+        await self._send(
+            size,
+            total,
+            f"Downloaded {size} of {total or '?'} bytes",
+            force=done,
+        )
+
+    async def partial(self, data: Any, done: int) -> None:
+        """Stream one finished item of the batch before the call returns."""
+        self.stats["partials"] += 1
+        if self.publish is not None:
+            try:
+                await self.publish(data)
+            except Exception:
+                self.stats["send_errors"] += 1
+        total = self._batch_total
+        if total is None:
+            await self._step(f"Finished {done} items")
+            return
+        await self._send(
+            self._batch_base + done,
+            self._batch_base + total,
+            f"Finished {done} of {total}",
+        )
+
+
+_reporter: ContextVar[ProgressReporter | None] = ContextVar(
+    "progress_reporter", default=None
+)
+
+
+@contextmanager
+def reporting(reporter: ProgressReporter | None) -> Iterator[None]:
+    """Send progress of work in this context to reporter; None sends nothing.
+
+    Tasks created inside the block report to the same reporter.
+    """
+    token = _reporter.set(reporter)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
+
+
+def current() -> ProgressReporter | None:
+    """Reporter of the current tool call, if the client asked for progress."""
+    return _reporter.get()
+
+
+async def page_fetched(size: int) -> None:
+    """Count a fetched page of size bytes."""
+    reporter = _reporter.get()
+    if reporter is not None:
+        await reporter.page_fetched(size)
+
+
+async def parsed(count: int, what: str = "items") -> None:
+    """Count parsed items, e.g. books of an author page."""
+    reporter = _reporter.get()
+    if reporter is not None:
+        await reporter.parsed(count, what)
+
+
+async def downloaded(size: int, total: int | None) -> None:
+    """Report bytes of the current download."""
+    reporter = _reporter.get()
+    if reporter is not None:
+        await reporter.downloaded(size, total)
+
+
+def start_batch(total: int) -> None:
+    """Start a batch of total items finished one by one."""
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter.start_batch(total)
+
+
+async def partial(data: Any, done: int) -> None:
+    """Stream a finished item of the current batch."""
+    reporter = _reporter.get()
+    if reporter is not None:
+        await reporter.partial(data, done)
@@ -0,0 +1,86 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+from .tracing import traced
+
+OUTPUT_FORMATS = ("objects", "compact")
+
+
+def _available_fields(item: BaseModel | dict) -> list[str]:
+    """Return field names of a model or dict row."""
+    if isinstance(item, BaseModel):
+        return list(type(item).model_fields)
+    return list(item)
+
+
+def _get(item: BaseModel | dict, field: str) -> Any:
+    """Read a single field without serializing the whole row."""
+    if isinstance(item, BaseModel):
+        return getattr(item, field)
+    return item.get(field)
+
+
+def _validate_fields(items: list, fields: list[str]) -> None:
+    """Raise ValueError if any requested field is unknown."""
+    if not items:
+        return
+    available = _available_fields(items[0])
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. "
+            f"Available fields: {', '.join(available)}"
+        )
+
+
+@traced("project")
+def project_items(
+    items: list[BaseModel | dict],
+    fields: list[str] | None = None,
+    output_format: str = "objects",
+) -> list[dict[str, Any]] | dict[str, Any]:
+    """Serialize a list of models with field projection.
+
+    "objects" returns one dict per item without null fields; "compact" returns
+    a single {"columns": [...], "rows": [[...], ...]} table. Only requested
+    fields are read, the rest are never serialized.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format: {output_format}. "
+            f"Available formats: {', '.join(OUTPUT_FORMATS)}"
+        )
+
+    if fields:
+        _validate_fields(items, fields)
+
+    if output_format == "compact":
+        if fields:
+            columns = list(fields)
+        elif items:
+            # Keep only columns that carry data in at least one row
+            columns = [
+                field
+                for field in _available_fields(items[0])
+                if any(_get(item, field) is not None for item in items)
+            ]
+        else:
+            columns = []
+        rows = [[_get(item, column) for column in columns] for item in items]
+        return {"columns": columns, "rows": rows}
+
+    include = set(fields) if fields else None
+    result = []
+    for item in items:
+        if isinstance(item, BaseModel):
+            result.append(item.model_dump(include=include, exclude_none=True))
+        else:
+            result.append(
+                {
+                    key: value
+                    for key, value in item.items()
+                    if value is not None and (include is None or key in include)
+                }
+            )
+    return result
@@ -0,0 +1,110 @@
+import re
+import unicodedata
+
+# Latin to Cyrillic transliteration, longest sequences first
+_MULTI_LETTER = [
+    ("shch", "щ"),
+    ("sch", "щ"),
+    ("zh", "ж"),
+    ("kh", "х"),
+    ("ph", "ф"),
+    ("ts", "ц"),
+    ("ch", "ч"),
+    ("sh", "ш"),
+    ("yu", "ю"),
+    ("ju", "ю"),
+    ("ya", "я"),
+    ("ja", "я"),
+    ("yo", "е"),
+    ("jo", "е"),
+    ("ye", "е"),
+    ("x", "кс"),
+]
+_SINGLE_LETTER = str.maketrans(
+    {
+        "a": "а",
+        "b": "б",
+        "v": "в",
+        "w": "в",
+        "g": "г",
+        "d": "д",
+        "e": "е",
+        "z": "з",
+        "i": "и",
+        "j": "й",
+        "k": "к",
+        "c": "к",
+        "q": "к",
+        "l": "л",
+        "m": "м",
+        "n": "н",
+        "o": "о",
+        "p": "п",
+        "r": "р",
+        "s": "с",
+        "t": "т",
+        "u": "у",
+        "f": "ф",
+        "h": "х",
+        "'": "ь",
+    }
+)
+# Word endings with conventional spelling ("Dostoyevsky" → "Достоевский")
+_SUFFIXES = [("skiy", "ский"), ("skii", "ский"), ("sky", "ский"), ("iy", "ий")]
+_VOWELS = "aeiouy"
+_LATIN_WORD = re.compile(r"^[a-z']+$")
+_DASHES = re.compile(r"[\u2010-\u2015\u2212]")
+_QUOTES = re.compile(r'[\u00ab\u00bb\u201c-\u201f\u2033"]')
+
+
+def transliterate_word(word: str) -> str:
+    """Transliterate a lowercase Latin word to Cyrillic."""
+    for latin, cyrillic in _SUFFIXES:
+        if word.endswith(latin) and len(word) > len(latin):
+            return transliterate_word(word[: -len(latin)]) + cyrillic
+
+    result = []
+    i = 0
+    while i < len(word):
+        for latin, cyrillic in _MULTI_LETTER:
+            if word.startswith(latin, i):
+                result.append(cyrillic)
+                i += len(latin)
+                break
+        else:
+            char = word[i]
+            if char == "y":
+                # "oy" / "ay" endings are "ой" / "ай", otherwise "ы"
+                after_vowel = i > 0 and word[i - 1] in _VOWELS
+                result.append("й" if after_vowel else "ы")
+            else:
+                result.append(char.translate(_SINGLE_LETTER))
+            i += 1
+    return "".join(result)
+
+
+def clean_query(query: str) -> str:
+    """Query as typed, with Unicode NFKC and collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", query).split())
+
+
+def normalize_query(query: str, transliterate: bool = False) -> str:
+    """Canonical form of a search query.
+
+    Applies Unicode NFKC, case folding, ё→е folding, unified dashes and quotes
+    and collapsed whitespace. With transliterate, words written only in Latin
+    letters are converted to Cyrillic ("stiven king" → "стивен кинг").
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = text.replace("ё", "е")
+    text = _DASHES.sub("-", text)
+    text = _QUOTES.sub('"', text)
+    words = text.split()
+
+    if transliterate:
+        words = [
+            transliterate_word(word) if _LATIN_WORD.match(word) else word
+            for word in words
+        ]
+
+    return " ".join(words)
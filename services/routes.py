@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+# Statuses meaning the resource does not exist, cached for every URL
+MISSING_STATUSES = (404, 410)
+
+
+def file_format(file_path: str | Path) -> str:
+    """Book format of a downloaded file by its name, e.g. "fb2.zip"."""
+    name = Path(file_path).name.lower()
+    if name.endswith(".fb2.zip"):
+        return "fb2.zip"
+    return Path(name).suffix.lstrip(".")
+
+
+class RouteMemory:
+    """Learned download routes and negative cache of missing resources.
+
+    The route and format that delivered a book are remembered and tried
+    first on the next download. URLs answering 404 and download routes
+    that failed with another client error are skipped without a request
+    until their entry expires after ``ttl`` seconds. State is persisted in
+    one JSON file so restarts keep what was learned; changes are written by
+    ``flush`` in a worker thread, batching those made while a write runs.
+
+    Args:
+        path: JSON file for the state, None keeps it in memory only
+        ttl: Seconds a failed URL is skipped, 0 disables negative caching
+    """
+
+    def __init__(self, path: Path | None = None, ttl: float = 3600):
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self._data: dict[str, dict] | None = None
+        self._dirty = False
+        self._flushing = False
+        self.stats = {
+            "routes_learned": 0,
+            "route_hits": 0,
+            "negative_stored": 0,
+            "negative_hits": 0,
+            "requests_avoided": 0,
+        }
+
+    def _load(self) -> dict[str, dict]:
+        if self._data is None:
+            data = {}
+            if self.path:
+                try:
+                    data = json.loads(self.path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    pass
+            self._data = {
+                "routes": data.get("routes", {}),
+                "missing": data.get("missing", {}),
+            }
+        return self._data
+
+    def route(self, book_id: str) -> str | None:
+        """Download route that worked for the book last time."""
+        entry = self._load()["routes"].get(book_id)
+        return entry["route"] if entry else None
+
+    def format(self, book_id: str) -> str | None:
+        """Format of the file the learned route delivered."""
+        entry = self._load()["routes"].get(book_id)
+        return entry["format"] if entry else None
+
+    def remember_route(
+        self, book_id: str, route: str, fmt: str, skipped: int = 0
+    ) -> None:
+        """Record a working route.
+
+        ``skipped`` is the number of routes ahead of it in the default order
+        that were not requested because this route was tried first.
+        """
+        routes = self._load()["routes"]
+        if skipped:
+            self.stats["route_hits"] += 1
+            self.stats["requests_avoided"] += skipped
+        if routes.get(book_id) != {"route": route, "format": fmt}:
+            routes[book_id] = {"route": route, "format": fmt}
+            self.stats["routes_learned"] += 1
+            self._dirty = True
+
+    def known_missing(self, url: str) -> bool:
+        """Check the negative cache; a hit counts as an avoided request."""
+        missing = self._load()["missing"]
+        expires_at = missing.get(url)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del missing[url]
+            return False
+        self.stats["negative_hits"] += 1
+        self.stats["requests_avoided"] += 1
+        return True
+
+    def mark_missing(self, url: str) -> None:
+        """Skip url until the TTL expires."""
+        if self.ttl <= 0:
+            return
+        self._load()["missing"][url] = time.time() + self.ttl
+        self.stats["negative_stored"] += 1
+        self._dirty = True
+
+    def _snapshot(self) -> str:
+        """Serialize state, dropping expired entries."""
+        data = self._load()
+        now = time.time()
+        data["missing"] = {
+            url: expires_at
+            for url, expires_at in data["missing"].items()
+            if expires_at > now
+        }
+        return json.dumps(data, ensure_ascii=False)
+
+    def _write(self, payload: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(payload, encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def save(self) -> None:
+        """Write state atomically, dropping expired entries."""
+        self._dirty = False
+        if self.path is not None:
+            self._write(self._snapshot())
+
+    async def flush(self) -> None:
+        """Write pending changes without blocking the event loop.
+
+        While a write runs, later changes are left to it: it writes again
+        once it is done instead of each caller starting its own write.
+        """
+        if self.path is None or self._flushing:
+            return
+        self._flushing = True
+        try:
+            while self._dirty:
+                self._dirty = False
+                # Serialize on the loop, where the state is modified
+                await asyncio.to_thread(self._write, self._snapshot())
+        finally:
+            self._flushing = False
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator
+
+# Priority classes, highest first
+PRIORITIES = ("interactive", "background")
+
+_priority: ContextVar[str] = ContextVar("request_priority", default="interactive")
+
+
+class SchedulerOverloaded(Exception):
+    """Request was shed because its priority class queue is full."""
+
+
+@contextmanager
+def request_priority(priority: str) -> Iterator[None]:
+    """Run requests issued in this context with the given priority class.
+
+    Tasks created inside the block inherit the priority.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(
+            f"Unknown priority: {priority}. Available priorities: "
+            f"{', '.join(PRIORITIES)}"
+        )
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    """Priority class of the current context."""
+    return _priority.get()
+
+
+class RequestScheduler:
+    """Admission control for outgoing HTTP requests.
+
+    Each request takes a slot for its whole duration, including streaming the
+    body. At most ``max_concurrency`` requests run at once and each priority
+    class has its own limit, so background work cannot occupy every slot.
+    When a slot frees up, queued interactive requests start before
+    background ones. Background requests beyond ``queue_limits`` are shed
+    with SchedulerOverloaded instead of queuing without bound.
+
+    Args:
+        max_concurrency: Requests in flight across all classes
+        class_limits: Requests in flight per class (default: max_concurrency)
+        queue_limits: Queued requests per class before shedding
+            (default: unbounded)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        class_limits: dict[str, int] | None = None,
+        queue_limits: dict[str, int] | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.class_limits = {p: max_concurrency for p in PRIORITIES}
+        self.class_limits.update(class_limits or {})
+        self.queue_limits = dict(queue_limits or {})
+        self._active = 0
+        self._class_active = {p: 0 for p in PRIORITIES}
+        self._queues: dict[str, deque[asyncio.Future]] = {
+            p: deque() for p in PRIORITIES
+        }
+        self._metrics = {
+            p: {
+                "admitted": 0,
+                "shed": 0,
+                "max_queue_depth": 0,
+                "wait_total": 0.0,
+                "wait_max": 0.0,
+            }
+            for p in PRIORITIES
+        }
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a request slot for the current priority class."""
+        priority = current_priority()
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def _can_start(self, priority: str) -> bool:
+        return (
+            self._active < self.max_concurrency
+            and self._class_active[priority] < self.class_limits[priority]
+        )
+
+    def _take(self, priority: str) -> None:
+        self._active += 1
+        self._class_active[priority] += 1
+
+    def _record_admission(self, priority: str, waited: float) -> None:
+        metrics = self._metrics[priority]
+        metrics["admitted"] += 1
+        metrics["wait_total"] += waited
+        metrics["wait_max"] = max(metrics["wait_max"], waited)
+
+    async def _acquire(self, priority: str) -> None:
+        rank = PRIORITIES.index(priority)
+        queued_ahead = any(self._queues[p] for p in PRIORITIES[: rank + 1])
+        if not queued_ahead and self._can_start(priority):
+            self._take(priority)
+            self._record_admission(priority, 0.0)
+            return
+
+        queue = self._queues[priority]
+        limit = self.queue_limits.get(priority)
+        if limit is not None and len(queue) >= limit:
+            self._metrics[priority]["shed"] += 1
+            raise SchedulerOverloaded(
+                f"Too many queued {priority} requests ({len(queue)})"
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        metrics = self._metrics[priority]
+        metrics["max_queue_depth"] = max(metrics["max_queue_depth"], len(queue))
+        enqueued_at = time.perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted just before cancellation
+                self._release(priority)
+            elif waiter in queue:
+                queue.remove(waiter)
+            raise
+        self._record_admission(priority, time.perf_counter() - enqueued_at)
+
+    def _release(self, priority: str) -> None:
+        self._active -= 1
+        self._class_active[priority] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Wake queued requests in priority order while slots are free."""
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue and self._can_start(priority):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                # Reserve the slot now so later arrivals cannot take it
+                self._take(priority)
+                waiter.set_result(None)
+
+    @property
+    def stats(self) -> dict:
+        """Current queue depths and per-class wait time metrics."""
+        classes = {}
+        for priority in PRIORITIES:
+            metrics = self._metrics[priority]
+            admitted = metrics["admitted"]
+            classes[priority] = {
+                "active": self._class_active[priority],
+                "queue_depth": len(self._queues[priority]),
+                "max_queue_depth": metrics["max_queue_depth"],
+                "admitted": admitted,
+                "shed": metrics["shed"],
+                "wait_ms_avg": (
+                    round(metrics["wait_total"] / admitted * 1000, 3)
+                    if admitted
+                    else 0.0
+                ),
+                "wait_ms_max": round(metrics["wait_max"] * 1000, 3),
+            }
+        return {"active": self._active, "classes": classes}
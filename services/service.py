@@ -1,55 +1,167 @@
-from models import Author, Book
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable
 
+from config import config
+from models import (
+    Author,
+    AuthorProfile,
+    AuthorUpdates,
+    Book,
+    BookFilter,
+    LibraryMatch,
+    SeriesNode,
+)
+
+from . import progress
+from .cache import ResultCache
 from .client import FlibustaClient
-from .parser import FlibustaParser
+from .deadline import DeadlineExceeded, deadline
+from .index import EntityIndex
+from .library import LibraryIndex
+from .parser import FlibustaParser, date_key
+from .query import clean_query, normalize_query
+from .tracing import traced
+from .watcher import NewBooksWatcher
 
 
 class FlibustaService:
     """Main service for Flibusta operations."""
 
-    def __init__(self, client: FlibustaClient, parser: FlibustaParser):
+    def __init__(
+        self,
+        client: FlibustaClient,
+        parser: FlibustaParser,
+        cache: ResultCache | None = None,
+        transliterate: bool | None = None,
+        watcher: NewBooksWatcher | None = None,
+        raw_html: bool | None = None,
+        library: LibraryIndex | None = None,
+        index: EntityIndex | None = None,
+    ):
         self.client = client
         self.parser = parser
+        self.cache = cache
+        self.watcher = watcher
+        self.library = library
+        self.index = index
+        # Downloads saved but not added to the library index
+        self.library_stats = {"index_errors": 0}
+        self.transliterate = (
+            config.SEARCH_TRANSLITERATE if transliterate is None else transliterate
+        )
+        self.raw_html = config.PARSE_RAW_HTML if raw_html is None else raw_html
+
+    @asynccontextmanager
+    async def call(
+        self,
+        timeout: float | None = None,
+        reporter: progress.ProgressReporter | None = None,
+    ) -> AsyncIterator[None]:
+        """Scope of one tool call: shared client session and call deadline.
+
+        Requests still running when the deadline (config.TOOL_TIMEOUT by
+        default) expires are cancelled with DeadlineExceeded. Pages fetched,
+        items parsed, download bytes and finished batch items are sent to
+        reporter.
+        """
+        with deadline(config.TOOL_TIMEOUT if timeout is None else timeout):
+            with progress.reporting(reporter):
+                async with self.client:
+                    yield
+
+    async def _cached(
+        self,
+        operation: str,
+        args: dict[str, Any],
+        result_type: Any,
+        loader: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """Serve parsed result from cache, falling back to loader."""
+        if self.cache is None:
+            return await loader()
 
+        async def load():
+            # Background refreshes may outlive the caller's client context
+            async with self.client:
+                return await loader()
+
+        return await self.cache.get_or_load(
+            operation, args, result_type, load, cacheable
+        )
+
+    async def _fetch(
+        self, get_page: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any
+    ) -> tuple[str | bytes, str | None]:
+        """Fetch page as (html, encoding) for the parser.
+
+        With raw_html the body stays bytes and the declared charset is passed
+        to lxml, skipping str decoding.
+        """
+        if self.raw_html:
+            return await get_page(*args, raw=True, **kwargs)
+        return await get_page(*args, **kwargs), None
+
+    @traced("service.search_books")
     async def search_books(self, query: str) -> list[Book]:
         """Search for books by title or author name."""
-        html = await self.client.search_books_page(query)
-        return self.parser.parse_books_search(html)
+        # Equivalent spellings share one request and one cache entry; the
+        # site is still asked what the user typed
+        key = normalize_query(query, self.transliterate)
+        query = clean_query(query)
 
+        async def load():
+            html, encoding = await self._fetch(self.client.search_books_page, query)
+            return self.parser.parse_books_search(html, encoding)
+
+        books = await self._cached("search_books", {"query": key}, list[Book], load)
+        if self.index is not None:
+            self.index.add_books(books)
+        return books
+
+    @traced("service.search_authors")
     async def search_authors(self, query: str) -> list[Author]:
         """Search for authors by name."""
-        html = await self.client.search_books_page(query)
-        return self.parser.parse_authors_search(html)
+        key = normalize_query(query, self.transliterate)
+        query = clean_query(query)
+
+        async def load():
+            html, encoding = await self._fetch(self.client.search_books_page, query)
+            return self.parser.parse_authors_search(html, encoding)
 
+        return await self._cached("search_authors", {"query": key}, list[Author], load)
+
+    @traced("service.search_books_by_author")
     async def search_books_by_author(
         self,
         author_id: str,
         books_limit: int = 50,
         sort_by: str = "default",
+        book_filter: BookFilter | None = None,
     ) -> list[Book]:
-        """Get books by specific author."""
-        order = "date" if sort_by == "date" else "default"
-        html = await self.client.get_author_books_page(author_id, order=order)
+        """Get books by specific author, optionally filtered while parsing.
 
-        # Extract author name from the page for correct parsing
-        author_name = self._extract_author_name_from_html(html)
-
-        books = self.parser.parse_author_books(html, author_name)
+        A year range is matched on the date-sorted page, the only one that
+        shows years (when books were added).
+        """
+        year_range = book_filter is not None and (
+            book_filter.year_from is not None or book_filter.year_to is not None
+        )
+        order = "date" if sort_by == "date" or year_range else "default"
+        books = await self._get_author_books(author_id, order, book_filter)
 
         # Apply sorting
         if sort_by == "date":
             if order == "date" and any(book.added_date for book in books):
-                # Sort by added_date if available - convert to comparable format
-                def date_key(book):
-                    if not book.added_date:
-                        return "9999.99.99"
-                    # Convert DD.MM.YYYY to YYYY.MM.DD for proper sorting
-                    parts = book.added_date.split(".")
-                    if len(parts) == 3:
-                        return f"{parts[2]}.{parts[1]}.{parts[0]}"
-                    return book.added_date
-
-                books.sort(key=date_key, reverse=True)
+                # Newest first; books without a date stay in front as before
+                books.sort(
+                    key=lambda book: (
+                        date_key(book.added_date) if book.added_date else (9999,)
+                    ),
+                    reverse=True,
+                )
             elif all(book.year for book in books):
                 # Fallback to publication year
                 books.sort(key=lambda book: book.year or 0, reverse=True)
@@ -57,14 +169,84 @@ class FlibustaService:
         # Apply limit
         return books[:books_limit]
 
+    async def _get_author_books(
+        self, author_id: str, order: str, book_filter: BookFilter | None = None
+    ) -> list[Book]:
+        """Get all parsed books from author page that pass the filter."""
+        if not book_filter:
+            profile = await self._get_author_profile(author_id, order)
+            return profile.books
+
+        async def load():
+            html, encoding = await self._fetch(
+                self.client.get_author_books_page, author_id, order=order
+            )
+            books = self.parser.parse_author_books(
+                html, encoding=encoding, book_filter=book_filter
+            )
+            await progress.parsed(len(books), "books")
+            return books
+
+        args = {
+            "author_id": author_id,
+            "order": order,
+            "filter": book_filter.model_dump(exclude_none=True),
+        }
+        return await self._cached("author_books", args, list[Book], load)
+
+    @traced("service.get_author_profile")
+    async def get_author_profile(
+        self, author_id: str, sort_by: str = "default"
+    ) -> AuthorProfile:
+        """Get name, books and series of an author from one page fetch."""
+        order = "date" if sort_by == "date" else "default"
+        return await self._get_author_profile(author_id, order)
+
+    async def _get_author_profile(self, author_id: str, order: str) -> AuthorProfile:
+        """Author page parsed once; serves every author tool."""
+
+        async def load():
+            html, encoding = await self._fetch(
+                self.client.get_author_books_page, author_id, order=order
+            )
+            profile = self.parser.parse_author_profile(html, author_id, encoding)
+            await progress.parsed(len(profile.books), "books")
+            return profile
+
+        profile = await self._cached(
+            "author_profile",
+            {"author_id": author_id, "order": order},
+            AuthorProfile,
+            load,
+        )
+        if self.index is not None:
+            self.index.add_books(profile.books)
+        return profile
+
+    @traced("service.get_book_details")
     async def get_book_details(self, book_id: str) -> Book:
         """Get detailed information about a book."""
-        html = await self.client.get_book_details_page(book_id)
-        book = self.parser.parse_book_details(html)
-        book.id = book_id  # Ensure correct ID
+
+        async def load():
+            html, encoding = await self._fetch(
+                self.client.get_book_details_page, book_id
+            )
+            book = self.parser.parse_book_details(html, encoding)
+            book.id = book_id  # Ensure correct ID
+            return book
+
+        book = await self._cached("book_details", {"book_id": book_id}, Book, load)
+        if self.index is None:
+            return book
+
+        # Book pages don't show the series; author and series pages do
+        series = self.index.book_series(book_id)
+        if series and book.series_id is None:
+            book.series_id, book.series_name = series
         return book
 
-    async def download_book(self, book_id: str) -> str:
+    @traced("service.download_book")
+    async def download_book(self, book_id: str, extract_zip: bool = False) -> str:
         """Download book and return file path."""
         # Get book details to create proper filename
         try:
@@ -76,7 +258,16 @@ class FlibustaService:
             # Fallback to generic name if can't get details
             suggested_filename = f"book_{book_id}.epub"
 
-        return await self.client.try_download_book(book_id, suggested_filename)
+        file_path = await self.client.try_download_book(
+            book_id, suggested_filename, extract_zip=extract_zip
+        )
+        if self.library is not None:
+            try:
+                await asyncio.to_thread(self.library.index_file, Path(file_path))
+            except Exception:
+                # The file is saved; the next search_library refresh retries
+                self.library_stats["index_errors"] += 1
+        return file_path
 
     def _create_safe_filename(self, title: str) -> str:
         """Create filesystem-safe filename from book title."""
@@ -89,23 +280,179 @@ class FlibustaService:
             safe_title = safe_title[:97] + "..."
         return safe_title
 
-    def _extract_author_name_from_html(self, html: str) -> str | None:
-        """Extract author name from author page HTML."""
-        from bs4 import BeautifulSoup
-
-        soup = BeautifulSoup(html, "lxml")
-        title_element = soup.find("h1", class_="title")
-        if title_element:
-            return title_element.get_text(strip=True)
-        return None
-
+    @traced("service.get_author_series")
     async def get_author_series(self, author_id: str) -> list[dict]:
         """Get all series for specific author."""
-        html = await self.client.get_author_books_page(author_id)
-        return self.parser.parse_author_series(html)
-
-    async def get_series_books(self, series_id: str) -> list[Book]:
-        """Get books from specific series."""
-        html = await self.client.get_series_page(series_id)
-        # For series pages, we don't have a single author, so pass None
-        return self.parser.parse_author_books(html, None)
+        profile = await self._get_author_profile(author_id, "default")
+        return profile.series
+
+    @traced("service.get_series_books")
+    async def get_series_books(
+        self, series_id: str, book_filter: BookFilter | None = None
+    ) -> list[Book]:
+        """Get books from specific series, optionally filtered while parsing."""
+        if not book_filter:
+            series = await self._get_series_page(series_id)
+            return series.books
+
+        async def load():
+            html, encoding = await self._fetch(self.client.get_series_page, series_id)
+            series = self.parser.parse_series_page(
+                html, series_id, encoding, book_filter=book_filter
+            )
+            await progress.parsed(len(series.books), "books")
+            return series.books
+
+        args = {
+            "series_id": series_id,
+            "filter": book_filter.model_dump(exclude_none=True),
+        }
+        return await self._cached("series_books", args, list[Book], load)
+
+    async def _get_series_page(self, series_id: str) -> SeriesNode:
+        """Get series with its books and direct sub-series."""
+
+        async def load():
+            html, encoding = await self._fetch(self.client.get_series_page, series_id)
+            series = self.parser.parse_series_page(html, series_id, encoding)
+            await progress.parsed(len(series.books), "books")
+            return series
+
+        series = await self._cached(
+            "series_page", {"series_id": series_id}, SeriesNode, load
+        )
+        if self.index is not None:
+            self.index.add_books(series.books)
+        return series
+
+    @traced("service.get_series_tree")
+    async def get_series_tree(
+        self,
+        series_id: str | None = None,
+        author_id: str | None = None,
+        max_depth: int = 3,
+    ) -> list[SeriesNode]:
+        """Get nested series with books, starting at a series or an author.
+
+        For an author, roots are the top-level series on the author page and
+        the page's "↦" chains add known sub-series. Each level of sub-series
+        is fetched concurrently; a series is visited once per traversal.
+        Series not fetched before the call deadline are marked partial and
+        such trees are not cached.
+        """
+        if (series_id is None) == (author_id is None):
+            raise ValueError("Specify exactly one of series_id or author_id")
+
+        async def load():
+            edges: dict[str, list[str]] = {}
+            if series_id is not None:
+                root_ids = [series_id]
+            else:
+                profile = await self._get_author_profile(author_id, "default")
+                headers = profile.series_headers
+                child_ids = {h["id"] for h in headers if h["parent_id"]}
+                root_ids = []
+                for header in headers:
+                    if header["parent_id"]:
+                        edges.setdefault(header["parent_id"], []).append(header["id"])
+                    elif header["id"] not in child_ids and header["id"] not in root_ids:
+                        root_ids.append(header["id"])
+            return await self._crawl_series(root_ids, edges, max_depth)
+
+        return await self._cached(
+            "series_tree",
+            {"series_id": series_id, "author_id": author_id, "max_depth": max_depth},
+            list[SeriesNode],
+            load,
+            cacheable=lambda tree: not any(map(_is_incomplete, tree)),
+        )
+
+    async def _crawl_series(
+        self, root_ids: list[str], edges: dict[str, list[str]], max_depth: int
+    ) -> list[SeriesNode]:
+        """Fetch series trees breadth-wise with bounded concurrency."""
+        semaphore = asyncio.Semaphore(config.SERIES_CRAWL_CONCURRENCY)
+        visited = set(root_ids)
+
+        async def visit(node_id: str, depth: int) -> SeriesNode:
+            try:
+                async with semaphore:
+                    page = await self._get_series_page(node_id)
+            except DeadlineExceeded:
+                return SeriesNode(id=node_id, partial=True)
+            except Exception as e:
+                # One broken sub-series doesn't fail the rest of the tree
+                return SeriesNode(id=node_id, error=str(e))
+
+            child_ids = [child.id for child in page.children]
+            child_ids += [c for c in edges.get(node_id, []) if c not in child_ids]
+            node = page.model_copy(update={"children": []})
+
+            # Claim children before awaiting so parallel branches don't repeat them
+            new_ids = [c for c in child_ids if c not in visited]
+            if depth >= max_depth:
+                node.truncated = bool(new_ids)
+                return node
+            visited.update(new_ids)
+            node.children = list(
+                await asyncio.gather(*[visit(c, depth + 1) for c in new_ids])
+            )
+            return node
+
+        done = 0
+        progress.start_batch(len(root_ids))
+
+        async def visit_root(root_id: str) -> SeriesNode:
+            nonlocal done
+            tree = await visit(root_id, 0)
+            # Stream each root's tree as soon as it is crawled
+            done += 1
+            await progress.partial(tree.model_dump(), done)
+            return tree
+
+        return list(await asyncio.gather(*map(visit_root, root_ids)))
+
+    @traced("service.check_new_books")
+    async def check_new_books(self, author_ids: list[str]) -> list[AuthorUpdates]:
+        """Get books added to authors since the previous check."""
+        if self.watcher is None:
+            raise ValueError("New books watcher is not configured")
+        return await self.watcher.check_new_books(author_ids)
+
+    @traced("service.search_library")
+    async def search_library(self, query: str, limit: int = 10) -> list[LibraryMatch]:
+        """Full-text search in downloaded books, indexing new files first."""
+        if self.library is None:
+            raise ValueError("Library index is not configured")
+        await asyncio.to_thread(self.library.refresh)
+        return await asyncio.to_thread(self.library.search, query, limit)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Scheduler, memory, cache, route, watcher, index and library counters."""
+        stats = {
+            "scheduler": self.client.scheduler.stats,
+            "memory": {
+                **self.client.budget.stats,
+                "in_flight_bytes": self.client.budget.in_flight,
+            },
+        }
+        if self.cache is not None:
+            stats["cache"] = dict(self.cache.stats)
+        if self.client.routes is not None:
+            stats["routes"] = dict(self.client.routes.stats)
+        if self.watcher is not None:
+            stats["watcher"] = dict(self.watcher.stats)
+        if self.index is not None:
+            stats["index"] = {**self.index.stats, **self.index.size()}
+        if self.library is not None:
+            stats["library"] = dict(self.library_stats)
+        return stats
+
+
+def _is_incomplete(node: SeriesNode) -> bool:
+    """Check whether any node of the tree is partial or failed."""
+    return (
+        node.partial
+        or node.error is not None
+        or any(map(_is_incomplete, node.children))
+    )
@@ -0,0 +1,296 @@
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+
+class Span:
+    """Timed unit of work within a trace."""
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "start",
+        "attributes",
+        "_started",
+    )
+
+    def __init__(self, name: str, parent: "Span | None", attributes: dict):
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.start = time.time()
+        self.attributes = attributes
+        self._started = time.perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes, e.g. the response status once it is known."""
+        self.attributes.update(attributes)
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the span started."""
+        return (time.perf_counter() - self._started) * 1000
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is disabled."""
+
+    trace_id = span_id = parent_id = None
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def elapsed_ms(self) -> float:
+        return 0.0
+
+
+_NOOP = _NoopSpan()
+
+_current: ContextVar[Span | None] = ContextVar("trace_span", default=None)
+
+
+class JsonlTraceSink:
+    """Appends finished spans to a file, one JSON object per line.
+
+    Spans are written when they end, so children precede their parents.
+    A writer thread encodes and appends them in batches, so a span ending
+    on the event loop never waits for the file; flush() waits until the
+    spans recorded so far are written. Several server processes may append
+    to the same file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self._pending: list[dict] = []
+        self._queued = 0
+        self._written = 0
+        self._closing = False
+        self._thread: threading.Thread | None = None
+        self._cond = threading.Condition()
+
+    def write(self, record: dict) -> None:
+        with self._cond:
+            self._pending.append(record)
+            self._queued += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="trace-sink", daemon=True
+                )
+                self._thread.start()
+                # Daemon threads still run at exit, so queued spans get out
+                atexit.register(self.close)
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing)
+                if not self._pending:
+                    return
+                records, self._pending = self._pending, []
+            try:
+                self._append(records)
+            except OSError:
+                # Tracing must not fail the server; the batch is dropped
+                pass
+            with self._cond:
+                self._written += len(records)
+                self._cond.notify_all()
+
+    def _append(self, records: list[dict]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(
+            "".join(
+                json.dumps(record, ensure_ascii=False, default=str) + "\n"
+                for record in records
+            )
+        )
+        self._file.flush()
+
+    def flush(self) -> None:
+        """Wait until spans recorded so far are written."""
+        with self._cond:
+            queued = self._queued
+            self._cond.wait_for(lambda: self._written >= queued)
+
+    def close(self) -> None:
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._closing = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join()
+            atexit.unregister(self.close)
+        with self._cond:
+            self._closing = False
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_sink: JsonlTraceSink | None = None
+
+
+def set_sink(sink: JsonlTraceSink | None) -> None:
+    """Start writing spans to sink; None disables tracing."""
+    global _sink
+    _sink = sink
+
+
+def enabled() -> bool:
+    """Check whether spans are being recorded."""
+    return _sink is not None
+
+
+def flush() -> None:
+    """Wait until spans recorded so far are written, e.g. before reading them."""
+    if _sink is not None:
+        _sink.flush()
+
+
+def current_span() -> Span | _NoopSpan:
+    """Innermost open span of this context."""
+    return _current.get() or _NOOP
+
+
+def set_attributes(**attributes: Any) -> None:
+    """Add attributes to the innermost open span, if any."""
+    current_span().set(**attributes)
+
+
+@contextmanager
+def detached() -> Iterator[None]:
+    """Start a new trace for work that outlives the current span."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    """Record the block as a span, nested under the current one.
+
+    Tasks created inside the block continue its trace. An exception leaving
+    the block is recorded as the span's error.
+    """
+    sink = _sink
+    if sink is None:
+        yield _NOOP
+        return
+
+    current = Span(name, _current.get(), attributes)
+    token = _current.set(current)
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        record = {
+            "trace_id": current.trace_id,
+            "span_id": current.span_id,
+            "parent_id": current.parent_id,
+            "name": name,
+            "start": current.start,
+            "duration_ms": round(current.elapsed_ms(), 3),
+            "attributes": current.attributes,
+        }
+        if error:
+            record["error"] = error
+        sink.write(record)
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """Decorate a function or coroutine function to run inside a span."""
+
+    def decorate(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _sink is None:
+                    return await fn(*args, **kwargs)
+                with span(name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _sink is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def load_traces(path: Path) -> dict[str, list[dict]]:
+    """Read spans from a JSONL sink file grouped by trace ID, in file order."""
+    traces: dict[str, list[dict]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A process may have been killed mid-line
+                continue
+            traces.setdefault(record["trace_id"], []).append(record)
+    return traces
+
+
+def render_waterfall(spans: list[dict], width: int = 40) -> list[str]:
+    """Render one trace as an indented span tree with a timeline bar."""
+    if not spans:
+        return []
+    origin = min(s["start"] for s in spans)
+    end = max(s["start"] + s["duration_ms"] / 1000 for s in spans)
+    total_ms = max((end - origin) * 1000, 1e-3)
+
+    ids = {s["span_id"] for s in spans}
+    children: dict[str | None, list[dict]] = {}
+    for s in sorted(spans, key=lambda s: s["start"]):
+        parent = s["parent_id"] if s["parent_id"] in ids else None
+        children.setdefault(parent, []).append(s)
+
+    lines = [f"{'start ms':>9}{'ms':>9}  {'span':<34}timeline"]
+
+    def visit(parent: str | None, depth: int) -> None:
+        for s in children.get(parent, []):
+            offset = (s["start"] - origin) * 1000
+            left = min(int(offset / total_ms * width), width - 1)
+            length = max(1, round(s["duration_ms"] / total_ms * width))
+            bar = " " * left + "#" * min(length, width - left)
+            name = "  " * depth + s["name"]
+            attributes = " ".join(
+                f"{key}={value}" for key, value in s.get("attributes", {}).items()
+            )
+            if "error" in s:
+                attributes = f"{attributes} error={s['error']!r}".strip()
+            lines.append(
+                f"{offset:>9.1f}{s['duration_ms']:>9.1f}  {name:<34}"
+                f"|{bar:<{width}}| {attributes}"
+            )
+            visit(s["span_id"], depth + 1)
+
+    visit(None, 0)
+    return lines
@@ -0,0 +1,255 @@
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
+from typing import AsyncIterator, Mapping
+
+import aiohttp
+import httpx
+
+from config import config
+
+from .tracing import enabled as tracing_enabled
+from .tracing import set_attributes
+
+TRANSPORTS = ("aiohttp", "httpx")
+
+
+class TransportError(Exception):
+    """Request failed in the transport or with an HTTP error status."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class BodyTooLarge(TransportError):
+    """Response body exceeds the size cap of its route."""
+
+
+class TransportResponse(ABC):
+    """Streaming HTTP response with a backend-neutral interface."""
+
+    status: int
+    headers: Mapping[str, str]
+
+    @property
+    @abstractmethod
+    def charset(self) -> str | None:
+        """Charset from Content-Type, if any."""
+
+    @property
+    def content_length(self) -> int | None:
+        """Body size from Content-Length, if any."""
+        value = self.headers.get("content-length")
+        return int(value) if value and value.isdigit() else None
+
+    @abstractmethod
+    def iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        """Iterate over the body in chunks of up to chunk_size bytes."""
+
+    @abstractmethod
+    async def read(self) -> bytes:
+        """Read the whole body as bytes."""
+
+    @abstractmethod
+    async def text(self) -> str:
+        """Read the whole body as text."""
+
+
+class Transport(ABC):
+    """HTTP backend used by FlibustaClient."""
+
+    @abstractmethod
+    async def open(self) -> None:
+        """Create connection pool."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close connection pool."""
+
+    @abstractmethod
+    def stream(self, url: str) -> "AsyncIterator[TransportResponse]":
+        """Async context manager issuing GET url and yielding the response.
+
+        Error statuses and connection failures raise TransportError.
+        """
+
+
+class _AiohttpResponse(TransportResponse):
+    def __init__(self, response: aiohttp.ClientResponse):
+        self._response = response
+        self.status = response.status
+        self.headers = response.headers
+
+    @property
+    def charset(self) -> str | None:
+        return self._response.charset
+
+    def iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        return self._response.content.iter_chunked(chunk_size)
+
+    async def read(self) -> bytes:
+        return await self._response.read()
+
+    async def text(self) -> str:
+        return await self._response.text()
+
+
+class AiohttpTransport(Transport):
+    """HTTP/1.1 transport on aiohttp, one connection per concurrent request."""
+
+    def __init__(self):
+        self._session: aiohttp.ClientSession | None = None
+
+    async def open(self) -> None:
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=config.REQUEST_TIMEOUT),
+            headers={"User-Agent": config.USER_AGENT},
+            trace_configs=[self._trace_config()] if tracing_enabled() else None,
+        )
+
+    @staticmethod
+    def _trace_config() -> aiohttp.TraceConfig:
+        """Report connection setup time to the request's trace span."""
+
+        async def on_create_start(session, context, params):
+            context.connect_started = time.perf_counter()
+
+        async def on_create_end(session, context, params):
+            connect_ms = (time.perf_counter() - context.connect_started) * 1000
+            set_attributes(connection="new", connect_ms=round(connect_ms, 3))
+
+        async def on_reuse(session, context, params):
+            set_attributes(connection="reused")
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_start.append(on_create_start)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+
+    async def close(self) -> None:
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    @asynccontextmanager
+    async def stream(self, url: str) -> AsyncIterator[TransportResponse]:
+        try:
+            async with self._session.get(url) as response:
+                if response.status >= 400:
+                    raise TransportError(
+                        f"HTTP {response.status} {response.reason} for {url}",
+                        response.status,
+                    )
+                yield _AiohttpResponse(response)
+        except aiohttp.ClientError as e:
+            raise TransportError(f"Request to {url} failed: {e}") from e
+
+
+class _HttpxResponse(TransportResponse):
+    def __init__(self, response: httpx.Response):
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+
+    @property
+    def charset(self) -> str | None:
+        return self._response.charset_encoding
+
+    def iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        return self._response.aiter_bytes(chunk_size)
+
+    async def read(self) -> bytes:
+        return await self._response.aread()
+
+    async def text(self) -> str:
+        await self._response.aread()
+        return self._response.text
+
+
+class HttpxTransport(Transport):
+    """Transport on httpx with optional HTTP/2.
+
+    Over HTTP/2 concurrent requests are multiplexed on one connection per
+    host instead of opening a TCP (and TLS) connection for each.
+
+    Args:
+        http2: Negotiate HTTP/2 (requires the h2 package)
+        http1: Allow HTTP/1.1; with http1=False plain http URLs use HTTP/2
+            prior knowledge
+    """
+
+    def __init__(self, http2: bool = False, http1: bool = True):
+        if http2 and find_spec("h2") is None:
+            raise ValueError(
+                "HTTP/2 requires the h2 package: pip install 'httpx[http2]'"
+            )
+        self.http2 = http2
+        self.http1 = http1
+        self._client: httpx.AsyncClient | None = None
+
+    async def open(self) -> None:
+        self._client = httpx.AsyncClient(
+            http1=self.http1,
+            http2=self.http2,
+            timeout=config.REQUEST_TIMEOUT,
+            headers={"User-Agent": config.USER_AGENT},
+            follow_redirects=True,
+            # Keep as many idle connections as aiohttp does by default
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+        )
+
+    async def close(self) -> None:
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    @asynccontextmanager
+    async def stream(self, url: str) -> AsyncIterator[TransportResponse]:
+        extensions = {"trace": _httpx_trace()} if tracing_enabled() else None
+        try:
+            async with self._client.stream(
+                "GET", url, extensions=extensions
+            ) as response:
+                if response.status_code >= 400:
+                    raise TransportError(
+                        f"HTTP {response.status_code} {response.reason_phrase} "
+                        f"for {url}",
+                        response.status_code,
+                    )
+                yield _HttpxResponse(response)
+        except httpx.HTTPError as e:
+            raise TransportError(f"Request to {url} failed: {e}") from e
+
+
+def _httpx_trace():
+    """httpcore trace hook reporting connection setup to the trace span."""
+    started = {}
+
+    async def trace(event: str, info: dict) -> None:
+        step, _, phase = event.rpartition(".")
+        if step not in ("connection.connect_tcp", "connection.start_tls"):
+            return
+        if phase == "started":
+            started[step] = time.perf_counter()
+        elif phase == "complete" and step in started:
+            elapsed = (time.perf_counter() - started[step]) * 1000
+            name = "connect_ms" if step.endswith("tcp") else "tls_ms"
+            set_attributes(connection="new", **{name: round(elapsed, 3)})
+
+    return trace
+
+
+def create_transport(name: str | None = None, http2: bool | None = None) -> Transport:
+    """Create transport by name, defaulting to config."""
+    name = name or config.HTTP_TRANSPORT
+    if name == "aiohttp":
+        return AiohttpTransport()
+    if name == "httpx":
+        return HttpxTransport(http2=config.HTTP2 if http2 is None else http2)
+    raise ValueError(
+        f"Unknown HTTP transport: {name}. "
+        f"Available transports: {', '.join(TRANSPORTS)}"
+    )
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import re
+from contextlib import aclosing
+from pathlib import Path
+
+from models import AuthorUpdates, Book
+
+from . import progress
+from .client import FlibustaClient
+from .deadline import DeadlineExceeded
+from .parser import FlibustaParser, date_key
+
+DATE_HEADER = re.compile(r"<h4>\s*(\d{2})\.(\d{2})\.(\d{4})\s*</h4>")
+
+
+class WatermarkStore:
+    """Per-author watermarks persisted in one JSON file.
+
+    A watermark holds the newest seen "date", its top "book_id" and
+    "seen_ids", the IDs already reported for that date.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._data: dict[str, dict] | None = None
+
+    def _load(self) -> dict[str, dict]:
+        if self._data is None:
+            try:
+                self._data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, author_id: str) -> dict | None:
+        return self._load().get(author_id)
+
+    def set(self, author_id: str, watermark: dict) -> None:
+        self._load()[author_id] = watermark
+
+    def save(self) -> None:
+        """Write watermarks atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps(self._load(), ensure_ascii=False), encoding="utf-8"
+        )
+        os.replace(tmp_path, self.path)
+
+
+class NewBooksWatcher:
+    """Detects books added to authors since the last check.
+
+    The date-sorted author page lists newest books first, so the page is
+    streamed only until the first date older than the author's watermark;
+    the rest is neither downloaded nor parsed.
+    """
+
+    def __init__(
+        self,
+        client: FlibustaClient,
+        parser: FlibustaParser,
+        store: WatermarkStore,
+        concurrency: int = 8,
+    ):
+        self.client = client
+        self.parser = parser
+        self.store = store
+        self.concurrency = concurrency
+        self.stats = {"authors_checked": 0, "chars_read": 0, "early_stops": 0}
+
+    async def check_new_books(self, author_ids: list[str]) -> list[AuthorUpdates]:
+        """Check many authors concurrently and persist new watermarks.
+
+        Authors not checked before the call deadline are returned as partial.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        author_ids = list(dict.fromkeys(author_ids))
+        done = 0
+        progress.start_batch(len(author_ids))
+
+        async def check(author_id: str) -> AuthorUpdates:
+            nonlocal done
+            async with semaphore:
+                try:
+                    result = await self.check_author(author_id)
+                except DeadlineExceeded:
+                    result = AuthorUpdates(author_id=author_id, partial=True)
+                except Exception as e:
+                    result = AuthorUpdates(author_id=author_id, error=str(e))
+            # Stream each author's result as soon as it is known
+            done += 1
+            await progress.partial(result.model_dump(), done)
+            return result
+
+        # A tool call waits for the checks, so they run at interactive
+        # priority and only the watcher's own concurrency bounds them
+        results = await asyncio.gather(*[check(a) for a in author_ids])
+        await asyncio.to_thread(self.store.save)
+        return list(results)
+
+    async def check_author(self, author_id: str) -> AuthorUpdates:
+        """Return books added since the stored watermark and advance it.
+
+        The first check only records the watermark from the newest date group.
+        """
+        watermark = self.store.get(author_id)
+        self.stats["authors_checked"] += 1
+
+        if watermark is None:
+            html = await self._read_until(author_id, first_group_only=True)
+            books = self.parser.parse_author_books_since(html)
+            self._advance(author_id, books, None)
+            return AuthorUpdates(author_id=author_id, initialized=True)
+
+        since_date = watermark.get("date")
+        html = await self._read_until(author_id, since_date=since_date)
+        books = self.parser.parse_author_books_since(
+            html, since_date, set(watermark.get("seen_ids", []))
+        )
+        if books:
+            self._advance(author_id, books, watermark)
+        return AuthorUpdates(author_id=author_id, new_books=books)
+
+    def _advance(
+        self, author_id: str, books: list[Book], watermark: dict | None
+    ) -> None:
+        """Move watermark to the newest date among books."""
+        newest = books[0].added_date if books else None
+        seen_ids = [book.id for book in books if book.added_date == newest]
+        if watermark and watermark.get("date") == newest:
+            seen_ids = watermark.get("seen_ids", []) + seen_ids
+        self.store.set(
+            author_id,
+            {
+                "date": newest,
+                "book_id": books[0].id if books else None,
+                "seen_ids": seen_ids,
+            },
+        )
+
+    async def _read_until(
+        self,
+        author_id: str,
+        since_date: str | None = None,
+        first_group_only: bool = False,
+    ) -> str:
+        """Read date-sorted author page up to the cutoff.
+
+        Reading stops at the first date header older than since_date, or
+        after the newest date group with first_group_only.
+        """
+        since_key = date_key(since_date) if since_date else None
+        parts: list[str] = []
+        length = 0
+        tail = ""
+        headers_seen = 0
+
+        pages = self.client.iter_author_books_page(author_id, order="date")
+        async with aclosing(pages) as chunks:
+            async for chunk in chunks:
+                window = tail + chunk
+                offset = length - len(tail)
+                parts.append(chunk)
+                length += len(chunk)
+
+                for match in DATE_HEADER.finditer(window):
+                    # Matches inside the overlap were checked with the last chunk
+                    if match.end() <= len(tail):
+                        continue
+                    headers_seen += 1
+                    day, month, year = match.groups()
+                    key = (int(year), int(month), int(day))
+                    if (first_group_only and headers_seen == 2) or (
+                        since_key and key < since_key
+                    ):
+                        self.stats["chars_read"] += length
+                        self.stats["early_stops"] += 1
+                        return "".join(parts)[: offset + match.start()]
+
+                tail = window[-64:]
+
+        self.stats["chars_read"] += length
+        return "".join(parts)
@@ -0,0 +1,398 @@
+"""Local stand-in for the Flibusta website.
+
+Serves the ``test_data`` fixtures plus synthetic pages and files so the whole
+client/service/tool path can be exercised without network access.
+"""
+
+import asyncio
+import random
+import re
+from collections import Counter
+from pathlib import Path
+from typing import AsyncIterator, Mapping
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+
+FIXTURE_AUTHOR_ID = "5803"
+FIXTURE_BOOK_ID = "727250"
+
+ROUTES = [
+    ("search", re.compile(r"/booksearch")),
+    ("author", re.compile(r"/a/(\d+)")),
+    ("series", re.compile(r"/s/(\d+)")),
+    ("book", re.compile(r"/b/(\d+)")),
+    ("download", re.compile(r"/b/(\d+)/([^/]+)")),
+]
+
+
+class StubFlibustaServer:
+    """aiohttp server imitating Flibusta routes.
+
+    With http2 the same routes are served over cleartext HTTP/2 with prior
+    knowledge (requires the h2 package) instead of HTTP/1.1.
+
+    Args:
+        latency: Seconds to wait before answering each request
+        bandwidth: Maximum bytes per second for response bodies (None = unlimited)
+        error_rate: Probability of answering with HTTP 503
+        file_size: Size of synthetic downloadable files in bytes
+        synthetic_books: Number of books on synthetic author and series pages
+        seed: Random seed for error injection
+        http2: Serve HTTP/2 instead of HTTP/1.1
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        bandwidth: int | None = None,
+        error_rate: float = 0.0,
+        file_size: int = 256 * 1024,
+        synthetic_books: int = 20,
+        seed: int | None = None,
+        http2: bool = False,
+    ):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.file_size = file_size
+        self.synthetic_books = synthetic_books
+        self.random = random.Random(seed)  # noqa: S311
+        self.http2 = http2
+        self.requests: Counter[str] = Counter()
+        # Client addresses of accepted connections
+        self.connections: set[tuple] = set()
+        # Custom download payloads by book ID: (body, filename)
+        self.files: dict[str, tuple[bytes, str]] = {}
+        # Paths answered with 404, e.g. "/b/123/epub" (counted as "missing")
+        self.missing: set[str] = set()
+        # Sub-series shown on synthetic series pages: parent ID -> child IDs
+        self.series_tree: dict[str, list[str]] = {}
+        # Custom page bodies by path, e.g. "/s/7" (counted as "page")
+        self.pages: dict[str, bytes] = {}
+        # Paths whose body is sent chunked, without Content-Length
+        self.unsized: set[str] = set()
+        self._fixtures: dict[str, bytes] = {}
+        self._runner: web.AppRunner | None = None
+        self._server: asyncio.Server | None = None
+        self._protocols: set[_Http2Protocol] = set()
+        self.base_url = ""
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return base URL."""
+        if self.http2:
+            return await self._start_http2(host, port)
+
+        app = web.Application()
+        app.router.add_get("/{path:.*}", self._handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def _start_http2(self, host: str, port: int) -> str:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(
+            lambda: _Http2Protocol(self), host, port
+        )
+        port = self._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def close(self):
+        """Stop serving."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._server:
+            self._server.close()
+            for protocol in list(self._protocols):
+                protocol.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def fixture(self, name: str) -> bytes:
+        """Read fixture file from test_data once."""
+        if name not in self._fixtures:
+            self._fixtures[name] = (TEST_DATA / name).read_bytes()
+        return self._fixtures[name]
+
+    def synthetic_file(self, book_id: str) -> bytes:
+        """Deterministic file body of ``file_size`` bytes."""
+        pattern = f"<p>Книга {book_id}. Синтетический текст.</p>\n".encode()
+        repeats = self.file_size // len(pattern) + 1
+        return (pattern * repeats)[: self.file_size]
+
+    def resolve(
+        self, path: str, query: Mapping[str, str]
+    ) -> tuple[str, bytes, str, dict[str, str]] | None:
+        """Map request to (route, body, content type, headers), None if unknown."""
+        if path in self.missing:
+            self.requests["missing"] += 1
+            return None
+        if path in self.pages:
+            return "page", self.pages[path], "text/html", {}
+        for route, pattern in ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                return getattr(self, f"_{route}_reply")(query, *match.groups())
+        return None
+
+    async def _admit(self, route: str) -> bool:
+        """Count request and apply latency; False means answer with 503."""
+        self.requests[route] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        return not (self.error_rate and self.random.random() < self.error_rate)
+
+    async def _body_chunks(self, body: bytes) -> AsyncIterator[bytes]:
+        """Split body into chunks applying the bandwidth cap."""
+        chunk_size = 64 * 1024
+        for start in range(0, len(body), chunk_size):
+            chunk = body[start : start + chunk_size]
+            yield chunk
+            if self.bandwidth:
+                await asyncio.sleep(len(chunk) / self.bandwidth)
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """Serve any route over HTTP/1.1."""
+        self.connections.add(request.transport.get_extra_info("peername"))
+        reply = self.resolve(request.path, request.query)
+        if reply is None:
+            raise web.HTTPNotFound()
+        route, body, content_type, headers = reply
+
+        if not await self._admit(route):
+            return web.Response(status=503, text="Service Unavailable")
+
+        response = web.StreamResponse(headers=headers)
+        response.content_type = content_type
+        if content_type.startswith("text/"):
+            response.charset = "utf-8"
+        if request.path in self.unsized:
+            response.enable_chunked_encoding()
+        else:
+            response.content_length = len(body)
+        await response.prepare(request)
+
+        async for chunk in self._body_chunks(body):
+            await response.write(chunk)
+
+        await response.write_eof()
+        return response
+
+    def _search_reply(self, query):
+        return "search", self.fixture("search_stiven_king.html"), "text/html", {}
+
+    def _author_reply(self, query, author_id):
+        if author_id == FIXTURE_AUTHOR_ID:
+            if query.get("order") == "t":
+                body = self.fixture("author_5803_by_date.html")
+            else:
+                body = self.fixture("author_5803_default.html")
+        else:
+            body = self._synthetic_author_page(author_id).encode()
+        return "author", body, "text/html", {}
+
+    def _series_reply(self, query, series_id):
+        body = self._synthetic_series_page(series_id).encode()
+        return "series", body, "text/html", {}
+
+    def _book_reply(self, query, book_id):
+        if book_id == FIXTURE_BOOK_ID:
+            body = self.fixture("book_727250.html")
+        else:
+            body = self._synthetic_book_page(book_id).encode()
+        return "book", body, "text/html", {}
+
+    def _download_reply(self, query, book_id, fmt):
+        if fmt not in ("epub", "fb2", "mobi", "download"):
+            return None
+
+        if book_id in self.files:
+            body, filename = self.files[book_id]
+        else:
+            body = self.synthetic_file(book_id)
+            filename = f"book_{book_id}.{'epub' if fmt == 'download' else fmt}"
+
+        headers = {"Content-Disposition": f"attachment; filename={filename}"}
+        return "download", body, "application/octet-stream", headers
+
+    def _book_entry(self, book_id: int, series_id: str | None = None) -> str:
+        series = (
+            f'(<a href="/s/{series_id}"><span class="h8">Серия {series_id}</span></a>)'
+            if series_id
+            else ""
+        )
+        return (
+            f'<input type="checkbox"> - <a href="/b/{book_id}">Книга {book_id}</a> '
+            f"({1970 + book_id % 50}) {series} "
+            f'<span style=size>1024K, 300 с.</span> <a href="/b/{book_id}/read">'
+            f'(читать)</a> скачать: <a href="/b/{book_id}/fb2">(fb2)</a> - '
+            f'<a href="/b/{book_id}/epub">(epub)</a>'
+        )
+
+    def _synthetic_author_page(self, author_id: str) -> str:
+        base = int(author_id) * 1000
+        entries = "<br>\n".join(
+            self._book_entry(base + i) for i in range(self.synthetic_books)
+        )
+        return (
+            f'<html><body><div id="main"><h1 class="title">Автор {author_id}</h1>'
+            f'<form method="POST" action="/a/{author_id}">'
+            f'<a href="/s/{author_id}"><span class="h8">Серия {author_id}</span></a>'
+            f"<br>\n{entries}<br>\n</form></div></body></html>"
+        )
+
+    def _synthetic_series_page(self, series_id: str) -> str:
+        base = int(series_id) * 1000
+        entries = "<br>\n".join(
+            self._book_entry(base + i, series_id) for i in range(self.synthetic_books)
+        )
+        subseries = "".join(
+            f'<a href="/s/{series_id}"><span class="h8">Серия {series_id}</span></a> '
+            f'<b>&#8614;</b> <a href="/s/{child_id}"><span class="h8">'
+            f"Серия {child_id}</span></a><br>\n"
+            for child_id in self.series_tree.get(series_id, [])
+        )
+        return (
+            f'<html><body><div id="main"><h1 class="title">Серия {series_id}</h1>'
+            f"<form>{entries}<br>\n{subseries}</form></div></body></html>"
+        )
+
+    def _synthetic_book_page(self, book_id: str) -> str:
+        return (
+            '<html><body><div id="main">'
+            f'<script type="text/javascript">var bookId = {book_id}</script>'
+            f'<h1 class="title">Книга {book_id} (fb2)</h1>'
+            '<a href="/a/1">Автор 1</a> &nbsp; издание 2020 г. &nbsp;'
+            f"<h2>Аннотация</h2><p>Описание книги {book_id}.</p>"
+            "</div></body></html>"
+        )
+
+
+class _Http2Protocol(asyncio.Protocol):
+    """Minimal HTTP/2 server connection for StubFlibustaServer."""
+
+    def __init__(self, server: StubFlibustaServer):
+        import h2.config
+        import h2.connection
+
+        self.server = server
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        self.transport: asyncio.Transport | None = None
+        self._window_open = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        self.server._protocols.add(self)
+        self.server.connections.add(transport.get_extra_info("peername"))
+        self.conn.initiate_connection()
+        self._flush()
+
+    def connection_lost(self, exc):
+        self.server._protocols.discard(self)
+        for task in self._tasks:
+            task.cancel()
+        self._window_open.set()
+
+    def close(self):
+        if self.transport:
+            self.transport.close()
+
+    def data_received(self, data: bytes):
+        import h2.events
+        import h2.exceptions
+
+        try:
+            events = self.conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self._flush()
+            self.close()
+            return
+
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                task = asyncio.create_task(
+                    self._serve(event.stream_id, dict(event.headers))
+                )
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            elif isinstance(event, h2.events.WindowUpdated):
+                self._window_open.set()
+        self._flush()
+
+    def _flush(self):
+        data = self.conn.data_to_send()
+        if data and self.transport and not self.transport.is_closing():
+            self.transport.write(data)
+
+    async def _serve(self, stream_id: int, headers: dict[str, str]):
+        path, _, query_string = headers[":path"].partition("?")
+        reply = self.server.resolve(path, dict(parse_qsl(query_string)))
+        if reply is None:
+            self._send_status(stream_id, 404, b"Not Found")
+            return
+        route, body, content_type, extra_headers = reply
+
+        if not await self.server._admit(route):
+            self._send_status(stream_id, 503, b"Service Unavailable")
+            return
+
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        response_headers = [
+            (":status", "200"),
+            ("content-type", content_type),
+            ("content-length", str(len(body))),
+        ] + [(name.lower(), value) for name, value in extra_headers.items()]
+        self.conn.send_headers(stream_id, response_headers)
+        self._flush()
+
+        async for chunk in self.server._body_chunks(body):
+            await self._send_data(stream_id, chunk)
+        self.conn.end_stream(stream_id)
+        self._flush()
+
+    def _send_status(self, stream_id: int, status: int, body: bytes):
+        self.conn.send_headers(
+            stream_id,
+            [(":status", str(status)), ("content-length", str(len(body)))],
+        )
+        self.conn.send_data(stream_id, body, end_stream=True)
+        self._flush()
+
+    async def _send_data(self, stream_id: int, data: bytes):
+        """Send data respecting HTTP/2 flow control windows."""
+        while data:
+            window = min(
+                self.conn.local_flow_control_window(stream_id),
+                self.conn.max_outbound_frame_size,
+            )
+            if window <= 0:
+                self._window_open.clear()
+                await self._window_open.wait()
+                if self.transport.is_closing():
+                    return
+                continue
+            self.conn.send_data(stream_id, data[:window])
+            self._flush()
+            data = data[window:]
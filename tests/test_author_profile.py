@@ -0,0 +1,78 @@
+"""Tests for the parse-once author profile."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import flibusta_mcp
+from services.cache import FileCacheBackend, ResultCache
+from services.client import FlibustaClient
+from services.parser import FlibustaParser, date_key
+from services.service import FlibustaService
+from tests.stub_server import StubFlibustaServer
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+
+
+def test_parse_author_profile():
+    parser = FlibustaParser()
+    html = (TEST_DATA / "author_5803_default.html").read_text(encoding="utf-8")
+
+    with patch.object(parser, "_soup", wraps=parser._soup):
+        profile = parser.parse_author_profile(html, "5803")
+        assert parser._soup.call_count == 1
+
+    assert profile.id == "5803"
+    assert profile.name == "Стивен Кинг"
+    assert profile.books == parser.parse_author_books(html)
+    assert profile.series == parser.parse_author_series(html)
+    assert profile.series_headers == parser.parse_series_hierarchy(html)
+
+    books = {book.id: book for book in profile.books}
+    assert {s["id"] for s in profile.series} >= set(profile.series_books)
+    for series_id, book_ids in profile.series_books.items():
+        assert {books[book_id].series_id for book_id in book_ids} == {series_id}
+
+
+@pytest.mark.asyncio
+async def test_author_tools_share_one_fetch_and_parse(tmp_path, monkeypatch):
+    async with StubFlibustaServer() as server:
+        parser = FlibustaParser()
+        service = FlibustaService(
+            FlibustaClient(server.base_url),
+            parser,
+            cache=ResultCache(FileCacheBackend(tmp_path)),
+        )
+        monkeypatch.setattr(flibusta_mcp, "service", service)
+
+        with patch.object(parser, "_soup", wraps=parser._soup):
+            _, profile = await flibusta_mcp.mcp.call_tool(
+                "get_author_profile", {"author_id": "5803"}
+            )
+            books = await service.search_books_by_author("5803", books_limit=1000)
+            series = await service.get_author_series("5803")
+            await service.get_series_tree(author_id="5803", max_depth=0)
+
+            # The series tree parses series pages, not the author page again
+            assert server.requests["author"] == 1
+            assert parser._soup.call_count == 1 + server.requests["series"]
+
+    assert profile["name"] == "Стивен Кинг"
+    assert [book["id"] for book in profile["books"]] == [book.id for book in books]
+    assert profile["series"] == series
+
+
+@pytest.mark.asyncio
+async def test_books_by_author_sorted_by_added_date():
+    async with StubFlibustaServer() as server:
+        service = FlibustaService(FlibustaClient(server.base_url), FlibustaParser())
+        async with service.call():
+            books = await service.search_books_by_author(
+                "5803", books_limit=1000, sort_by="date"
+            )
+
+    keys = [date_key(book.added_date) for book in books]
+    assert keys == sorted(keys, reverse=True)
+    # The page spans years, so day-first strings would sort differently
+    assert len({key[0] for key in keys}) > 1
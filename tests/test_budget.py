@@ -0,0 +1,164 @@
+"""Tests for response size caps and the in-flight byte budget."""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from config import config
+from services.budget import ByteBudget
+from services.client import FlibustaClient
+from services.scheduler import RequestScheduler, request_priority
+from services.transport import BodyTooLarge
+from tests.stub_server import StubFlibustaServer
+
+MB = 1024 * 1024
+
+
+class PeakRss:
+    """Samples resident memory from a thread while the block runs."""
+
+    def __enter__(self):
+        self.base = self.peak = self.rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    @staticmethod
+    def rss() -> int:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.rss())
+            time.sleep(0.001)
+
+    @property
+    def growth(self) -> int:
+        return self.peak - self.base
+
+
+@pytest.mark.asyncio
+async def test_oversized_pages_are_aborted():
+    async with StubFlibustaServer() as server:
+        server.pages["/s/1"] = b"x" * (2 * MB)
+        server.pages["/s/2"] = b"x" * (2 * MB)
+        server.unsized.add("/s/2")
+        server.pages["/s/3"] = b"x" * MB
+
+        caps = {"series": MB + 1, "page": 0}
+        async with FlibustaClient(server.base_url, max_body_sizes=caps) as client:
+            # Declared length fails before the body is read
+            with pytest.raises(BodyTooLarge, match="declares"):
+                await client.get_series_page("1", raw=True)
+            # Without Content-Length the read stops at the cap
+            with pytest.raises(BodyTooLarge, match="exceeds"):
+                await client.get_series_page("2")
+            body, _ = await client.get_series_page("3", raw=True)
+            assert len(body) == MB
+
+        assert client.budget.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_download_cap_falls_through_routes(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DOWNLOAD_DIR", tmp_path)
+
+    async with StubFlibustaServer(file_size=2 * MB) as server:
+        caps = {"download": MB}
+        async with FlibustaClient(server.base_url, max_body_sizes=caps) as client:
+            with pytest.raises(Exception, match="Failed to download"):
+                await client.try_download_book("5")
+
+
+@pytest.mark.asyncio
+async def test_oldest_read_proceeds_past_budget():
+    budget = ByteBudget(limit=100, reserve=10)
+    first_done = asyncio.Event()
+
+    async def read(chunks, done=None):
+        async with budget.admit() as lease:
+            for size in chunks:
+                await lease.add(size)
+            if done is not None:
+                await done.wait()
+
+    first = asyncio.create_task(read([150], first_done))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(read([50]))
+    await asyncio.sleep(0.01)
+    # The oldest read went past the budget, the next one waits for room
+    assert not second.done()
+
+    first_done.set()
+    await asyncio.wait_for(asyncio.gather(first, second), 1)
+
+    assert budget.in_flight == 0
+    assert budget.stats["waited"] == 1
+    assert budget.stats["peak_bytes"] >= 150
+
+
+@pytest.mark.asyncio
+async def test_queued_background_fetch_does_not_block_readers():
+    async with StubFlibustaServer() as server:
+        for series_id in "123":
+            server.pages[f"/s/{series_id}"] = b"x" * (256 * 1024)
+        client = FlibustaClient(
+            server.base_url,
+            scheduler=RequestScheduler(max_concurrency=1),
+            budget=ByteBudget(limit=256 * 1024),
+        )
+
+        async def background(series_id):
+            with request_priority("background"):
+                return await client.get_series_page(series_id, raw=True)
+
+        async with client:
+            # The background fetch queues for the slot behind the first
+            # interactive one; the second interactive one overtakes it
+            pages = await asyncio.wait_for(
+                asyncio.gather(
+                    client.get_series_page("1", raw=True),
+                    background("2"),
+                    client.get_series_page("3", raw=True),
+                ),
+                5,
+            )
+
+    assert [len(body) for body, _ in pages] == [256 * 1024] * 3
+    assert client.budget.in_flight == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+async def test_peak_rss_under_concurrent_large_pages():
+    page_size = 8 * MB
+    limit = 8 * MB
+
+    async with StubFlibustaServer() as server:
+        server.pages["/s/1"] = b"x" * page_size
+        client = FlibustaClient(server.base_url, budget=ByteBudget(limit))
+
+        async def fetch():
+            body, _ = await client.get_series_page("1", raw=True)
+            return len(body)
+
+        async with client:
+            await fetch()
+            with PeakRss() as rss:
+                sizes = await asyncio.gather(*[fetch() for _ in range(16)])
+
+    assert sizes == [page_size] * 16
+    # Without the budget the 8 concurrent requests hold 64 MB of bodies
+    assert rss.growth < 48 * MB
+    # The oldest body and its joined copy may exceed the budget
+    assert client.budget.stats["peak_bytes"] <= limit + 2 * page_size + MB
+    assert client.budget.stats["paused"] > 0
@@ -0,0 +1,281 @@
+"""Tests for parsed results cache."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from models import Book
+from services.cache import (
+    FileCacheBackend,
+    ResultCache,
+    SqliteCacheBackend,
+    create_cache_backend,
+)
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+
+
+def make_loader(results):
+    """Loader returning successive results and counting calls."""
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return results[min(len(calls), len(results)) - 1]
+
+    return loader, calls
+
+
+BOOKS_V1 = [Book(id="1", title="Сияние", authors=["Стивен Кинг"])]
+BOOKS_V2 = [Book(id="1", title="Сияние (новая редакция)", authors=["Стивен Кинг"])]
+
+
+@pytest.mark.asyncio
+async def test_fresh_entry_is_served_from_cache(tmp_path):
+    """Second call within TTL does not run the loader."""
+    cache = ResultCache(FileCacheBackend(tmp_path), ttl=60)
+    loader, calls = make_loader([BOOKS_V1])
+
+    first = await cache.get_or_load("series_books", {"id": "1"}, list[Book], loader)
+    second = await cache.get_or_load("series_books", {"id": "1"}, list[Book], loader)
+
+    assert first == second == BOOKS_V1
+    assert len(calls) == 1
+    assert cache.stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_entries_persist_across_instances(tmp_path):
+    """A new cache over the same directory serves stored results."""
+    loader, calls = make_loader([BOOKS_V1])
+    await ResultCache(FileCacheBackend(tmp_path)).get_or_load(
+        "series_books", {"id": "1"}, list[Book], loader
+    )
+
+    restarted = ResultCache(FileCacheBackend(tmp_path))
+    books = await restarted.get_or_load(
+        "series_books", {"id": "1"}, list[Book], loader
+    )
+
+    assert books == BOOKS_V1
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("raw", [True, False])
+def test_backend_formats_round_trip(tmp_path, raw):
+    """Raw files keep payload bytes verbatim after the store time."""
+    backend = FileCacheBackend(tmp_path, raw=raw)
+    payload = '[{"title":"Сияние"}]'.encode()
+
+    backend.set("key", 1000.5, payload)
+
+    assert backend.get("key") == (1000.5, payload)
+    assert backend.get("missing") is None
+    if raw:
+        assert (tmp_path / "key.bin").read_bytes()[8:] == payload
+
+
+def test_backend_ignores_truncated_raw_file(tmp_path):
+    (tmp_path / "key.bin").write_bytes(b"\x00\x01")
+
+    assert FileCacheBackend(tmp_path).get("key") is None
+
+
+class BrokenBackend:
+    """Backend whose storage fails on every access."""
+
+    def get(self, key):
+        raise NotADirectoryError(key)
+
+    def set(self, key, stored_at, payload):
+        raise FileExistsError(key)
+
+
+@pytest.mark.asyncio
+async def test_storage_failures_do_not_fail_calls():
+    cache = ResultCache(BrokenBackend(), memory_size=0)
+    loader, calls = make_loader([BOOKS_V1])
+
+    for _ in range(2):
+        books = await cache.get_or_load("series_books", {"id": "1"}, list[Book], loader)
+        assert books == BOOKS_V1
+
+    assert len(calls) == 2
+    assert cache.stats["read_errors"] == 2
+    assert cache.stats["write_errors"] == 2
+
+
+def test_file_backend_over_a_file(tmp_path):
+    (tmp_path / "results").write_bytes(b"")
+    backend = FileCacheBackend(tmp_path / "results")
+
+    assert backend.get("key") is None
+    with pytest.raises(FileExistsError):
+        backend.set("key", 1000.0, b"[]")
+
+
+def test_sqlite_backend_is_shared_between_connections(tmp_path):
+    """Separate backends over one database see each other's entries."""
+    writer = SqliteCacheBackend(tmp_path / "cache.sqlite3")
+    reader = SqliteCacheBackend(tmp_path / "cache.sqlite3")
+    payload = '[{"title":"Сияние"}]'.encode()
+
+    assert reader.get("key") is None
+    writer.set("key", 1000.5, payload)
+    assert reader.get("key") == (1000.5, payload)
+
+    writer.set("key", 2000.0, b"[]")
+    assert reader.get("key") == (2000.0, b"[]")
+    assert reader.size == 2
+
+
+@pytest.mark.parametrize("name", ["cache/results.sqlite3", "results.sqlite3"])
+def test_sqlite_backend_that_cannot_open(tmp_path, name):
+    """A file in place of the directory, or a non-database file, reads empty."""
+    (tmp_path / "cache").write_bytes(b"")
+    (tmp_path / "results.sqlite3").write_bytes(b"not a database" * 100)
+    backend = SqliteCacheBackend(tmp_path / name)
+
+    backend.set("key", 1000.0, b"[]")
+    assert backend.get("key") is None
+    assert backend.size == 0
+    assert backend.stats["open_errors"] == 3
+
+
+def test_sqlite_backend_evicts_least_recently_read(tmp_path, monkeypatch):
+    """Over the size limit, entries read longest ago are dropped first."""
+    backend = SqliteCacheBackend(
+        tmp_path / "cache.sqlite3", max_bytes=1000, low_watermark=0.6
+    )
+    clock = iter(range(0, 10_000, 100))
+    monkeypatch.setattr("services.cache.time.time", lambda: float(next(clock)))
+
+    for key in ("a", "b", "c"):
+        backend.set(key, 0.0, b"x" * 300)
+    # Reading "a" makes "b" the least recently used entry
+    assert backend.get("a") is not None
+    backend.set("d", 0.0, b"x" * 300)
+
+    assert backend.get("b") is None
+    assert backend.get("c") is None
+    assert backend.get("a") is not None
+    assert backend.get("d") is not None
+    assert backend.size == 600
+    assert backend.stats["evictions"] == 2
+
+
+def test_create_cache_backend(tmp_path):
+    assert isinstance(create_cache_backend("file", tmp_path), FileCacheBackend)
+    sqlite = create_cache_backend("sqlite", tmp_path)
+    assert sqlite.path == tmp_path / "results.sqlite3"
+
+    with pytest.raises(ValueError, match="Unknown cache backend"):
+        create_cache_backend("redis", tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_parser_version_change_invalidates(tmp_path):
+    """Entries stored by another parser version are not served."""
+    loader, calls = make_loader([BOOKS_V1, BOOKS_V2])
+    await ResultCache(FileCacheBackend(tmp_path), version="old").get_or_load(
+        "series_books", {"id": "1"}, list[Book], loader
+    )
+
+    books = await ResultCache(FileCacheBackend(tmp_path), version="new").get_or_load(
+        "series_books", {"id": "1"}, list[Book], loader
+    )
+
+    assert books == BOOKS_V2
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_refreshing(tmp_path):
+    """Stale entry is returned immediately and refreshed in background."""
+    cache = ResultCache(FileCacheBackend(tmp_path), ttl=10, stale_ttl=100)
+    loader, calls = make_loader([BOOKS_V1, BOOKS_V2])
+
+    with patch("services.cache.time.time", return_value=1000.0):
+        await cache.get_or_load("series_books", {"id": "1"}, list[Book], loader)
+
+    with patch("services.cache.time.time", return_value=1050.0):
+        stale = await cache.get_or_load(
+            "series_books", {"id": "1"}, list[Book], loader
+        )
+        assert stale == BOOKS_V1
+        await cache.wait_for_refreshes()
+        fresh = await cache.get_or_load(
+            "series_books", {"id": "1"}, list[Book], loader
+        )
+
+    assert fresh == BOOKS_V2
+    assert len(calls) == 2
+    assert cache.stats["stale_hits"] == 1
+    assert cache.stats["refreshes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_reloaded(tmp_path):
+    """Entries older than ttl + stale_ttl are loaded synchronously."""
+    cache = ResultCache(FileCacheBackend(tmp_path), ttl=10, stale_ttl=10)
+    loader, calls = make_loader([BOOKS_V1, BOOKS_V2])
+
+    with patch("services.cache.time.time", return_value=1000.0):
+        await cache.get_or_load("series_books", {"id": "1"}, list[Book], loader)
+    with patch("services.cache.time.time", return_value=1100.0):
+        books = await cache.get_or_load(
+            "series_books", {"id": "1"}, list[Book], loader
+        )
+
+    assert books == BOOKS_V2
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    """Concurrent calls for the same key run the loader once."""
+    cache = ResultCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return BOOKS_V1
+
+    results = await asyncio.gather(
+        *[
+            cache.get_or_load("series_books", {"id": "1"}, list[Book], loader)
+            for _ in range(5)
+        ]
+    )
+
+    assert all(books == BOOKS_V1 for books in results)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_service_caches_parsed_results(tmp_path):
+    """Service serves repeat calls without fetching or parsing again."""
+    client = FlibustaClient()
+    client.get_series_page = AsyncMock(
+        return_value=(
+            '<div><a href="/b/417291">Сияние</a> (1977)</div>'.encode(),
+            "utf-8",
+        )
+    )
+    parser = FlibustaParser()
+    service = FlibustaService(
+        client, parser, cache=ResultCache(FileCacheBackend(tmp_path))
+    )
+
+    with patch.object(parser, "parse_series_page", wraps=parser.parse_series_page):
+        first = await service.get_series_books("33189")
+        second = await service.get_series_books("33189")
+
+        assert parser.parse_series_page.call_count == 1
+
+    assert first == second
+    assert first[0].id == "417291"
+    client.get_series_page.assert_awaited_once_with("33189", raw=True)
@@ -1,9 +1,12 @@
+import asyncio
 from unittest.mock import patch
 from urllib.parse import quote_plus
 
 import pytest
 
 from services.client import FlibustaClient
+from services.transport import AiohttpTransport
+from tests.stub_server import StubFlibustaServer
 
 
 def test_client_initialization():
@@ -42,7 +45,7 @@ async def test_client_context_manager():
     # Should not have session initially
     assert client.session is None
     
-    with patch("services.client.aiohttp.ClientSession") as mock_session_class:
+    with patch("services.transport.aiohttp.ClientSession") as mock_session_class:
         from unittest.mock import AsyncMock
         mock_session = AsyncMock()
         mock_session_class.return_value = mock_session
@@ -66,4 +69,32 @@ def test_download_urls_generation():
     
     # These are the URLs that would be tried
     assert expected_urls[0] == "https://flibusta.is/b/727250/epub"
-    assert expected_urls[1] == "https://flibusta.is/b/727250/download"
\ No newline at end of file
+    assert expected_urls[1] == "https://flibusta.is/b/727250/download"
+
+class SlowClosingTransport(AiohttpTransport):
+    async def close(self) -> None:
+        await asyncio.sleep(0.05)
+        await super().close()
+
+
+@pytest.mark.asyncio
+async def test_entry_during_close_gets_an_open_session():
+    """A call starting while the last one exits keeps a working session."""
+    async with StubFlibustaServer() as server:
+        client = FlibustaClient(server.base_url, SlowClosingTransport)
+
+        async def first():
+            async with client:
+                await client.get_book_details_page("1")
+
+        async def second():
+            await asyncio.sleep(0.02)
+            async with client:
+                await client.get_book_details_page("2")
+                await asyncio.sleep(0.05)
+                return await client.get_book_details_page("3")
+
+        _, page = await asyncio.gather(first(), second())
+
+    assert "var bookId = 3" in page
+    assert client.session is None
@@ -0,0 +1,135 @@
+"""Tests for call deadlines and partial results."""
+
+import asyncio
+
+import pytest
+
+import flibusta_mcp
+from services.cache import ResultCache
+from services.client import FlibustaClient
+from services.deadline import (
+    DeadlineExceeded,
+    deadline,
+    enforce_deadline,
+    time_left,
+    without_deadline,
+)
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+from services.watcher import NewBooksWatcher, WatermarkStore
+from tests.stub_server import StubFlibustaServer
+
+
+@pytest.mark.asyncio
+async def test_nested_deadlines_only_tighten():
+    assert time_left() is None
+    with deadline(10):
+        with deadline(60):
+            assert time_left() <= 10
+        with deadline(1):
+            assert time_left() <= 1
+        with deadline(0):
+            assert 1 < time_left() <= 10
+        with without_deadline():
+            assert time_left() is None
+
+
+@pytest.mark.asyncio
+async def test_enforce_deadline_keeps_other_timeouts():
+    """Only expiry of the call deadline becomes DeadlineExceeded."""
+    with deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            async with enforce_deadline():
+                await asyncio.sleep(1)
+
+    with deadline(5):
+        with pytest.raises(TimeoutError) as exc_info:
+            async with enforce_deadline():
+                async with asyncio.timeout(0.01):
+                    await asyncio.sleep(1)
+    assert not isinstance(exc_info.value, DeadlineExceeded)
+
+
+@pytest.mark.asyncio
+async def test_single_request_fails_with_deadline_exceeded():
+    async with StubFlibustaServer(latency=0.5) as server:
+        service = FlibustaService(FlibustaClient(server.base_url), FlibustaParser())
+
+        with pytest.raises(DeadlineExceeded):
+            async with service.call(timeout=0.05):
+                await service.get_book_details("1")
+
+    assert service.client.scheduler.stats["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_load_keeps_each_callers_deadline():
+    """A caller joining a load is not cut short by the starter's deadline."""
+    cache = ResultCache()
+    loads = []
+
+    async def load():
+        loads.append(time_left())
+        async with enforce_deadline():
+            await asyncio.sleep(0.1)
+        return [1]
+
+    async def call(timeout):
+        with deadline(timeout):
+            return await cache.get_or_load("op", {}, list[int], load)
+
+    short, long = await asyncio.gather(call(0.05), call(1), return_exceptions=True)
+
+    assert isinstance(short, DeadlineExceeded)
+    assert long == [1]
+    assert len(loads) == 2
+
+
+@pytest.mark.asyncio
+async def test_series_crawl_returns_partial_tree(monkeypatch):
+    """Sub-series still loading at the deadline come back partial."""
+    async with StubFlibustaServer(latency=0.1, synthetic_books=1) as server:
+        server.series_tree = {"1": ["2", "3"]}
+        service = FlibustaService(
+            FlibustaClient(server.base_url), FlibustaParser(), cache=ResultCache()
+        )
+        monkeypatch.setattr(flibusta_mcp, "service", service)
+
+        _, structured = await flibusta_mcp.mcp.call_tool(
+            "get_series_tree", {"series_id": "1", "timeout": 0.15}
+        )
+        (root,) = structured["result"]
+
+        assert root["partial"] is False
+        assert [book["id"] for book in root["books"]] == ["1000"]
+        assert [(c["id"], c["partial"]) for c in root["children"]] == [
+            ("2", True),
+            ("3", True),
+        ]
+
+        # Partial trees are not cached, finished series pages are
+        async with service.call(timeout=5):
+            (tree,) = await service.get_series_tree(series_id="1")
+        assert [c.partial for c in tree.children] == [False, False]
+        assert server.requests["series"] == 5
+
+
+@pytest.mark.asyncio
+async def test_watcher_marks_unchecked_authors_partial(tmp_path):
+    async with StubFlibustaServer(latency=0.1) as server:
+        client = FlibustaClient(server.base_url)
+        store = WatermarkStore(tmp_path / "watermarks.json")
+        watcher = NewBooksWatcher(client, FlibustaParser(), store, concurrency=1)
+        service = FlibustaService(client, FlibustaParser(), watcher=watcher)
+
+        async with service.call(timeout=0.15):
+            results = await service.check_new_books(["1", "2", "3"])
+
+    assert [(r.author_id, r.partial) for r in results] == [
+        ("1", False),
+        ("2", True),
+        ("3", True),
+    ]
+    assert results[0].initialized
+    assert store.get("1") is not None
+    assert store.get("2") is None
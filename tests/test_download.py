@@ -0,0 +1,86 @@
+"""Tests for buffered download writer."""
+
+from unittest.mock import patch
+
+import pytest
+
+from config import config
+from services.client import FlibustaClient
+from services.download import DownloadWriter
+from tests.stub_server import StubFlibustaServer
+
+
+@pytest.mark.asyncio
+async def test_writer_coalesces_chunks(tmp_path):
+    """Small chunks are written in a few large batches."""
+    path = tmp_path / "book.fb2"
+    chunks = [bytes([i % 256]) * 1000 for i in range(100)]
+
+    async with DownloadWriter(path, buffer_size=30_000) as writer:
+        for chunk in chunks:
+            await writer.write(chunk)
+
+    assert path.read_bytes() == b"".join(chunks)
+    assert writer.bytes_written == 100_000
+    assert writer.flush_count == 4
+    assert not writer.part_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_writer_trims_preallocated_file(tmp_path):
+    """File is truncated to written size if Content-Length was larger."""
+    path = tmp_path / "book.epub"
+
+    async with DownloadWriter(path, preallocate_size=50_000) as writer:
+        await writer.write(b"x" * 10_000)
+
+    assert path.stat().st_size == 10_000
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, expected_fsyncs", [("none", 0), ("end", 1), ("always", 4)]
+)
+async def test_writer_fsync_policy(tmp_path, policy, expected_fsyncs):
+    """fsync is called according to the configured policy."""
+    with patch("services.download.os.fsync") as fsync:
+        async with DownloadWriter(
+            tmp_path / "book.fb2", buffer_size=10, fsync_policy=policy
+        ) as writer:
+            for _ in range(3):
+                await writer.write(b"0123456789")
+
+    assert fsync.call_count == expected_fsyncs
+
+
+@pytest.mark.asyncio
+async def test_writer_removes_partial_file_on_error(tmp_path):
+    """Failed downloads leave neither the final nor the partial file."""
+    path = tmp_path / "book.fb2"
+
+    with pytest.raises(RuntimeError):
+        async with DownloadWriter(path, buffer_size=10) as writer:
+            await writer.write(b"0123456789abc")
+            raise RuntimeError("connection lost")
+
+    assert not path.exists()
+    assert not writer.part_path.exists()
+
+
+def test_writer_rejects_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ValueError, match="Unknown fsync policy"):
+        DownloadWriter(tmp_path / "book.fb2", fsync_policy="sometimes")
+
+
+@pytest.mark.asyncio
+async def test_download_large_file_from_stub(tmp_path, monkeypatch):
+    """Client downloads a multi-megabyte file byte for byte."""
+    monkeypatch.setattr(config, "DOWNLOAD_DIR", tmp_path)
+    monkeypatch.setattr(config, "DOWNLOAD_BUFFER_SIZE", 1024 * 1024)
+
+    async with StubFlibustaServer(file_size=5 * 1024 * 1024 + 123) as server:
+        async with FlibustaClient(server.base_url) as client:
+            file_path = await client.try_download_book("42", "book.epub")
+
+        assert file_path == str(tmp_path / "book_42.epub")
+        assert (tmp_path / "book_42.epub").read_bytes() == server.synthetic_file("42")
@@ -0,0 +1,189 @@
+"""Tests for filtering author and series books while parsing."""
+
+from pathlib import Path
+
+import pytest
+
+import flibusta_mcp
+from models import BookFilter
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+from tests.stub_server import StubFlibustaServer
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+
+SERIES_PAGE = """
+<html><body><h1 class="title">Автор</h1><form>
+<a href="/s/1"><span class="h8">Тёмная Башня</span></a>
+ (<a href="/g/9" class="genre" name="sf_horror">Ужасы</a>)<br>
+<input type="checkbox"> - 1. <a href="/b/11">Стрелок</a> (1982)
+ <a href="/b/11/fb2">(fb2)</a> - <a href="/b/11/epub">(epub)</a><br>
+<input type="checkbox"> - 2. <a href="/b/12">Извлечение троих</a> [uk]
+ (пер. <a href="/a/7">Перекладач</a>) (1987)
+ <a href="/b/12/fb2">(fb2)</a><br>
+<br>
+<p class="genre"><a href="/g/3" class="genre" name="det_crime">Детектив</a></p>
+<input type="checkbox"> - <a href="/b/13">Мистер Мерседес</a>
+ (2014) <a href="/b/13/download">(скачать pdf)</a><br>
+</form></body></html>
+"""
+
+
+@pytest.fixture
+def parser():
+    return FlibustaParser()
+
+
+def ids(books):
+    return [book.id for book in books]
+
+
+def test_series_groups_apply_to_their_lines(parser):
+    books = parser.parse_author_books(SERIES_PAGE)
+
+    assert [(b.id, b.series_name, b.year) for b in books] == [
+        ("11", "Тёмная Башня", 1982),
+        ("12", "Тёмная Башня", 1987),
+        ("13", None, 2014),
+    ]
+
+
+@pytest.mark.parametrize(
+    "criteria, expected",
+    [
+        ({"genres": ["sf_horror"]}, ["11", "12"]),
+        ({"genres": ["детектив"]}, ["13"]),
+        ({"languages": ["uk"]}, ["12"]),
+        ({"translated": False}, ["11", "13"]),
+        ({"formats": ["epub"]}, ["11"]),
+        ({"formats": ["pdf"]}, ["13"]),
+        ({"year_from": 1985, "year_to": 2000}, ["12"]),
+        ({"genres": ["sf_horror"], "languages": ["ru"]}, ["11"]),
+    ],
+)
+def test_filter_series_layout(parser, criteria, expected):
+    books = parser.parse_author_books(SERIES_PAGE, book_filter=BookFilter(**criteria))
+
+    assert ids(books) == expected
+
+
+def test_filter_date_layout(parser):
+    html = """
+    <h4>01.02.2020</h4>
+    <div class="g-sf_horror"><a href="/b/21">Оно</a> (1986)
+     <a href="/b/21/epub">(epub)</a></div>
+    <div class="g-det_crime"><a href="/b/22">Билли Саммерс</a> [en] (2021)
+     <a href="/b/22/fb2">(fb2)</a></div>
+    """
+
+    horror = BookFilter(genres=["sf_horror"])
+    english = BookFilter(languages=["en"])
+
+    assert ids(parser.parse_author_books(html, book_filter=horror)) == ["21"]
+    assert ids(parser.parse_author_books(html, book_filter=english)) == ["22"]
+
+
+def test_filter_date_layout_lines_of_one_div(parser):
+    html = """
+    <h4>01.02.2020</h4>
+    <div><a href="/b/23">Сияние</a> (1977) <a href="/b/23/epub">(epub)</a><br>
+    <a href="/b/24">Худеющий</a> (1984) <a href="/b/24/fb2">(fb2)</a><br></div>
+    """
+
+    def matching(**criteria):
+        return ids(parser.parse_author_books(html, book_filter=BookFilter(**criteria)))
+
+    assert matching(formats=["epub"]) == ["23"]
+    assert matching(year_from=1980) == ["24"]
+
+
+def test_year_range_skips_entries_without_year(parser):
+    html = '<div><a href="/b/31">Без года</a></div>'
+
+    assert parser.parse_series_page(html, "1").books
+    assert not parser.parse_series_page(
+        html, "1", book_filter=BookFilter(year_from=1900)
+    ).books
+
+
+def test_filter_real_author_page(parser):
+    html = (TEST_DATA / "author_5803_default.html").read_text(encoding="utf-8")
+
+    books = parser.parse_author_books(html)
+    horror = parser.parse_author_books(
+        html, book_filter=BookFilter(genres=["Ужасы"])
+    )
+    pdf = parser.parse_author_books(html, book_filter=BookFilter(formats=["pdf"]))
+
+    assert len(books) == 640
+    series = {book.series_name for book in books}
+    assert {"Ночная смена", "Экипаж скелетов", None} < series
+    assert 0 < len(horror) < len(books)
+    assert 0 < len(pdf) < len(horror)
+    assert set(ids(pdf)) <= set(ids(books))
+
+
+@pytest.mark.parametrize("layout", ["default", "by_date"])
+def test_genre_names_match_like_codes(parser, layout):
+    """A name matches books whose genre is only given by its code."""
+    html = (TEST_DATA / f"author_5803_{layout}.html").read_bytes()
+
+    by_name = parser.parse_author_books(
+        html, book_filter=BookFilter(genres=["Ужасы"])
+    )
+    by_code = parser.parse_author_books(
+        html, book_filter=BookFilter(genres=["sf_horror"])
+    )
+
+    assert ids(by_name) == ids(by_code)
+
+
+@pytest.mark.parametrize("layout", ["default", "by_date"])
+def test_filter_splits_real_page_once(parser, layout):
+    """Links to a rejected book later on the page don't bring it back."""
+    html = (TEST_DATA / f"author_5803_{layout}.html").read_bytes()
+
+    translations = parser.parse_author_books(
+        html, book_filter=BookFilter(translated=True)
+    )
+    originals = parser.parse_author_books(
+        html, book_filter=BookFilter(translated=False)
+    )
+
+    assert len(translations) + len(originals) == 640
+    # "Сияние" is a translation, also linked from a review in the sidebar
+    assert "217179" in ids(translations)
+    assert "217179" not in ids(originals)
+
+
+@pytest.mark.asyncio
+async def test_tool_filters_by_year(monkeypatch):
+    async with StubFlibustaServer(synthetic_books=20) as server:
+        service = FlibustaService(FlibustaClient(server.base_url), FlibustaParser())
+        monkeypatch.setattr(flibusta_mcp, "service", service)
+
+        _, all_books = await flibusta_mcp.mcp.call_tool(
+            "get_series_books", {"series_id": "3"}
+        )
+        _, filtered = await flibusta_mcp.mcp.call_tool(
+            "get_series_books",
+            {"series_id": "3", "year_from": 1975, "year_to": 1979},
+        )
+
+    assert len(all_books["result"]) == 20
+    assert [book["year"] for book in filtered["result"]] == list(range(1975, 1980))
+
+
+@pytest.mark.asyncio
+async def test_author_year_range_uses_added_dates():
+    """Author pages show no publication year; the added date stands in."""
+    async with StubFlibustaServer() as server:
+        service = FlibustaService(FlibustaClient(server.base_url), FlibustaParser())
+        async with service.call():
+            books = await service.search_books_by_author(
+                "5803", books_limit=1000, book_filter=BookFilter(year_from=2020)
+            )
+
+    assert 0 < len(books) < 640
+    assert all(int(book.added_date[-4:]) >= 2020 for book in books)
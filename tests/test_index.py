@@ -0,0 +1,61 @@
+"""Tests for the index of book series seen on parsed pages."""
+
+import time
+
+import pytest
+
+from models import Book
+from services.client import FlibustaClient
+from services.index import EntityIndex
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+from tests.stub_server import StubFlibustaServer
+
+
+def book(book_id, series_id=None):
+    return Book(
+        id=book_id,
+        title=f"Книга {book_id}",
+        authors=["Стивен Кинг"],
+        series_id=series_id,
+        series_name=f"Серия {series_id}" if series_id else None,
+    )
+
+
+def test_list_pages_record_book_series():
+    index = EntityIndex()
+    index.add_books([book("11", "5"), book("12")])
+
+    assert index.book_series("11") == ("5", "Серия 5")
+    assert index.book_series("12") is None
+    assert index.size() == {"books": 1}
+    assert index.stats["hits"] == 1
+
+
+def test_expired_records_are_pruned(monkeypatch):
+    index = EntityIndex(ttl=60)
+    index.add_books([book("11", "5")])
+
+    now = time.time()
+    monkeypatch.setattr("services.index.time.time", lambda: now + 61)
+    assert index.book_series("11") is None
+
+    index.add_books([book("12", "6")])
+    assert index.size() == {"books": 1}
+    assert index.stats["pruned"] == 1
+
+
+@pytest.mark.asyncio
+async def test_book_details_get_series_from_author_page():
+    async with StubFlibustaServer(synthetic_books=3) as server:
+        service = FlibustaService(
+            FlibustaClient(server.base_url), FlibustaParser(), index=EntityIndex()
+        )
+        async with service.call():
+            profile = await service.get_author_profile("2")
+            details = await service.get_book_details(profile.books[0].id)
+
+        assert server.requests["book"] == 1
+
+    assert (details.series_id, details.series_name) == ("2", "Серия 2")
+    assert service.get_stats()["index"]["hits"] == 1
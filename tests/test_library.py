@@ -0,0 +1,185 @@
+"""Tests for offline full-text search over downloaded books."""
+
+import os
+import zipfile
+
+import pytest
+
+from config import config
+from services.client import FlibustaClient
+from services.library import LibraryIndex, extract_book
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+from tests.stub_server import StubFlibustaServer
+
+FB2 = """<?xml version="1.0" encoding="utf-8"?>
+<FictionBook xmlns="http://www.gribuser.ru/xml/fictionbook/2.0">
+  <description>
+    <title-info>
+      <author><first-name>Стивен</first-name><last-name>Кинг</last-name></author>
+      <book-title>Тёмная башня</book-title>
+    </title-info>
+  </description>
+  <body>
+    <section>
+      <p>Человек в чёрном уходил через пустыню, а стрелок шёл следом.</p>
+    </section>
+  </body>
+</FictionBook>
+"""
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+OPF = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:title>Сияние</dc:title>
+    <dc:creator>Стивен Кинг</dc:creator>
+  </metadata>
+  <manifest>
+    <item id="ch1" href="text/ch1.xhtml" media-type="application/xhtml+xml"/>
+  </manifest>
+  <spine><itemref idref="ch1"/></spine>
+</package>
+"""
+
+CHAPTER = """<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+  <head><title>Глава 1</title></head>
+  <body>
+    <p>Отель «Оверлук» закрывался на зиму, и Джек согласился стать смотрителем.</p>
+  </body>
+</html>
+"""
+
+
+def write_epub(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("mimetype", "application/epub+zip")
+        archive.writestr("META-INF/container.xml", CONTAINER)
+        archive.writestr("OEBPS/content.opf", OPF)
+        archive.writestr("OEBPS/text/ch1.xhtml", CHAPTER)
+
+
+@pytest.fixture
+def library(tmp_path):
+    books = tmp_path / "books"
+    books.mkdir()
+    (books / "tower.fb2").write_text(FB2, encoding="utf-8")
+    write_epub(books / "shining.epub")
+    with zipfile.ZipFile(books / "zipped.fb2.zip", "w") as archive:
+        archive.writestr("zipped.fb2", FB2.replace("Тёмная башня", "Стрелок"))
+    (books / "notes.txt").write_text("пустыня")
+    return LibraryIndex(tmp_path / "library.sqlite3", books)
+
+
+def test_extract_fb2_and_epub(library):
+    fb2 = extract_book(library.library_dir / "tower.fb2", "fb2")
+    assert fb2["title"] == "Тёмная башня"
+    assert fb2["authors"] == ["Стивен Кинг"]
+    assert "стрелок" in fb2["body"]
+
+    epub = extract_book(library.library_dir / "shining.epub", "epub")
+    assert epub["title"] == "Сияние"
+    assert epub["authors"] == ["Стивен Кинг"]
+    assert "Оверлук" in epub["body"]
+    assert "Глава 1" not in epub["body"]
+
+
+def test_search_returns_snippets(library):
+    assert library.refresh() == {
+        "indexed": 3,
+        "unchanged": 0,
+        "failed": 0,
+        "removed": 0,
+    }
+
+    matches = library.search("пустыню стрелок")
+    assert {m.title for m in matches} == {"Тёмная башня", "Стрелок"}
+    assert all("[пустыню]" in m.snippet for m in matches)
+    assert all(m.format in ("fb2", "fb2.zip") for m in matches)
+
+    [shining] = library.search("Оверлук")
+    assert shining.title == "Сияние"
+    assert shining.format == "epub"
+
+
+def test_search_folds_case_and_yo(library):
+    library.refresh()
+
+    assert [m.title for m in library.search("ТЁМНАЯ")] == ["Тёмная башня"]
+    assert [m.title for m in library.search("темная")] == ["Тёмная башня"]
+
+
+def test_search_treats_query_syntax_literally(library):
+    library.refresh()
+
+    assert library.search('"') == []
+    assert library.search("стрелок OR NEAR(") == []
+    assert library.search("   ") == []
+
+
+def test_refresh_is_incremental(library):
+    library.refresh()
+    assert library.refresh() == {
+        "indexed": 0,
+        "unchanged": 3,
+        "failed": 0,
+        "removed": 0,
+    }
+
+    # Same content with a new mtime is not parsed again
+    tower = library.library_dir / "tower.fb2"
+    stat = tower.stat()
+    os.utime(tower, (stat.st_atime, stat.st_mtime + 10))
+    assert library.refresh()["unchanged"] == 3
+
+    tower.write_text(FB2.replace("пустыню", "степь"), encoding="utf-8")
+    os.utime(tower, (stat.st_atime, stat.st_mtime + 20))
+    assert library.refresh()["indexed"] == 1
+    assert [m.title for m in library.search("степь")] == ["Тёмная башня"]
+    assert [m.title for m in library.search("пустыню")] == ["Стрелок"]
+
+    (library.library_dir / "shining.epub").unlink()
+    assert library.refresh()["removed"] == 1
+    assert library.search("Оверлук") == []
+
+
+def test_broken_file_is_remembered(library):
+    (library.library_dir / "broken.epub").write_bytes(b"not a zip")
+
+    assert library.refresh()["failed"] == 1
+    assert library.refresh()["failed"] == 0
+
+
+def test_index_file(library):
+    tower = library.library_dir / "tower.fb2"
+
+    assert library.index_file(tower) == "indexed"
+    assert library.index_file(tower) == "unchanged"
+    assert library.index_file(library.library_dir / "notes.txt") == "skipped"
+    assert [m.path for m in library.search("пустыню")] == [str(tower)]
+
+
+@pytest.mark.asyncio
+async def test_download_survives_index_failure(tmp_path, monkeypatch):
+    """A saved download is returned even if it cannot be indexed."""
+    monkeypatch.setattr(config, "DOWNLOAD_DIR", tmp_path)
+    (tmp_path / "index").write_bytes(b"")
+    library = LibraryIndex(tmp_path / "index" / "library.sqlite3", tmp_path)
+
+    async with StubFlibustaServer() as server:
+        service = FlibustaService(
+            FlibustaClient(server.base_url), FlibustaParser(), library=library
+        )
+        async with service.call():
+            file_path = await service.download_book("42")
+
+    assert os.path.exists(file_path)
+    assert service.get_stats()["library"] == {"index_errors": 1}
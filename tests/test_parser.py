@@ -111,3 +111,21 @@ def test_parse_author_books_extracts_author_name(parser, author_page_html):
         assert book.authors == ["Стивен Кинг"], (
             f"Book {book.title} has wrong authors: {book.authors}"
         )
+
+
+def test_parse_raw_bytes_matches_text(parser, search_html, book_html):
+    """Raw bytes with the declared charset parse like decoded text."""
+    assert parser.parse_books_search(
+        search_html.encode("utf-8"), "utf-8"
+    ) == parser.parse_books_search(search_html)
+    assert parser.parse_book_details(
+        book_html.encode("utf-8"), "utf-8"
+    ) == parser.parse_book_details(book_html)
+
+
+def test_parse_raw_bytes_uses_declared_charset(parser):
+    html = '<div><a href="/b/417291">Сияние</a> (1977)</div>'
+
+    node = parser.parse_series_page(html.encode("cp1251"), "1", "windows-1251")
+
+    assert node.books[0].title == "Сияние"
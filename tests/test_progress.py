@@ -0,0 +1,143 @@
+"""Tests for progress notifications and streamed partial results."""
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+import flibusta_mcp
+from config import config
+from services import progress
+from services.cache import ResultCache
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.progress import ProgressReporter
+from services.service import FlibustaService
+from services.watcher import NewBooksWatcher, WatermarkStore
+from tests.stub_server import StubFlibustaServer
+
+
+class Recorder:
+    def __init__(self):
+        self.notifications = []
+        self.partials = []
+
+    async def notify(self, progress, total, message):
+        self.notifications.append((progress, total, message))
+
+    async def publish(self, data):
+        self.partials.append(data)
+
+    def reporter(self, **kwargs):
+        return ProgressReporter(self.notify, self.publish, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_progress_increases_and_failures_are_ignored():
+    recorder = Recorder()
+    reporter = recorder.reporter(interval=60)
+
+    await reporter.page_fetched(1000)
+    await reporter.parsed(20, "books")
+    # Throttled until the download completes
+    await reporter.downloaded(10, 100)
+    await reporter.downloaded(50, 100)
+    await reporter.downloaded(100, 100)
+
+    async def broken(*args):
+        raise ConnectionError("client went away")
+
+    reporter.notify = broken
+    await reporter.parsed(1)
+
+    assert [n[0] for n in recorder.notifications] == [1, 2, 100]
+    assert recorder.notifications[1][2] == "Parsed 20 books"
+    assert reporter.stats["send_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_progress_reaches_total_at_the_end():
+    recorder = Recorder()
+    reporter = recorder.reporter()
+
+    await reporter.page_fetched(1000)
+    reporter.start_batch(2)
+    await reporter.page_fetched(1000)
+    await reporter.partial({"id": 1}, 1)
+    await reporter.parsed(5)
+    await reporter.partial({"id": 2}, 2)
+
+    assert [n[:2] for n in recorder.notifications] == [(1, None), (2, 3), (3, 3)]
+    assert recorder.partials == [{"id": 1}, {"id": 2}]
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_reports_to_nobody(monkeypatch):
+    cache = ResultCache(ttl=10, stale_ttl=100)
+    recorder = Recorder()
+
+    async def load():
+        await progress.parsed(1)
+        await progress.partial({"id": 1}, 1)
+        return [1]
+
+    monkeypatch.setattr("services.cache.time.time", lambda: 1000.0)
+    await cache.get_or_load("op", {}, list[int], load)
+    monkeypatch.setattr("services.cache.time.time", lambda: 1050.0)
+    with progress.reporting(recorder.reporter()):
+        await cache.get_or_load("op", {}, list[int], load)
+    await cache.wait_for_refreshes()
+
+    assert cache.stats["refreshes"] == 1
+    assert recorder.notifications == recorder.partials == []
+
+
+@pytest.mark.asyncio
+async def test_download_reports_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DOWNLOAD_DIR", tmp_path)
+    recorder = Recorder()
+
+    async with StubFlibustaServer(file_size=512 * 1024) as server:
+        service = FlibustaService(FlibustaClient(server.base_url), FlibustaParser())
+        async with service.call(reporter=recorder.reporter(interval=0)):
+            await service.client.try_download_book("5")
+
+    sizes = [n[0] for n in recorder.notifications]
+    assert len(sizes) > 1
+    assert sizes == sorted(sizes)
+    assert recorder.notifications[-1][:2] == (512 * 1024, 512 * 1024)
+
+
+@pytest.mark.asyncio
+async def test_tool_streams_progress_and_partial_results(tmp_path, monkeypatch):
+    progress = []
+    partials = []
+
+    async def on_progress(value, total, message):
+        progress.append((value, total))
+
+    async def on_log(params):
+        if params.logger == "partial_result":
+            partials.append(params.data)
+
+    async with StubFlibustaServer(synthetic_books=2) as server:
+        client = FlibustaClient(server.base_url)
+        parser = FlibustaParser()
+        watcher = NewBooksWatcher(
+            client, parser, WatermarkStore(tmp_path / "watermarks.json")
+        )
+        service = FlibustaService(client, parser, watcher=watcher)
+        monkeypatch.setattr(flibusta_mcp, "service", service)
+
+        async with create_connected_server_and_client_session(
+            flibusta_mcp.mcp, logging_callback=on_log
+        ) as session:
+            result = await session.call_tool(
+                "check_new_books",
+                {"author_ids": ["1", "2", "3"]},
+                progress_callback=on_progress,
+            )
+
+    assert not result.isError
+    assert sorted(p["author_id"] for p in partials) == ["1", "2", "3"]
+    assert all(p["initialized"] for p in partials)
+    # One notification per finished author, never past the batch size
+    assert progress == [(1, 3), (2, 3), (3, 3)]
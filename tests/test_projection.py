@@ -0,0 +1,89 @@
+"""Tests for field projection and compact output."""
+
+import pytest
+
+from models import Author, Book
+from services.projection import project_items
+
+
+@pytest.fixture
+def books():
+    return [
+        Book(id="1", title="Сияние", authors=["Стивен Кинг"], year=1977),
+        Book(
+            id="2",
+            title="Доктор Сон",
+            authors=["Стивен Кинг"],
+            series_name="Дэнни Торранс",
+            series_id="33189",
+        ),
+    ]
+
+
+def test_objects_skip_null_fields(books):
+    """Null fields are not serialized in objects format."""
+    result = project_items(books)
+
+    assert result[0] == {
+        "id": "1",
+        "title": "Сияние",
+        "authors": ["Стивен Кинг"],
+        "year": 1977,
+    }
+    assert "description" not in result[1]
+    assert result[1]["series_id"] == "33189"
+
+
+def test_objects_with_fields(books):
+    """Only requested fields are returned."""
+    result = project_items(books, fields=["id", "title"])
+
+    assert result == [
+        {"id": "1", "title": "Сияние"},
+        {"id": "2", "title": "Доктор Сон"},
+    ]
+
+
+def test_compact_with_fields(books):
+    """Compact format returns a column header plus row arrays."""
+    result = project_items(books, fields=["id", "year"], output_format="compact")
+
+    assert result == {"columns": ["id", "year"], "rows": [["1", 1977], ["2", None]]}
+
+
+def test_compact_drops_empty_columns(books):
+    """Without fields, compact format keeps only columns that carry data."""
+    result = project_items(books, output_format="compact")
+
+    assert result["columns"] == [
+        "id",
+        "title",
+        "authors",
+        "year",
+        "series_name",
+        "series_id",
+    ]
+    assert result["rows"][1][2] == ["Стивен Кинг"]
+
+
+def test_projection_of_dicts_and_authors():
+    """Dict rows and other models are projected the same way."""
+    series = [{"id": "18510", "name": "Кинг, Стивен. Романы"}]
+    assert project_items(series, fields=["name"]) == [
+        {"name": "Кинг, Стивен. Романы"}
+    ]
+
+    authors = [Author(id="5803", name="King Stephen", books_count=630)]
+    assert project_items(authors, output_format="compact") == {
+        "columns": ["id", "name", "books_count"],
+        "rows": [["5803", "King Stephen", 630]],
+    }
+
+
+def test_invalid_field_and_format(books):
+    """Unknown fields and formats raise ValueError."""
+    with pytest.raises(ValueError, match="Unknown fields: isbn"):
+        project_items(books, fields=["id", "isbn"])
+
+    with pytest.raises(ValueError, match="Unknown output format"):
+        project_items(books, output_format="csv")
@@ -0,0 +1,91 @@
+"""Tests for search query normalization."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services.cache import ResultCache
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.query import normalize_query, transliterate_word
+from services.service import FlibustaService
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["Стивен Кинг", "стивен  кинг", "Стивен Кинг ", "СТИВЕН\tКИНГ", " стивен кинг"],
+)
+def test_variants_share_canonical_form(query):
+    assert normalize_query(query) == "стивен кинг"
+
+
+def test_yo_dashes_and_quotes_are_folded():
+    assert normalize_query("Ёлка — «Зима»") == 'елка - "зима"'
+    assert normalize_query("Ёжик в тумане") == normalize_query("ежик в тумане")
+
+
+def test_transliteration_is_optional():
+    assert normalize_query("stiven king") == "stiven king"
+    assert normalize_query("stiven king", transliterate=True) == "стивен кинг"
+    # Mixed words keep their spelling
+    assert normalize_query("11/22/63 king", transliterate=True) == "11/22/63 кинг"
+
+
+@pytest.mark.parametrize(
+    "latin, cyrillic",
+    [
+        ("tolstoy", "толстой"),
+        ("chekhov", "чехов"),
+        ("dostoyevsky", "достоевский"),
+        ("shchedrin", "щедрин"),
+        ("zhukov", "жуков"),
+    ],
+)
+def test_transliterate_word(latin, cyrillic):
+    assert transliterate_word(latin) == cyrillic
+
+
+@pytest.fixture
+def search_html():
+    return """
+    <h3>Найденные книги</h3>
+    <ul><li><a href="/b/727250">It</a> - <a href="/a/5803">King Stephen</a></li></ul>
+    """
+
+
+@pytest.mark.asyncio
+async def test_search_variants_share_request_and_cache_entry(search_html):
+    """Equivalent queries are coalesced into one canonical request."""
+    client = FlibustaClient()
+
+    async def slow_page(query, raw=False):
+        await asyncio.sleep(0.01)
+        return search_html.encode(), "utf-8"
+
+    client.search_books_page = AsyncMock(side_effect=slow_page)
+    service = FlibustaService(
+        client, FlibustaParser(), cache=ResultCache(), transliterate=True
+    )
+
+    results = await asyncio.gather(
+        service.search_books("Стивен Кинг"),
+        service.search_books("стивен  кинг"),
+        service.search_books("stiven king"),
+    )
+    again = await service.search_books("Стивен Кинг ")
+
+    assert all(books == results[0] for books in results + [again])
+    # The first caller's query is sent as typed, only whitespace is cleaned
+    client.search_books_page.assert_awaited_once_with("Стивен Кинг", raw=True)
+
+
+@pytest.mark.asyncio
+async def test_transliterated_query_is_fetched_as_typed(search_html):
+    client = FlibustaClient()
+    client.search_books_page = AsyncMock(return_value=(search_html.encode(), None))
+    service = FlibustaService(client, FlibustaParser(), transliterate=True)
+
+    await service.search_authors("  king ")
+
+    client.search_books_page.assert_awaited_once_with("king", raw=True)
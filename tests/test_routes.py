@@ -0,0 +1,118 @@
+"""Tests for learned download routes and negative caching."""
+
+import asyncio
+import time
+
+import pytest
+
+from config import config
+from services.client import FlibustaClient
+from services.routes import RouteMemory, file_format
+from services.transport import TransportError
+from tests.stub_server import StubFlibustaServer
+
+
+@pytest.fixture(autouse=True)
+def download_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DOWNLOAD_DIR", tmp_path / "downloads")
+
+
+@pytest.mark.asyncio
+async def test_learned_route_is_tried_first(tmp_path):
+    routes = RouteMemory(tmp_path / "routes.json")
+
+    async with StubFlibustaServer() as server:
+        server.missing.add("/b/7/epub")
+        server.files["7"] = (b"PK zipped fb2", "book_7.fb2.zip")
+
+        async with FlibustaClient(server.base_url, routes=routes) as client:
+            await client.try_download_book("7")
+            assert routes.route("7") == "download"
+            assert routes.format("7") == "fb2.zip"
+
+            # After the 404 entry expires the learned route still goes first
+            routes._load()["missing"].clear()
+            await client.try_download_book("7")
+
+        assert server.requests["missing"] == 1
+        assert server.requests["download"] == 2
+
+    assert routes.stats["route_hits"] == 1
+    assert routes.stats["requests_avoided"] == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_page_is_not_requested_again():
+    routes = RouteMemory()
+
+    async with StubFlibustaServer() as server:
+        server.missing.add("/b/99")
+
+        async with FlibustaClient(server.base_url, routes=routes) as client:
+            for _ in range(3):
+                with pytest.raises(TransportError) as error:
+                    await client.get_book_details_page("99")
+                assert error.value.status == 404
+
+        assert server.requests["missing"] == 1
+
+    assert routes.stats["negative_stored"] == 1
+    assert routes.stats["negative_hits"] == 2
+    assert routes.stats["requests_avoided"] == 2
+
+
+@pytest.mark.asyncio
+async def test_server_errors_are_not_cached():
+    routes = RouteMemory()
+
+    async with StubFlibustaServer(error_rate=1.0) as server:
+        async with FlibustaClient(server.base_url, routes=routes) as client:
+            for _ in range(2):
+                with pytest.raises(Exception, match="Failed to download"):
+                    await client.try_download_book("5")
+
+        assert server.requests["download"] == 4
+
+    assert routes.stats["negative_stored"] == 0
+    assert routes.route("5") is None
+
+
+def test_negative_entries_expire(monkeypatch):
+    routes = RouteMemory(ttl=60)
+    routes.mark_missing("http://example/b/1")
+    assert routes.known_missing("http://example/b/1")
+
+    now = time.time()
+    monkeypatch.setattr("services.routes.time.time", lambda: now + 61)
+    assert not routes.known_missing("http://example/b/1")
+    assert routes.stats["negative_hits"] == 1
+
+
+def test_zero_ttl_disables_negative_cache():
+    routes = RouteMemory(ttl=0)
+    routes.mark_missing("http://example/b/1")
+
+    assert not routes.known_missing("http://example/b/1")
+
+
+@pytest.mark.asyncio
+async def test_state_is_persisted(tmp_path):
+    path = tmp_path / "routes.json"
+    routes = RouteMemory(path)
+    routes.remember_route("7", "download", "fb2.zip")
+    writing = asyncio.create_task(routes.flush())
+    await asyncio.sleep(0)
+
+    # A change made while a write runs is left to that flush
+    routes.mark_missing("http://example/b/7/epub")
+    await routes.flush()
+    await writing
+
+    reloaded = RouteMemory(path)
+    assert reloaded.route("7") == "download"
+    assert reloaded.known_missing("http://example/b/7/epub")
+
+
+def test_file_format():
+    assert file_format("/books/Кинг. Т.1.fb2.zip") == "fb2.zip"
+    assert file_format("/books/book_7.EPUB") == "epub"
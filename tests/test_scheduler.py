@@ -0,0 +1,166 @@
+"""Tests for priority request scheduler."""
+
+import asyncio
+
+import pytest
+
+from services.client import FlibustaClient
+from services.scheduler import (
+    RequestScheduler,
+    SchedulerOverloaded,
+    current_priority,
+    request_priority,
+)
+from tests.stub_server import StubFlibustaServer
+
+
+async def hold(scheduler, events, name, release: asyncio.Event, priority="interactive"):
+    """Take a slot, record start order and wait for release."""
+    with request_priority(priority):
+        async with scheduler.slot():
+            events.append(name)
+            await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_global_limit_and_queue_metrics():
+    scheduler = RequestScheduler(max_concurrency=2)
+    release = asyncio.Event()
+    events = []
+
+    tasks = [
+        asyncio.create_task(hold(scheduler, events, i, release)) for i in range(6)
+    ]
+    await asyncio.sleep(0)
+
+    assert events == [0, 1]
+    assert scheduler.stats["classes"]["interactive"]["queue_depth"] == 4
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    stats = scheduler.stats["classes"]["interactive"]
+    assert events == [0, 1, 2, 3, 4, 5]
+    assert stats["admitted"] == 6
+    assert stats["max_queue_depth"] == 4
+    assert scheduler.stats["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_jump_background_queue():
+    scheduler = RequestScheduler(max_concurrency=1)
+    first, rest = asyncio.Event(), asyncio.Event()
+    events = []
+
+    holder = asyncio.create_task(hold(scheduler, events, "holder", first))
+    await asyncio.sleep(0)
+    background = asyncio.create_task(
+        hold(scheduler, events, "background", rest, "background")
+    )
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(hold(scheduler, events, "interactive", rest))
+    await asyncio.sleep(0)
+
+    first.set()
+    rest.set()
+    await asyncio.gather(holder, background, interactive)
+
+    assert events == ["holder", "interactive", "background"]
+
+
+@pytest.mark.asyncio
+async def test_background_limit_keeps_slots_for_interactive():
+    scheduler = RequestScheduler(max_concurrency=3, class_limits={"background": 1})
+    release = asyncio.Event()
+    events = []
+
+    tasks = [
+        asyncio.create_task(hold(scheduler, events, f"b{i}", release, "background"))
+        for i in range(3)
+    ]
+    tasks.append(asyncio.create_task(hold(scheduler, events, "i0", release)))
+    await asyncio.sleep(0)
+
+    assert events == ["b0", "i0"]
+    assert scheduler.stats["classes"]["background"]["queue_depth"] == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.stats["classes"]["background"]["admitted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_background_requests_are_shed_when_queue_is_full():
+    scheduler = RequestScheduler(
+        max_concurrency=1, queue_limits={"background": 1}
+    )
+    release = asyncio.Event()
+    events = []
+
+    holder = asyncio.create_task(hold(scheduler, events, "holder", release))
+    queued = asyncio.create_task(hold(scheduler, events, "b0", release, "background"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(SchedulerOverloaded):
+        await hold(scheduler, events, "b1", release, "background")
+
+    release.set()
+    await asyncio.gather(holder, queued)
+    assert scheduler.stats["classes"]["background"]["shed"] == 1
+    assert events == ["holder", "b0"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_releases_nothing():
+    scheduler = RequestScheduler(max_concurrency=1)
+    release = asyncio.Event()
+    events = []
+
+    holder = asyncio.create_task(hold(scheduler, events, "holder", release))
+    waiter = asyncio.create_task(hold(scheduler, events, "cancelled", release))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    await holder
+    await hold(scheduler, events, "after", release)
+
+    assert events == ["holder", "after"]
+    assert scheduler.stats["active"] == 0
+    assert scheduler.stats["classes"]["interactive"]["queue_depth"] == 0
+
+
+def test_request_priority_context():
+    assert current_priority() == "interactive"
+    with request_priority("background"):
+        assert current_priority() == "background"
+    assert current_priority() == "interactive"
+
+    with pytest.raises(ValueError, match="Unknown priority"):
+        with request_priority("urgent"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_client_requests_go_through_scheduler():
+    """Client traffic is admitted under the caller's priority class."""
+    async with StubFlibustaServer(latency=0.01) as server:
+        client = FlibustaClient(
+            server.base_url, scheduler=RequestScheduler(max_concurrency=2)
+        )
+        async with client:
+            with request_priority("background"):
+                background = asyncio.gather(
+                    *[client.get_book_details_page(str(i)) for i in range(4)]
+                )
+                await asyncio.sleep(0)
+            pages = await asyncio.gather(
+                *[client.get_series_page(str(i)) for i in range(4)]
+            )
+            await background
+
+    stats = client.scheduler.stats["classes"]
+    assert len(pages) == 4
+    assert stats["interactive"]["admitted"] == 4
+    assert stats["background"]["admitted"] == 4
+    assert stats["background"]["max_queue_depth"] == 2
@@ -0,0 +1,131 @@
+"""Tests for series hierarchy parsing and traversal."""
+
+from pathlib import Path
+
+import pytest
+
+from services.cache import ResultCache
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+from tests.stub_server import StubFlibustaServer
+
+
+@pytest.fixture
+def parser():
+    return FlibustaParser()
+
+
+@pytest.fixture
+def series_sample_html():
+    test_data_path = Path(__file__).parent.parent / "test_data"
+    path = test_data_path / "author_5803_series_sample.html"
+    return path.read_text(encoding="utf-8")
+
+
+def test_parse_series_hierarchy(parser, series_sample_html):
+    """Chains "A ↦ B" give B the parent A; book references are skipped."""
+    headers = parser.parse_series_hierarchy(series_sample_html)
+
+    assert headers == [
+        {"id": "18510", "name": "Кинг, Стивен. Романы", "parent_id": None},
+        {"id": "33189", "name": "Дэнни Торранс", "parent_id": "18510"},
+        {"id": "7599", "name": "Книги Бахмана", "parent_id": None},
+    ]
+
+
+def test_parse_series_page_children(parser):
+    """Sub-series of the page's series become children; ancestors do not."""
+    html = """
+    <h1 class="title">Кинг, Стивен. Романы</h1>
+    <a href="/s/1"><span class="h8">Вселенная</span></a> <b>&#8614;</b>
+    <a href="/s/18510"><span class="h8">Кинг, Стивен. Романы</span></a><br>
+    <a href="/s/18510"><span class="h8">Кинг, Стивен. Романы</span></a> <b>&#8614;</b>
+    <a href="/s/33189"><span class="h8">Дэнни Торранс</span></a><br>
+    <input type="checkbox"> - <a href="/b/417291">Сияние</a> (1977)
+    (<a href="/s/14873"><span class="h8">Сразу после заката</span></a>)
+    """
+
+    node = parser.parse_series_page(html, "18510")
+
+    assert node.name == "Кинг, Стивен. Романы"
+    assert [book.id for book in node.books] == ["417291"]
+    assert [(c.id, c.name) for c in node.children] == [("33189", "Дэнни Торранс")]
+
+
+@pytest.mark.asyncio
+async def test_series_tree_crawl_dedupes_and_limits_depth():
+    """Each series is fetched once; depth limit marks truncated nodes."""
+    async with StubFlibustaServer(synthetic_books=3) as server:
+        server.series_tree = {
+            "100": ["101", "102"],
+            "101": ["103"],
+            "102": ["103", "104"],
+            "103": ["105"],
+        }
+        service = FlibustaService(FlibustaClient(server.base_url), FlibustaParser())
+        async with service.client:
+            (root,) = await service.get_series_tree(series_id="100", max_depth=2)
+
+    assert root.name == "Серия 100"
+    assert [book.id for book in root.books] == ["100000", "100001", "100002"]
+    assert [child.id for child in root.children] == ["101", "102"]
+    first, second = root.children
+    assert [c.id for c in first.children] == ["103"]
+    # 103 was claimed by the first branch
+    assert [c.id for c in second.children] == ["104"]
+    assert first.children[0].truncated is True
+    assert first.children[0].children == []
+    assert server.requests["series"] == 5
+
+
+@pytest.mark.asyncio
+async def test_series_tree_from_author_is_cached():
+    """Author traversal uses the page's chains and repeats from cache."""
+    async with StubFlibustaServer(synthetic_books=2) as server:
+        service = FlibustaService(
+            FlibustaClient(server.base_url), FlibustaParser(), cache=ResultCache()
+        )
+        async with service.client:
+            tree = await service.get_series_tree(author_id="5803", max_depth=1)
+            requests_after_first = sum(server.requests.values())
+            again = await service.get_series_tree(author_id="5803", max_depth=1)
+
+    assert again == tree
+    assert sum(server.requests.values()) == requests_after_first
+
+    roots = {node.id: node for node in tree}
+    assert "33189" not in roots
+    assert "33189" in [child.id for child in roots["18510"].children]
+
+
+@pytest.mark.asyncio
+async def test_series_tree_requires_one_root():
+    service = FlibustaService(FlibustaClient(), FlibustaParser())
+
+    with pytest.raises(ValueError, match="exactly one"):
+        await service.get_series_tree()
+    with pytest.raises(ValueError, match="exactly one"):
+        await service.get_series_tree(series_id="1", author_id="2")
+
+
+@pytest.mark.asyncio
+async def test_missing_sub_series_keeps_the_rest_of_the_tree():
+    """A sub-series that fails to load comes back with its error."""
+    async with StubFlibustaServer(synthetic_books=1) as server:
+        server.series_tree = {"100": ["101", "102"]}
+        server.missing.add("/s/101")
+        service = FlibustaService(
+            FlibustaClient(server.base_url), FlibustaParser(), cache=ResultCache()
+        )
+        async with service.client:
+            (root,) = await service.get_series_tree(series_id="100")
+            # Trees with failed nodes are not cached
+            await service.get_series_tree(series_id="100")
+
+    first, second = root.children
+    assert first.id == "101" and first.error is not None
+    assert first.books == []
+    assert second.error is None
+    assert [book.id for book in second.books] == ["102000"]
+    assert server.requests["missing"] == 2
@@ -0,0 +1,79 @@
+"""End-to-end tests of MCP tools against the local stub server."""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+import flibusta_mcp
+from config import config
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+from tests.stub_server import StubFlibustaServer
+
+
+@pytest_asyncio.fixture
+async def stub_server(monkeypatch, tmp_path):
+    """Start stub server and point the MCP service at it."""
+    async with StubFlibustaServer(file_size=100_000) as server:
+        service = FlibustaService(FlibustaClient(server.base_url), FlibustaParser())
+        monkeypatch.setattr(flibusta_mcp, "service", service)
+        monkeypatch.setattr(config, "DOWNLOAD_DIR", tmp_path)
+        yield server
+
+
+def structured(result):
+    """Extract structured payload from call_tool result."""
+    return result[1]["result"]
+
+
+@pytest.mark.asyncio
+async def test_search_tool_end_to_end(stub_server):
+    """search_books goes through client, parser and projection."""
+    result = await flibusta_mcp.mcp.call_tool(
+        "search_books", {"book_query": "stiven king", "fields": ["id", "title"]}
+    )
+
+    assert structured(result) == [
+        {"id": "727250", "title": "It"},
+        {"id": "732128", "title": "The Shining"},
+    ]
+    assert stub_server.requests["search"] == 1
+
+
+@pytest.mark.asyncio
+async def test_download_tool_end_to_end(stub_server, tmp_path):
+    """download_book saves the stub file under the download directory."""
+    result = await flibusta_mcp.mcp.call_tool("download_book", {"book_id": "42"})
+
+    payload = structured(result)
+    assert payload["status"] == "success"
+    saved = tmp_path / "book_42.epub"
+    assert payload["file_path"] == str(saved)
+    assert saved.read_bytes() == stub_server.synthetic_file("42")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tool_calls_share_client(stub_server):
+    """Concurrent tool calls do not close each other's sessions."""
+    stub_server.latency = 0.02
+    calls = [
+        flibusta_mcp.mcp.call_tool("get_book_details", {"book_id": str(book_id)})
+        for book_id in range(1, 21)
+    ]
+
+    results = await asyncio.gather(*calls)
+
+    assert [r[1]["id"] for r in results] == [str(book_id) for book_id in range(1, 21)]
+    assert stub_server.requests["book"] == 20
+    assert flibusta_mcp.service.client.session is None
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_surface_as_client_errors(stub_server):
+    """Error injection makes the stub answer with HTTP 503."""
+    stub_server.error_rate = 1.0
+
+    with pytest.raises(Exception, match="503"):
+        await flibusta_mcp.mcp.call_tool("get_series_books", {"series_id": "7"})
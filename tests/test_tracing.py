@@ -0,0 +1,176 @@
+"""Tests for tracing spans and the JSONL sink."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+import pytest_asyncio
+
+import flibusta_mcp
+from services import tracing
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.service import FlibustaService
+from services.tracing import (
+    JsonlTraceSink,
+    load_traces,
+    render_waterfall,
+    span,
+    traced,
+)
+from tests.stub_server import StubFlibustaServer
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    sink = JsonlTraceSink(path)
+    tracing.set_sink(sink)
+    yield path
+    tracing.set_sink(None)
+    sink.close()
+
+
+def read_spans(path):
+    tracing.flush()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_spans_nest_and_share_trace_id(trace_file):
+    with span("outer", tool="x"):
+        with span("inner") as inner:
+            inner.set(status=200)
+    with span("other"):
+        pass
+
+    inner, outer, other = read_spans(trace_file)
+    assert inner["trace_id"] == outer["trace_id"] != other["trace_id"]
+    assert inner["parent_id"] == outer["span_id"]
+    assert outer["parent_id"] is None
+    assert inner["attributes"] == {"status": 200}
+    assert outer["duration_ms"] >= inner["duration_ms"]
+
+
+def test_span_records_error(trace_file):
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("bad page")
+
+    [record] = read_spans(trace_file)
+    assert record["error"] == "ValueError: bad page"
+
+
+@pytest.mark.asyncio
+async def test_tasks_continue_the_trace(trace_file):
+    @traced("child")
+    async def child():
+        await asyncio.sleep(0)
+
+    with span("root"):
+        await asyncio.gather(child(), child())
+
+    spans = read_spans(trace_file)
+    root = spans[-1]
+    assert [s["name"] for s in spans] == ["child", "child", "root"]
+    assert all(s["parent_id"] == root["span_id"] for s in spans[:2])
+
+
+def test_disabled_tracing_writes_nothing(tmp_path):
+    @traced("sync")
+    def work():
+        return 42
+
+    with span("ignored") as ignored:
+        ignored.set(status=200)
+        assert work() == 42
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_render_waterfall(trace_file):
+    with span("tool", tool="search_books"):
+        with span("fetch", url="http://stub/booksearch", status=200):
+            pass
+        with span("parse.books_search"):
+            pass
+
+    tracing.flush()
+    lines = render_waterfall(load_traces(trace_file).popitem()[1])
+
+    assert len(lines) == 4
+    assert lines[1].split()[2] == "tool"
+    assert "  fetch" in lines[2]
+    assert "status=200" in lines[2]
+    assert "  parse.books_search" in lines[3]
+
+
+@pytest_asyncio.fixture
+async def traced_server(monkeypatch, trace_file):
+    async with StubFlibustaServer() as server:
+        service = FlibustaService(FlibustaClient(server.base_url), FlibustaParser())
+        monkeypatch.setattr(flibusta_mcp, "service", service)
+        yield server
+
+
+@pytest.mark.asyncio
+async def test_tool_call_trace(traced_server, trace_file):
+    """A tool call yields one trace from the handler down to serialization."""
+    await flibusta_mcp.mcp.call_tool("search_books", {"book_query": "king"})
+
+    tracing.flush()
+    [spans] = load_traces(trace_file).values()
+    by_name = {s["name"]: s for s in spans}
+    assert {
+        "tool",
+        "service.search_books",
+        "fetch",
+        "parse.books_search",
+        "project",
+        "serialize",
+    } <= set(by_name)
+
+    tool = by_name["tool"]
+    assert tool["parent_id"] is None
+    assert tool["attributes"]["tool"] == "search_books"
+    assert by_name["service.search_books"]["parent_id"] == tool["span_id"]
+    assert by_name["serialize"]["parent_id"] == tool["span_id"]
+    assert by_name["project"]["parent_id"] == by_name["serialize"]["span_id"]
+
+    fetch = by_name["fetch"]["attributes"]
+    assert fetch["status"] == 200
+    assert fetch["connection"] == "new"
+    assert {"queue_ms", "ttfb_ms", "connect_ms", "bytes"} <= set(fetch)
+
+
+@pytest.mark.asyncio
+async def test_model_results_are_serialized_in_a_span(traced_server, trace_file):
+    _, structured = await flibusta_mcp.mcp.call_tool(
+        "get_book_details", {"book_id": "42"}
+    )
+
+    tracing.flush()
+    [spans] = load_traces(trace_file).values()
+    by_name = {s["name"]: s for s in spans}
+    assert by_name["serialize"]["parent_id"] == by_name["tool"]["span_id"]
+    assert structured["id"] == "42"
+
+
+def test_sink_writes_off_the_calling_thread(tmp_path, monkeypatch):
+    """write() returns before the file is touched; flush() waits for it."""
+    sink = JsonlTraceSink(tmp_path / "traces.jsonl")
+    append = sink._append
+    writers = []
+
+    def recording_append(records):
+        writers.append(threading.current_thread())
+        append(records)
+
+    monkeypatch.setattr(sink, "_append", recording_append)
+    for i in range(100):
+        sink.write({"trace_id": "t", "n": i})
+    sink.flush()
+
+    assert [r["n"] for r in load_traces(sink.path)["t"]] == list(range(100))
+    assert threading.current_thread() not in writers
+    sink.close()
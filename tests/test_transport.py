@@ -0,0 +1,78 @@
+"""Tests for HTTP transport backends."""
+
+import asyncio
+
+import pytest
+
+from config import config
+from services.client import FlibustaClient
+from services.transport import (
+    AiohttpTransport,
+    HttpxTransport,
+    TransportError,
+    create_transport,
+)
+from tests.stub_server import StubFlibustaServer
+
+HTTP1_TRANSPORTS = {
+    "aiohttp": AiohttpTransport,
+    "httpx": lambda: HttpxTransport(http2=False),
+}
+
+
+def test_create_transport_by_name():
+    assert isinstance(create_transport("aiohttp"), AiohttpTransport)
+    # HTTP/2 is opt-in, so the httpx backend works without h2 installed
+    assert create_transport("httpx").http2 is False
+
+    with pytest.raises(ValueError, match="Unknown HTTP transport"):
+        create_transport("curl")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", HTTP1_TRANSPORTS)
+async def test_transports_fetch_pages_and_errors(name):
+    """Both backends return the same pages and raise TransportError on 503."""
+    async with StubFlibustaServer() as server:
+        client = FlibustaClient(server.base_url, HTTP1_TRANSPORTS[name])
+        async with client:
+            page = await client.get_book_details_page("727250")
+            chunks = [
+                chunk async for chunk in client.iter_author_books_page("5803", "date")
+            ]
+
+            server.error_rate = 1.0
+            with pytest.raises(TransportError, match="503") as exc_info:
+                await client.get_series_page("1")
+
+    assert page == server.fixture("book_727250.html").decode()
+    assert "".join(chunks) == server.fixture("author_5803_by_date.html").decode()
+    assert exc_info.value.status == 503
+
+
+@pytest.mark.asyncio
+async def test_http2_multiplexes_one_connection(tmp_path, monkeypatch):
+    """Concurrent pages and downloads share one HTTP/2 connection."""
+    pytest.importorskip("h2")
+    monkeypatch.setattr(config, "DOWNLOAD_DIR", tmp_path)
+
+    async with StubFlibustaServer(http2=True, file_size=300_000) as server:
+        client = FlibustaClient(
+            server.base_url, lambda: HttpxTransport(http2=True, http1=False)
+        )
+        async with client:
+            pages = await asyncio.gather(
+                *[client.get_book_details_page(str(i)) for i in range(1, 11)]
+            )
+            paths = await asyncio.gather(
+                *[client.try_download_book(str(i)) for i in range(1, 4)]
+            )
+
+            with pytest.raises(TransportError) as exc_info:
+                await client.get_page(f"{server.base_url}/b/1/txt")
+
+    assert all(f"var bookId = {i}" in page for i, page in enumerate(pages, 1))
+    assert (tmp_path / "book_2.epub").read_bytes() == server.synthetic_file("2")
+    assert len(paths) == 3
+    assert exc_info.value.status == 404
+    assert len(server.connections) == 1
@@ -0,0 +1,128 @@
+"""Tests for incremental new books watcher."""
+
+import pytest
+import pytest_asyncio
+
+from services.client import FlibustaClient
+from services.parser import FlibustaParser
+from services.scheduler import RequestScheduler
+from services.watcher import NewBooksWatcher, WatermarkStore
+from tests.stub_server import StubFlibustaServer
+
+DATE_PAGE_HTML = """
+<h1 class="title">Стивен Кинг</h1>
+<h4>17.06.2025</h4>
+<div><a href="/b/831271">После заката</a></div>
+<div><a href="/b/831272">Холли</a></div>
+<h4>11.06.2025</h4>
+<div><a href="/b/830578">Четыре сезона</a></div>
+<div><a href="/b/830579">Сказка</a></div>
+<h4>14.02.2025</h4>
+<div><a href="/b/816826">50 постапокалипсисов</a></div>
+"""
+
+
+@pytest.fixture
+def parser():
+    return FlibustaParser()
+
+
+@pytest_asyncio.fixture
+async def stub_server():
+    async with StubFlibustaServer() as server:
+        yield server
+
+
+def make_watcher(server, tmp_path):
+    client = FlibustaClient(server.base_url)
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    return NewBooksWatcher(client, FlibustaParser(), store)
+
+
+def test_parse_author_books_since(parser):
+    """Books on the watermark date are kept unless already seen."""
+    books = parser.parse_author_books_since(DATE_PAGE_HTML, "11.06.2025", {"830578"})
+
+    assert [book.id for book in books] == ["831271", "831272", "830579"]
+    assert books[0].authors == ["Стивен Кинг"]
+    assert books[-1].added_date == "11.06.2025"
+
+
+def test_parse_author_books_since_without_watermark(parser):
+    books = parser.parse_author_books_since(DATE_PAGE_HTML)
+
+    assert len(books) == 5
+
+
+@pytest.mark.asyncio
+async def test_first_check_records_watermark(stub_server, tmp_path):
+    """First check reads only the newest date group."""
+    watcher = make_watcher(stub_server, tmp_path)
+    page_size = len(stub_server.fixture("author_5803_by_date.html").decode())
+
+    async with watcher.client:
+        (updates,) = await watcher.check_new_books(["5803"])
+
+    assert updates.initialized is True
+    assert updates.new_books == []
+    assert watcher.store.get("5803") == {
+        "date": "17.06.2025",
+        "book_id": "831271",
+        "seen_ids": ["831271"],
+    }
+    assert watcher.stats["early_stops"] == 1
+    assert watcher.stats["chars_read"] < page_size / 4
+
+
+@pytest.mark.asyncio
+async def test_reports_only_books_after_watermark(stub_server, tmp_path):
+    """Books newer than the watermark are returned and the page read stops."""
+    watcher = make_watcher(stub_server, tmp_path)
+    watcher.store.set(
+        "5803", {"date": "11.06.2025", "book_id": "830578", "seen_ids": ["830578"]}
+    )
+
+    async with watcher.client:
+        (updates,) = await watcher.check_new_books(["5803"])
+        (repeat,) = await watcher.check_new_books(["5803"])
+
+    assert [book.id for book in updates.new_books] == ["831271"]
+    assert updates.new_books[0].added_date == "17.06.2025"
+    assert repeat.new_books == []
+    assert watcher.stats["early_stops"] == 2
+
+    # Watermark was persisted
+    stored = WatermarkStore(tmp_path / "watermarks.json")
+    assert stored.get("5803")["date"] == "17.06.2025"
+
+
+@pytest.mark.asyncio
+async def test_many_authors_with_errors(stub_server, tmp_path):
+    """Authors are deduplicated and failures are reported per author."""
+    watcher = make_watcher(stub_server, tmp_path)
+
+    async with watcher.client:
+        results = await watcher.check_new_books(["5803", "17", "5803", "bad"])
+
+    assert [r.author_id for r in results] == ["5803", "17", "bad"]
+    assert results[0].initialized and results[1].initialized
+    assert results[2].error is not None
+    assert stub_server.requests["author"] == 2
+
+
+@pytest.mark.asyncio
+async def test_checks_are_not_capped_by_background_limit(stub_server, tmp_path):
+    """A caller waits for the checks, so they run at interactive priority."""
+    client = FlibustaClient(
+        stub_server.base_url,
+        scheduler=RequestScheduler(max_concurrency=8, class_limits={"background": 1}),
+    )
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    watcher = NewBooksWatcher(client, FlibustaParser(), store, concurrency=4)
+
+    async with client:
+        await watcher.check_new_books(["5803", "17"])
+
+    classes = client.scheduler.stats["classes"]
+    assert classes["interactive"]["admitted"] == 2
+    assert classes["background"]["admitted"] == 0
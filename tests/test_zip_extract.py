@@ -0,0 +1,166 @@
+"""Tests for streaming extraction of zipped fb2 downloads."""
+
+import io
+import random
+import zipfile
+
+import pytest
+
+from config import config
+from services.client import FlibustaClient
+from services.download import ZipStreamExtractor, extracted_filename
+from tests.stub_server import StubFlibustaServer
+
+FB2_NAME = "King_Siyanie.417291.fb2"
+
+
+def make_fb2(size: int) -> bytes:
+    """Pseudo-random fb2 document of roughly ``size`` bytes."""
+    rnd = random.Random(417291)  # noqa: S311
+    words = ["Джек", "Дэнни", "Венди", "отель", "Оверлук", "снег", "зима", "сияние"]
+    head = b'<?xml version="1.0" encoding="utf-8"?><FictionBook><body>'
+    parts = [head]
+    total = len(head)
+    while total < size:
+        paragraph = (
+            "<p>" + " ".join(rnd.choice(words) for _ in range(40)) + "</p>\n"
+        ).encode()
+        parts.append(paragraph)
+        total += len(paragraph)
+    parts.append(b"</body></FictionBook>")
+    return b"".join(parts)
+
+
+class NonSeekable(io.RawIOBase):
+    """Write-only stream that forces zipfile to use data descriptors."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+
+def make_zip(payload: bytes, name: str, compression: int, streamed=False) -> bytes:
+    """Zip payload in memory, optionally with a trailing data descriptor."""
+    if streamed:
+        stream = NonSeekable()
+        with zipfile.ZipFile(stream, "w", compression) as archive:
+            with archive.open(name, "w") as entry:
+                entry.write(payload)
+        return bytes(stream.buffer)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        archive.writestr(name, payload)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def fb2_payload():
+    return make_fb2(12 * 1024 * 1024)
+
+
+@pytest.mark.parametrize(
+    "compression, streamed",
+    [
+        (zipfile.ZIP_DEFLATED, False),
+        (zipfile.ZIP_DEFLATED, True),
+        (zipfile.ZIP_STORED, False),
+    ],
+)
+def test_extractor_streams_large_entry(fb2_payload, compression, streamed):
+    """Entry is reproduced exactly, in pieces bounded by max_output."""
+    archive = make_zip(fb2_payload, FB2_NAME, compression, streamed)
+    extractor = ZipStreamExtractor(max_output=256 * 1024)
+
+    chunks = [archive[i : i + 65536] for i in range(0, len(archive), 65536)]
+    pieces = []
+    chunk_iter = iter(chunks)
+    for chunk in chunk_iter:
+        if extractor.read_header(chunk):
+            break
+    pieces.extend(extractor.feed(b""))
+    for chunk in chunk_iter:
+        pieces.extend(extractor.feed(chunk))
+    extractor.finish()
+
+    assert extractor.entry_name == FB2_NAME
+    assert max(len(piece) for piece in pieces) <= 256 * 1024
+    assert b"".join(pieces) == fb2_payload
+
+
+def test_extractor_bounds_output_of_highly_compressible_data():
+    """A small compressed chunk never expands into one huge piece."""
+    archive = make_zip(b"\0" * (32 * 1024 * 1024), "zeros.fb2", zipfile.ZIP_DEFLATED)
+    extractor = ZipStreamExtractor(max_output=1024 * 1024)
+
+    assert extractor.read_header(archive)
+    sizes = [len(piece) for piece in extractor.feed(b"")]
+    extractor.finish()
+
+    assert sum(sizes) == 32 * 1024 * 1024
+    assert max(sizes) <= 1024 * 1024
+
+
+def test_extractor_detects_truncation_and_corruption(fb2_payload):
+    archive = make_zip(fb2_payload[:100_000], FB2_NAME, zipfile.ZIP_DEFLATED)
+
+    truncated = ZipStreamExtractor()
+    assert truncated.read_header(archive[: len(archive) // 2])
+    list(truncated.feed(b""))
+    with pytest.raises(ValueError, match="Truncated"):
+        truncated.finish()
+
+    stored = bytearray(make_zip(b"abcdef" * 1000, FB2_NAME, zipfile.ZIP_STORED))
+    data_start = 30 + len(FB2_NAME)
+    stored[data_start] ^= 0xFF
+    corrupted = ZipStreamExtractor()
+    assert corrupted.read_header(bytes(stored))
+    list(corrupted.feed(b""))
+    with pytest.raises(ValueError, match="CRC"):
+        corrupted.finish()
+
+
+def test_extracted_filename():
+    assert extracted_filename("dir/King.fb2", "x.fb2.zip") == "King.fb2"
+    assert extracted_filename("..\\..\\evil.fb2", "x.fb2.zip") == "evil.fb2"
+    assert extracted_filename("", "King.fb2.zip") == "King.fb2"
+
+
+@pytest.mark.asyncio
+async def test_download_extracts_fb2_zip(tmp_path, monkeypatch, fb2_payload):
+    """fb2.zip download is saved as the inner fb2 file."""
+    monkeypatch.setattr(config, "DOWNLOAD_DIR", tmp_path)
+    archive = make_zip(fb2_payload, FB2_NAME, zipfile.ZIP_DEFLATED, streamed=True)
+
+    async with StubFlibustaServer() as server:
+        server.files["417291"] = (archive, f"{FB2_NAME}.zip")
+        async with FlibustaClient(server.base_url) as client:
+            file_path = await client.try_download_book("417291", extract_zip=True)
+
+    assert file_path == str(tmp_path / FB2_NAME)
+    assert (tmp_path / FB2_NAME).read_bytes() == fb2_payload
+    assert not (tmp_path / f"{FB2_NAME}.zip").exists()
+
+
+@pytest.mark.asyncio
+async def test_download_keeps_epub_and_plain_files(tmp_path, monkeypatch):
+    """epub archives and non-zip payloads are saved unchanged."""
+    monkeypatch.setattr(config, "DOWNLOAD_DIR", tmp_path)
+    epub = make_zip(b"application/epub+zip", "mimetype", zipfile.ZIP_STORED)
+
+    async with StubFlibustaServer(file_size=300_000) as server:
+        server.files["1"] = (epub, "book.epub")
+        async with FlibustaClient(server.base_url) as client:
+            epub_path = await client.try_download_book("1", extract_zip=True)
+            plain_path = await client.try_download_book("2", extract_zip=True)
+
+        assert (tmp_path / "book.epub").read_bytes() == epub
+        assert epub_path == str(tmp_path / "book.epub")
+        assert (tmp_path / "book_2.epub").read_bytes() == server.synthetic_file("2")
+        assert plain_path == str(tmp_path / "book_2.epub")